@@ -1,37 +1,34 @@
-import re
-
-def get_latest_trend_entry(material: str, dataset: dict, date: str = "latest", field: str = None):
+def get_latest_trend_entry(material: str, dataset, date: str = "latest", field: str = None):
     """
     Returns the latest or date-specific entry from the trendline dataset for a given material.
-    Each material maps to a list of date-stamped records.
+    `dataset` is a SeriesTable (series_store.py); dates are resolved by month ordinal,
+    so the lookup cost does not depend on history length.
     Optionally returns only a specific field (e.g., MoM or YoY).
     """
-    records = dataset.get(material)
-    if not records:
+    series = dataset.get(material)
+    if series is None:
         return {"error": f"Material '{material}' not found in dataset."}
 
-    # Ensure all entries have a valid 'Date' key
-    dated_records = [r for r in records if "Date" in r and re.match(r"\d{4}-\d{2}", r["Date"])]
-    if not dated_records:
+    if series.latest is None:
         return {"error": f"No valid date entries found for '{material}'."}
 
     # Find the correct entry
     if date == "latest":
-        target = max(dated_records, key=lambda r: r["Date"])
+        i = series.latest
     else:
-        target = next((r for r in dated_records if r["Date"] == date), None)
-        if not target:
+        i = series.index_of(date)
+        if i is None:
             return {"error": f"No entry found for date '{date}' in '{material}'."}
 
     if field:
-        return {field: target.get(field)}
-    return target
+        return {field: series.value(field, i) if field in series.columns else None}
+    return series.entry(i)
 
 
-def get_trend_mom_summary(material: str, dataset: dict, date: str):
+def get_trend_mom_summary(material: str, dataset, date: str):
     """
     Returns the MoM and YoY values for a specific material and month from the trendline dataset.
-    Expects dataset format:
+    `dataset` is a SeriesTable built from:
     {
         "Material Name": [
             { "Date": "YYYY-MM", "MoM": float, "YoY": float },
@@ -39,19 +36,19 @@ def get_trend_mom_summary(material: str, dataset: dict, date: str):
         ]
     }
     """
-    records = dataset.get(material)
-    if not records:
+    series = dataset.get(material)
+    if series is None:
         return {"error": f"Material '{material}' not found in dataset."}
 
     # Look for exact date match
-    match = next((entry for entry in records if entry.get("Date") == date), None)
-    if not match:
+    i = series.index_of(date)
+    if i is None:
         return {"error": f"No data for '{material}' in {date}."}
 
     return {
         "Date": date,
-        "MoM": match.get("MoM"),
-        "YoY": match.get("YoY")
+        "MoM": series.value("MoM", i),
+        "YoY": series.value("YoY", i)
     }
 
 
@@ -0,0 +1,43 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+from openai import OpenAI
+
+# === Repo root on path so the API's prompt builders are shared ===
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+from gpt_client import GPT_MODEL
+from summary_narratives import NARRATIVE_TEMPERATURE, build_narratives_artifact
+
+JSON_DIR = REPO_ROOT / "AIBrain" / "JSONS"
+snapshot_path = JSON_DIR / "latest_snapshot.json"
+cluster_path = JSON_DIR / "cluster_data.json"
+output_path = JSON_DIR / "summary_narratives.json"
+
+# === Load the inputs written by execsummary.py and cluster_JSON_creator.py ===
+with open(snapshot_path) as f:
+    snapshot_summary = json.load(f)
+with open(cluster_path) as f:
+    cluster_data = json.load(f)
+
+client = OpenAI(api_key=os.getenv("GPT_KEY") or os.getenv("OPENAI_API_KEY"))
+
+
+def generate(messages):
+    response = client.chat.completions.create(
+        model=GPT_MODEL,
+        messages=messages,
+        temperature=NARRATIVE_TEMPERATURE
+    )
+    return response.choices[0].message.content.strip()
+
+
+# === Generate exec + cluster narratives once for this data release ===
+narratives = build_narratives_artifact(snapshot_summary, cluster_data, generate)
+
+with open(output_path, "w") as f:
+    json.dump(narratives, f, indent=2)
+
+print(f"✅ Summary narratives saved to: {output_path} ({1 + len(narratives['clusters'])} narratives)")
@@ -0,0 +1,97 @@
+# app_logging.py
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# === CONFIG ===
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# json (one object per line) or text
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Fraction of successful, fast requests written to the access log
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+# Requests at least this slow (ms) are always logged
+LOG_SLOW_MS = float(os.getenv("LOG_SLOW_MS", "1000"))
+
+# Standard LogRecord attributes; anything else passed via `extra` is a structured field
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _configure() -> logging.Logger:
+    """
+    Handlers only enqueue records; a background listener thread does the
+    formatting and the stdout write, so logging never blocks a request.
+    """
+    root = logging.getLogger("whatsitcost")
+    root.setLevel(LOG_LEVEL)
+    root.propagate = False
+    if root.handlers:
+        return root
+
+    output = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "text":
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    else:
+        output.setFormatter(JSONFormatter())
+    records = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(records))
+    listener = logging.handlers.QueueListener(records, output, respect_handler_level=False)
+    listener.start()
+    atexit.register(listener.stop)
+    return root
+
+
+_root = _configure()
+_access = logging.getLogger("whatsitcost.access")
+
+
+def get_logger(name: str) -> logging.Logger:
+    return _root.getChild(name)
+
+
+def log_request(scope, route: str, status: int, seconds: float, **fields):
+    """
+    Structured access-log line for one request. Errors and slow requests are
+    always written; everything else is sampled at LOG_SAMPLE_RATE.
+    """
+    duration_ms = seconds * 1000
+    if status >= 500:
+        level = logging.ERROR
+    elif duration_ms >= LOG_SLOW_MS:
+        level = logging.WARNING
+    elif random.random() < LOG_SAMPLE_RATE:
+        level = logging.INFO
+    else:
+        return
+    if not _access.isEnabledFor(level):
+        return
+    _access.log(level, "request", extra={
+        "method": scope["method"],
+        "route": route,
+        "path": scope["path"],
+        "status": status,
+        "duration_ms": round(duration_ms, 2),
+        "sample_rate": 1.0 if level > logging.INFO else LOG_SAMPLE_RATE,
+        **fields,
+    })
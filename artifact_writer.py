@@ -0,0 +1,148 @@
+# artifact_writer.py
+
+import gzip
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import brotli
+except ImportError:  # .br siblings are skipped
+    brotli = None
+
+# === CONFIG ===
+# Processes serializing artifacts; 1 writes inline. Each artifact is pickled
+# into its worker, which costs more than it saves unless there are spare
+# cores (benchmarks/artifact_writer_bench.py measures it)
+WRITER_WORKERS = int(os.getenv("ARTIFACT_WRITER_WORKERS", "1"))
+# 11 is the usual static-asset setting but takes ~20x longer for a few % smaller files
+BROTLI_QUALITY = int(os.getenv("ARTIFACT_BROTLI_QUALITY", "9"))
+GZIP_LEVEL = 9
+
+# Precompressed sibling suffixes
+COMPRESSIONS = ("gz", "br")
+# Only text artifacts get siblings; the panel .npz is already deflated
+COMPRESSIBLE_SUFFIXES = (".json",)
+
+
+def encode_json(data, compact: bool = False) -> bytes:
+    """
+    Artifact bytes: json.dump(indent=2) output by default, so existing files
+    are reproduced exactly; compact drops all whitespace.
+    """
+    if compact:
+        return json.dumps(data, separators=(",", ":")).encode()
+    return json.dumps(data, indent=2).encode()
+
+
+def compress(content: bytes, kind: str) -> bytes:
+    if kind == "gz":
+        # mtime=0 keeps the bytes stable across runs
+        return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+    if kind == "br":
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    raise ValueError(f"unknown compression {kind!r}")
+
+
+def write_atomic(path: str, content: bytes):
+    """
+    Writes through a temp file in the same directory and renames it into
+    place, so readers see either the old file or the new one, never a
+    partial write.
+    """
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_artifact(output_dir: str, name: str, data, compact: bool = False, siblings=()) -> dict:
+    """
+    Serializes (unless `data` is already bytes) and writes one artifact plus
+    its compressed siblings (text artifacts only). Siblings go first, so
+    once the artifact itself is replaced they already match it; siblings of
+    kinds not requested are removed rather than left stale. Returns
+    {filename: size in bytes}.
+    """
+    content = data if isinstance(data, bytes) else encode_json(data, compact)
+    path = os.path.join(output_dir, name)
+    if not name.endswith(COMPRESSIBLE_SUFFIXES):
+        siblings = ()
+    sizes = {}
+    for kind in COMPRESSIONS:
+        sibling = f"{path}.{kind}"
+        if kind in siblings:
+            packed = compress(content, kind)
+            write_atomic(sibling, packed)
+            sizes[f"{name}.{kind}"] = len(packed)
+        elif os.path.exists(sibling):
+            os.remove(sibling)
+    write_atomic(path, content)
+    return {name: len(content), **sizes}
+
+
+def _size(size: int) -> str:
+    return f"{size / 1e6:.1f} MB" if size >= 1e6 else f"{size / 1e3:.0f} KB"
+
+
+class ArtifactWriter:
+    """
+    Writer stage for prepare_data.py: write() writes an artifact inline, or
+    with workers > 1 hands it to a pool of processes (json.dumps with indent
+    runs in pure Python, so threads would serialize one file at a time), and
+    close() waits for all of them. Every file is written atomically by
+    write_artifact.
+    """
+
+    def __init__(self, output_dir: str, compact: bool = False, siblings=(), workers: int = WRITER_WORKERS):
+        self.output_dir = output_dir
+        self.compact = compact
+        self.siblings = tuple(siblings)
+        if "br" in self.siblings and brotli is None:
+            print("⚠️ brotli not installed — skipping .br siblings")
+            self.siblings = tuple(kind for kind in self.siblings if kind != "br")
+        self._pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        self._pending = []
+
+    def write(self, name: str, data):
+        """
+        Queues one artifact: bytes are written as they are, anything else as JSON.
+        """
+        args = (self.output_dir, name, data, self.compact, self.siblings)
+        if self._pool is None:
+            self._pending.append((name, write_artifact(*args)))
+        else:
+            self._pending.append((name, self._pool.submit(write_artifact, *args)))
+
+    def close(self) -> dict:
+        """
+        Waits for every queued artifact, printing each in the order it was
+        queued, and re-raises the first failure. Returns {filename: size}.
+        """
+        written = {}
+        try:
+            for name, result in self._pending:
+                sizes = result if isinstance(result, dict) else result.result()
+                extra = ", ".join(f".{f.rsplit('.', 1)[1]} {_size(s)}" for f, s in sizes.items() if f != name)
+                print(f"✅ {name} ({_size(sizes[name])}{', ' + extra if extra else ''})")
+                written.update(sizes)
+        finally:
+            self._pending = []
+            if self._pool is not None:
+                self._pool.shutdown()
+        return written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
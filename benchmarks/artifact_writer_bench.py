@@ -0,0 +1,83 @@
+"""
+Benchmark for the artifact writer stage of prepare_data.py: the artifacts of
+a full run on the checked-in AIBrain/theBehemoth.csv, built once, then written
+through ArtifactWriter at each worker count. Every worker count is checked to
+write the same files before timings are reported.
+
+    python benchmarks/artifact_writer_bench.py
+    python benchmarks/artifact_writer_bench.py --workers 1,2,4 --compact --compress gz,br
+"""
+
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import prepare_data  # noqa: E402
+from artifact_writer import ArtifactWriter  # noqa: E402
+
+
+class Collector:
+    """
+    Stands in for ArtifactWriter in prepare_data.run_full, keeping what it is given.
+    """
+
+    def __init__(self):
+        self.artifacts = []
+
+    def write(self, name: str, data):
+        self.artifacts.append((name, data))
+
+
+def write_all(artifacts: list, output_dir: str, workers: int, compact: bool, siblings: list) -> float:
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ArtifactWriter(output_dir, compact=compact, siblings=siblings, workers=workers) as writer:
+            for name, data in artifacts:
+                writer.write(name, data)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=prepare_data.INPUT_CSV)
+    parser.add_argument("--workers", default=f"1,{max(2, os.cpu_count() or 1)}", help="comma-separated worker counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per worker count; the best is reported")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--compress", default="", metavar="KINDS")
+    args = parser.parse_args()
+    workers = [int(w) for w in args.workers.split(",")]
+    siblings = [kind for kind in args.compress.split(",") if kind]
+
+    collector = Collector()
+    prepare_data.run_full(collector, *prepare_data.load_panel(args.csv))
+    print(f"📦 {len(collector.artifacts)} artifacts, {os.cpu_count()} CPU(s)")
+
+    with tempfile.TemporaryDirectory(prefix="writer-bench-") as root:
+        outputs = {}
+        for count in workers:
+            outputs[count] = os.path.join(root, str(count))
+            os.makedirs(outputs[count])
+            best = min(write_all(collector.artifacts, outputs[count], count, args.compact, siblings)
+                       for _ in range(args.repeat))
+            print(f"{f'workers={count}':<14}{best * 1000:>10.1f} ms")
+
+        reference = outputs[workers[0]]
+        names = sorted(os.listdir(reference))
+        for count in workers[1:]:
+            _, mismatch, errors = filecmp.cmpfiles(reference, outputs[count], names, shallow=False)
+            if mismatch or errors:
+                raise SystemExit(f"❌ workers={count} wrote different files: {mismatch + errors}")
+    print("✅ Every worker count wrote the same files")
+
+
+if __name__ == "__main__":
+    main()
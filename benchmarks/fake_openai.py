@@ -0,0 +1,129 @@
+"""
+Local stand-in for the OpenAI chat completions API, for benchmarks.
+
+    python benchmarks/fake_openai.py --port 8765 --latency 0.4 --jitter 0.1
+
+Point the API at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1.
+Intent-resolution calls (temperature 0) get a canned intent dict for a
+material named in the prompt; everything else gets a canned paragraph.
+Streaming requests get the paragraph word by word as SSE chunks, with usage
+in the final chunk.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+CANNED_ANSWER = (
+    "Prices for this material rose modestly last month and are running ahead of last year. "
+    "The three-month average points to continued but slowing growth, so contractors should "
+    "expect firm pricing through the next quarter."
+)
+INTENT_METRICS = ["momentum", "spike", "rolling"]
+
+config = {"latency": 0.4, "jitter": 0.1, "token_delay": 0.02}
+app = FastAPI(title="Fake OpenAI")
+
+
+def _delay() -> float:
+    return max(0.0, config["latency"] + random.uniform(-config["jitter"], config["jitter"]))
+
+
+def _usage(messages: list, text: str) -> dict:
+    # ~4 characters per token, close enough for load accounting
+    prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+    completion_tokens = max(1, len(text) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _intent_reply(messages: list) -> str:
+    """
+    Picks the first material from the system prompt's "- name" list that the
+    user prompt mentions, mirroring what the real model returns.
+    """
+    system = messages[0].get("content") or ""
+    prompt = (messages[-1].get("content") or "").lower()
+    material = "Cement"
+    for name in re.findall(r"^- (.+)$", system, re.M):
+        if name.strip().lower() in prompt:
+            material = name.strip()
+            break
+    return repr({"material": material, "metric": random.choice(INTENT_METRICS), "date": "latest"})
+
+
+def _completion(body: dict, text: str) -> dict:
+    return {
+        "id": f"chatcmpl-fake-{random.getrandbits(32):08x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop",
+        }],
+        "usage": _usage(body.get("messages", []), text),
+    }
+
+
+def _chunk(body: dict, delta: dict, finish_reason=None, usage=None) -> str:
+    chunk = {
+        "id": "chatcmpl-fake-stream",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4"),
+        "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    if usage:
+        chunk["usage"] = usage
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    text = _intent_reply(messages) if body.get("temperature") == 0 else CANNED_ANSWER
+    await asyncio.sleep(_delay())
+
+    if not body.get("stream"):
+        return JSONResponse(_completion(body, text))
+
+    async def events():
+        yield _chunk(body, {"role": "assistant", "content": ""})
+        for word in text.split(" "):
+            await asyncio.sleep(config["token_delay"])
+            yield _chunk(body, {"content": word + " "})
+        yield _chunk(body, {}, finish_reason="stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield _chunk(body, {}, usage=_usage(messages, text))
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=config["latency"], help="seconds before the first byte")
+    parser.add_argument("--jitter", type=float, default=config["jitter"], help="± seconds of uniform jitter")
+    parser.add_argument("--token-delay", type=float, default=config["token_delay"], help="seconds between streamed words")
+    args = parser.parse_args()
+    config.update(latency=args.latency, jitter=args.jitter, token_delay=args.token_delay)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
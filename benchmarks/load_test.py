@@ -0,0 +1,343 @@
+"""
+Load test for the Material Trends API with no GitHub or OpenAI traffic.
+
+Boots benchmarks/fake_openai.py and `uvicorn main:app` against the checked-in
+AIBrain/JSONS (DATASET_OFFLINE=1), drives a weighted route mix at fixed
+concurrency, and writes per-route latency percentiles and throughput to JSON.
+
+    python benchmarks/load_test.py --concurrency 32 --duration 30
+    python benchmarks/load_test.py --mix trendline=50,gpt=50 --openai-latency 1.0
+    python benchmarks/load_test.py --url http://127.0.0.1:8000   # existing server
+    python benchmarks/load_test.py --baseline benchmarks/results/<older>.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote
+
+import httpx
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = REPO_ROOT / "benchmarks"
+RESULTS_DIR = BENCH_DIR / "results"
+TRENDLINES_PATH = REPO_ROOT / "AIBrain" / "JSONS" / "material_trendlines.json"
+
+DEFAULT_MIX = "trendline=40,mom-series-multi=20,correlations=20,gpt=20"
+
+GPT_PROMPTS = [
+    "How is {m} trending lately?",
+    "What's the latest momentum for {m}?",
+    "Any spikes in {m} recently?",
+    "Give me the rolling average for {m}",
+    "Has {m} been volatile this year?",
+]
+
+# main.GPT_ERROR_MESSAGE: /gpt answers it with a 200 when the request fails
+GPT_ERROR_MESSAGE = (
+    "I'm sorry, I could not process this request. "
+    "Please let Ben know at Ben@mbawpa.org. "
+    "Copy and paste your query. "
+    "The errors can be fixed and will make me smarter."
+)
+
+
+def load_materials() -> list:
+    with open(TRENDLINES_PATH) as f:
+        names = list(json.load(f))
+    # Names containing "/" cannot be addressed in a path segment
+    return [m for m in names if "/" not in m]
+
+
+# === Route mix: name → (rng, materials) → (method, path, json body) ===
+def req_trendline(rng, materials):
+    return "GET", f"/trendline/{quote(rng.choice(materials))}", None
+
+
+def req_mom_series_multi(rng, materials):
+    names = rng.sample(materials, rng.randint(2, 4))
+    return "GET", f"/mom-series-multi?materials={quote(','.join(names))}&months={rng.choice([12, 24, 36])}", None
+
+
+def req_correlations(rng, materials):
+    base, target = rng.sample(materials, 2)
+    return "GET", f"/correlations/{quote(base)}/{quote(target)}", None
+
+
+def req_correlations_top(rng, materials):
+    return "GET", f"/correlations-top/{quote(rng.choice(materials))}?k=10", None
+
+
+def req_series_bulk(rng, materials):
+    names = rng.sample(materials, 8)
+    return "GET", f"/series-bulk?materials={quote(','.join(names))}&metrics=mom,yoy", None
+
+
+def req_gpt(rng, materials):
+    return "POST", "/gpt", {"prompt": rng.choice(GPT_PROMPTS).format(m=rng.choice(materials))}
+
+
+def req_gpt_stream(rng, materials):
+    return "POST", "/gpt/stream", {"prompt": rng.choice(GPT_PROMPTS).format(m=rng.choice(materials))}
+
+
+ROUTES = {
+    "trendline": req_trendline,
+    "mom-series-multi": req_mom_series_multi,
+    "correlations": req_correlations,
+    "correlations-top": req_correlations_top,
+    "series-bulk": req_series_bulk,
+    "gpt": req_gpt,
+    "gpt-stream": req_gpt_stream,
+}
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise SystemExit(f"Unknown route '{name}' in --mix; valid: {', '.join(ROUTES)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# === Process management ===
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise SystemExit(f"Timed out waiting for {url}")
+
+
+def start_servers(args, cache_dir: str):
+    openai_port, api_port = free_port(), free_port()
+    fake = subprocess.Popen([
+        sys.executable, str(BENCH_DIR / "fake_openai.py"), "--port", str(openai_port),
+        "--latency", str(args.openai_latency), "--jitter", str(args.openai_jitter),
+        "--token-delay", str(args.openai_token_delay),
+    ])
+    env = {
+        **os.environ,
+        "GPT_KEY": "bench-key",
+        "OPENAI_API_KEY": "bench-key",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+        "DATASET_OFFLINE": "1",
+        "DATASET_CACHE_DIR": cache_dir,
+        "DATASET_REFRESH_SECONDS": "0",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "ERROR"),
+    }
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(api_port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        cwd=REPO_ROOT, env=env,
+    )
+    url = f"http://127.0.0.1:{api_port}"
+    try:
+        wait_until_ready(f"{url}/ready", args.boot_timeout)
+    except BaseException:
+        stop_servers([api, fake])
+        raise
+    return url, [api, fake]
+
+
+def stop_servers(processes):
+    for p in processes:
+        if p.poll() is None:
+            p.send_signal(signal.SIGINT)
+    for p in processes:
+        try:
+            p.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            p.kill()
+
+
+# === Load generation ===
+def classify(name: str, response: httpx.Response) -> str:
+    """
+    "ok", "http" for a 4xx/5xx status, or "gpt" for a /gpt failure, which
+    comes back as a 200 carrying GPT_ERROR_MESSAGE (or an SSE error event).
+    """
+    if response.status_code >= 400:
+        return "http"
+    if name == "gpt":
+        try:
+            body = response.json()
+        except ValueError:
+            return "gpt"
+        return "gpt" if body.get("response") == GPT_ERROR_MESSAGE else "ok"
+    if name == "gpt-stream":
+        return "gpt" if "event: error" in response.text.splitlines() else "ok"
+    return "ok"
+
+
+async def run_load(url: str, mix: dict, concurrency: int, duration: float, warmup: float, seed: int, timeout: float):
+    materials = load_materials()
+    names, weights = list(mix), list(mix.values())
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    gpt_errors = {name: 0 for name in names}
+    record_from = time.monotonic() + warmup
+    stop_at = record_from + duration
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        async def worker(worker_id: int):
+            rng = random.Random(seed * 1000 + worker_id)
+            while True:
+                now = time.monotonic()
+                if now >= stop_at:
+                    return
+                name = rng.choices(names, weights)[0]
+                method, path, body = ROUTES[name](rng, materials)
+                t0 = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    await response.aread()
+                    outcome = classify(name, response)
+                except httpx.HTTPError:
+                    outcome = "http"
+                elapsed = time.perf_counter() - t0
+                # Only requests started inside the measured window count
+                if now >= record_from:
+                    samples[name].append(elapsed)
+                    if outcome == "http":
+                        errors[name] += 1
+                    elif outcome == "gpt":
+                        gpt_errors[name] += 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return samples, errors, gpt_errors, duration
+
+
+def summarize(latencies: list, errors: int, gpt_errors: int, duration: float) -> dict:
+    if not latencies:
+        return {"count": 0, "errors": errors, "gpt_errors": gpt_errors, "rps": 0.0}
+    ms = np.asarray(latencies) * 1000
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "gpt_errors": gpt_errors,
+        "rps": round(len(latencies) / duration, 2),
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(report: dict, baseline: dict = None):
+    header = f"{'route':<18}{'count':>8}{'err':>6}{'gpterr':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+    if baseline:
+        header += f"{'Δp95':>9}"
+    print(header)
+    rows = list(report["routes"].items()) + [("overall", report["overall"])]
+    for name, r in rows:
+        line = (f"{name:<18}{r['count']:>8}{r['errors']:>6}{r.get('gpt_errors', 0):>8}{r['rps']:>9.1f}"
+                f"{r.get('p50_ms', 0):>9.1f}{r.get('p95_ms', 0):>9.1f}{r.get('p99_ms', 0):>9.1f}")
+        if baseline:
+            old = baseline["overall"] if name == "overall" else baseline.get("routes", {}).get(name)
+            if old and old.get("p95_ms") and r.get("p95_ms"):
+                line += f"{(r['p95_ms'] / old['p95_ms'] - 1) * 100:>+8.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="benchmark an already-running server instead of booting one")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"route=weight list (routes: {', '.join(ROUTES)})")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before measuring")
+    parser.add_argument("--timeout", type=float, default=60, help="per-request timeout")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the booted API")
+    parser.add_argument("--openai-latency", type=float, default=0.4)
+    parser.add_argument("--openai-jitter", type=float, default=0.1)
+    parser.add_argument("--openai-token-delay", type=float, default=0.02)
+    parser.add_argument("--boot-timeout", type=float, default=60)
+    parser.add_argument("--out", help="result file (default benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--baseline", help="earlier result file to compare p95 against")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    processes = []
+    with tempfile.TemporaryDirectory(prefix="bench-dataset-") as cache_dir:
+        url = args.url
+        if url is None:
+            url, processes = start_servers(args, cache_dir)
+        try:
+            samples, errors, gpt_errors, duration = asyncio.run(
+                run_load(url, mix, args.concurrency, args.duration, args.warmup, args.seed, args.timeout)
+            )
+        finally:
+            stop_servers(processes)
+
+    routes = {name: summarize(samples[name], errors[name], gpt_errors[name], duration) for name in mix}
+    everything = [s for name in mix for s in samples[name]]
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "config": {
+            "url": args.url or "booted",
+            "mix": mix,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "workers": args.workers if args.url is None else None,
+            "openai_latency_s": args.openai_latency if args.url is None else None,
+            "openai_jitter_s": args.openai_jitter if args.url is None else None,
+            "seed": args.seed,
+        },
+        "routes": routes,
+        "overall": summarize(everything, sum(errors.values()), sum(gpt_errors.values()), duration),
+    }
+
+    out = Path(args.out) if args.out else RESULTS_DIR / (
+        f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['git_commit']}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"✅ Results written to: {out}")
+
+
+if __name__ == "__main__":
+    main()
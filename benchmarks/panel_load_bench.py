@@ -0,0 +1,96 @@
+"""
+Benchmark for dataset loading: the series datasets parsed from their JSON
+files and built into tables, against the same tables read from the columnar
+panel (material_panel.npz + manifest). Both come from the checked-in
+AIBrain/JSONS, and every table is checked to hold the same records before
+timings are reported.
+
+    python benchmarks/panel_load_bench.py
+    python benchmarks/panel_load_bench.py --repeat 10 --dir path/to/JSONS
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from correlation_engine import CorrelationTensor  # noqa: E402
+from dataset_loader import ALL_DATASET_FILES, LOCAL_JSON_DIR  # noqa: E402
+from panel_artifact import MANIFEST_FILE, PANEL_DATASETS, PANEL_FILE, read_panel  # noqa: E402
+from series_store import SeriesTable, SpikeTable  # noqa: E402
+
+
+def read(directory: str, name: str) -> bytes:
+    with open(os.path.join(directory, name), "rb") as f:
+        return f.read()
+
+
+def load_json(files: dict) -> dict:
+    datasets = {}
+    for name, content in files.items():
+        data = json.loads(content)
+        if name == "spikes":
+            data = SpikeTable(data)
+        elif name == "correlations":
+            data = CorrelationTensor(data)
+        elif name != "trends":
+            data = SeriesTable(data)
+        datasets[name] = data
+    return datasets
+
+
+def same_records(a: dict, b: dict) -> bool:
+    for name in PANEL_DATASETS:
+        if name == "trends":
+            continue
+        x, y = a[name], b[name]
+        if list(x.keys()) != list(y.keys()):
+            return False
+        if name == "correlations":
+            if any(x.top_partners(m, k=len(x.materials)) != y.top_partners(m, k=len(y.materials)) for m in x.keys()):
+                return False
+        elif name == "spikes":
+            if any(x.get(m) != y.get(m) for m in x.keys()):
+                return False
+        elif any(x.get(m).records() != y.get(m).records() for m in x.keys()):
+            return False
+    return True
+
+
+def best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=LOCAL_JSON_DIR)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per loader; the best is reported")
+    args = parser.parse_args()
+
+    json_files = {name: read(args.dir, ALL_DATASET_FILES[name]) for name in PANEL_DATASETS}
+    panel, manifest = read(args.dir, PANEL_FILE), read(args.dir, MANIFEST_FILE)
+    json_bytes = sum(len(c) for c in json_files.values())
+    print(f"📦 JSON {json_bytes / 1e6:.1f} MB in {len(json_files)} files, panel {len(panel) / 1e6:.1f} MB")
+
+    json_s, from_json = best_of(lambda: load_json(json_files), args.repeat)
+    panel_s, from_panel = best_of(lambda: read_panel(panel, manifest), args.repeat)
+    print(f"{'JSON files':<14}{json_s * 1000:>10.1f} ms")
+    print(f"{'panel':<14}{panel_s * 1000:>10.1f} ms  ({json_s / panel_s:.0f}x)")
+
+    if not same_records(from_json, from_panel):
+        raise SystemExit("❌ Panel tables differ from the JSON files")
+    print("✅ Panel tables match the JSON files")
+
+
+if __name__ == "__main__":
+    main()
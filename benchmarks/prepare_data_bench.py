@@ -0,0 +1,172 @@
+"""
+Benchmark for prepare_data.py artifact emission: the legacy per-cell and
+per-pair loops (kept here verbatim) against the whole-frame builders and the
+matrix correlation kernel, on the checked-in AIBrain/theBehemoth.csv. Each
+artifact is checked to serialize to the same bytes (json.dump indent=2)
+before its timings are reported.
+
+    python benchmarks/prepare_data_bench.py
+    python benchmarks/prepare_data_bench.py --repeat 5 --csv path/to/theBehemoth.csv
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import prepare_data  # noqa: E402
+
+
+# === Legacy emission (prepare_data.py before vectorization) ===
+def legacy_trends(df_pivot, df_mom, df_yoy):
+    material_trends = {}
+    for date in df_pivot.index:
+        date_str = date.strftime("%Y-%m")
+        material_trends[date_str] = {}
+        for series in df_pivot.columns:
+            mom = df_mom.at[date, series]
+            yoy = df_yoy.at[date, series]
+            if pd.notna(mom) or pd.notna(yoy):
+                material_trends[date_str][series] = {
+                    "MoM": round(mom, 2) if pd.notna(mom) else None,
+                    "YoY": round(yoy, 2) if pd.notna(yoy) else None
+                }
+    return material_trends
+
+
+def legacy_trendlines(df_pivot, df_mom, df_yoy):
+    trendlines = {}
+    for series in df_pivot.columns:
+        trendlines[series] = []
+        series_mom = df_mom[series]
+        series_yoy = df_yoy[series]
+        for date in df_pivot.index:
+            date_str = date.strftime("%Y-%m")
+            mom = series_mom.at[date] if date in series_mom.index else None
+            yoy = series_yoy.at[date] if date in series_yoy.index else None
+            trendlines[series].append({
+                "Date": date_str,
+                "MoM": round(mom, 2) if pd.notna(mom) else None,
+                "YoY": round(yoy, 2) if pd.notna(yoy) else None
+            })
+    return trendlines
+
+
+def legacy_spikes(df_pivot, df_mom, df_yoy, threshold=5):
+    spikes = {}
+    for series in df_pivot.columns:
+        spikes[series] = []
+        for date in df_pivot.index:
+            date_str = date.strftime("%Y-%m")
+            mom = df_mom.at[date, series]
+            yoy = df_yoy.at[date, series]
+            if pd.notna(mom) and abs(mom) >= threshold:
+                spikes[series].append({"Date": date_str, "Type": "MoM", "Change": round(mom, 2)})
+            if pd.notna(yoy) and abs(yoy) >= threshold:
+                spikes[series].append({"Date": date_str, "Type": "YoY", "Change": round(yoy, 2)})
+    return spikes
+
+
+def legacy_rolling(df_pivot, df_mom, df_yoy, window, suffix):
+    rolling = {}
+    df_mom_rolling = df_mom.rolling(window).mean()
+    df_yoy_rolling = df_yoy.rolling(window).mean()
+    for series in df_pivot.columns:
+        rolling[series] = []
+        series_mom = df_mom_rolling[series].dropna()
+        series_yoy = df_yoy_rolling[series].dropna()
+        valid_dates = series_mom.index.union(series_yoy.index).sort_values()
+        for date in valid_dates:
+            mom = series_mom[date] if date in series_mom else None
+            yoy = series_yoy[date] if date in series_yoy else None
+            if pd.notna(mom) or pd.notna(yoy):
+                rolling[series].append({
+                    "Date": date.strftime("%Y-%m"),
+                    f"MoM_{suffix}_avg": round(mom, 2) if pd.notna(mom) else None,
+                    f"YoY_{suffix}_avg": round(yoy, 2) if pd.notna(yoy) else None
+                })
+    return rolling
+
+
+def legacy_correlations(df_pivot, df_mom):
+    correlations = {}
+    for base in df_pivot.columns:
+        correlations[base] = {}
+        for target in df_pivot.columns:
+            if base == target:
+                continue
+            lags = {}
+            for lag in range(0, 4):
+                shifted = df_mom[target].shift(lag)
+                corr = df_mom[base].corr(shifted)
+                lags[f"lag_{lag}"] = round(corr, 3) if pd.notna(corr) else None
+            correlations[base][target] = lags
+    return correlations
+
+
+def cases(df_pivot, df_mom, df_yoy):
+    """
+    name → (legacy builder, new builder), both zero-argument.
+    """
+    out = {
+        "material_trends": (lambda: legacy_trends(df_pivot, df_mom, df_yoy),
+                            lambda: prepare_data.build_trends(df_mom, df_yoy)),
+        "material_trendlines": (lambda: legacy_trendlines(df_pivot, df_mom, df_yoy),
+                                lambda: prepare_data.build_trendlines(df_mom, df_yoy)),
+        "material_spikes": (lambda: legacy_spikes(df_pivot, df_mom, df_yoy),
+                            lambda: prepare_data.build_spikes(df_mom, df_yoy)),
+        "material_correlations": (lambda: legacy_correlations(df_pivot, df_mom),
+                                  lambda: prepare_data.build_correlations(df_mom)),
+    }
+    for file_name, window, suffix in prepare_data.ROLLING_WINDOWS:
+        out[file_name.removesuffix(".json")] = (
+            lambda w=window, s=suffix: legacy_rolling(df_pivot, df_mom, df_yoy, w, s),
+            lambda w=window, s=suffix: prepare_data.build_rolling(df_mom, df_yoy, w, s),
+        )
+    return out
+
+
+def best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=prepare_data.INPUT_CSV)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per builder; the best is reported")
+    args = parser.parse_args()
+
+    df_pivot, df_mom, df_yoy = prepare_data.load_panel(args.csv)
+    print(f"📊 {df_pivot.shape[1]} series × {df_pivot.shape[0]} months from {args.csv}")
+    print(f"{'artifact':<26}{'legacy s':>10}{'new s':>10}{'speedup':>10}  identical")
+
+    total_old = total_new = 0.0
+    all_identical = True
+    for name, (legacy, new) in cases(df_pivot, df_mom, df_yoy).items():
+        old_s, old_data = best_of(legacy, args.repeat)
+        new_s, new_data = best_of(new, args.repeat)
+        identical = json.dumps(old_data, indent=2) == json.dumps(new_data, indent=2)
+        all_identical &= identical
+        total_old += old_s
+        total_new += new_s
+        print(f"{name:<26}{old_s:>10.3f}{new_s:>10.3f}{old_s / new_s:>9.1f}x  {'yes' if identical else 'NO'}")
+    print(f"{'total':<26}{total_old:>10.3f}{total_new:>10.3f}{total_old / total_new:>9.1f}x")
+
+    if not all_identical:
+        raise SystemExit("❌ Output differs from the legacy emission")
+    print("✅ All artifacts byte-identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# conditional_get.py
+
+import hashlib
+
+from encoded_responses import negotiate_encoding
+
+
+def make_etag(version: str, path: str, query: str, encoding: str) -> str:
+    """
+    Strong ETag for one representation of a data route: the dataset version
+    plus everything that selects the body (path, query, negotiated encoding).
+    """
+    # Order-insensitive across keys; stable sort keeps repeated keys in order
+    params = "&".join(sorted((p for p in query.split("&") if p), key=lambda p: p.partition("=")[0]))
+    digest = hashlib.sha1(f"{version}|{path}|{params}|{encoding}".encode()).hexdigest()[:24]
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class ConditionalGetMiddleware:
+    """
+    ASGI middleware for data routes whose body depends only on the dataset
+    version and the request. Adds a strong ETag to 200 responses and answers
+    a matching If-None-Match with 304 before the route runs, so neither the
+    dataset nor the encoder is touched.
+    """
+
+    def __init__(self, app, version, prefixes):
+        self.app = app
+        self.version = version          # callable → active dataset version
+        self.prefixes = tuple(prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or not scope["path"].startswith(self.prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        version = self.version()
+        encoding = negotiate_encoding(headers.get("accept-encoding"))
+        etag = make_etag(version, scope["path"], scope.get("query_string", b"").decode("latin-1"), encoding)
+        response_headers = [
+            (b"etag", etag.encode()),
+            (b"cache-control", b"no-cache"),
+            (b"vary", b"Accept-Encoding"),
+        ]
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            await send({"type": "http.response.start", "status": 304, "headers": response_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message):
+            # Only tag successful bodies built from the version the tag names
+            if message["type"] == "http.response.start" and message["status"] == 200 and self.version() == version:
+                existing = {k.lower() for k, _ in message.get("headers", [])}
+                extra = [(k, v) for k, v in response_headers if k not in existing]
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
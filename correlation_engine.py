@@ -0,0 +1,173 @@
+# correlation_engine.py
+
+import numpy as np
+
+# How candidates are ranked
+SIGN_MODES = ("abs", "positive", "negative")
+
+
+def _lag_number(key: str):
+    try:
+        return int(key.split("_", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+class CorrelationTensor:
+    """
+    material_correlations.json as a dense (base, target, lag) float array.
+    values[i, j, l] = corr(MoM of base i, MoM of target j shifted by lags[l]),
+    i.e. target leading base by lags[l] months. NaN = no value / no pair.
+    """
+
+    def __init__(self, by_material: dict):
+        by_material = by_material or {}
+        names, lags = set(by_material), set()
+        for targets in by_material.values():
+            names.update(targets)
+            for lag_values in targets.values():
+                lags.update(n for n in map(_lag_number, lag_values) if n is not None)
+
+        self.materials = sorted(names)
+        self.index = {m: i for i, m in enumerate(self.materials)}
+        self.lags = sorted(lags)
+        self._lag_pos = {lag: l for l, lag in enumerate(self.lags)}
+
+        n, L = len(self.materials), len(self.lags)
+        self.values = np.full((n, n, L), np.nan)
+        self.present = np.zeros((n, n), dtype=bool)
+        for base, targets in by_material.items():
+            i = self.index[base]
+            for target, lag_values in targets.items():
+                j = self.index[target]
+                self.present[i, j] = True
+                for key, v in lag_values.items():
+                    lag = _lag_number(key)
+                    if lag is not None and v is not None:
+                        self.values[i, j, self._lag_pos[lag]] = v
+
+    @classmethod
+    def from_arrays(cls, materials: list, lags: list, values: np.ndarray, present: np.ndarray):
+        """
+        Wraps an already-built tensor (e.g. views into a shared mapping).
+        """
+        tensor = cls.__new__(cls)
+        tensor.materials = list(materials)
+        tensor.index = {m: i for i, m in enumerate(tensor.materials)}
+        tensor.lags = list(lags)
+        tensor._lag_pos = {lag: l for l, lag in enumerate(tensor.lags)}
+        tensor.values = values
+        tensor.present = present
+        return tensor
+
+    def __contains__(self, material):
+        return material in self.index
+
+    def keys(self):
+        return self.index.keys()
+
+    def lag_position(self, lag):
+        """
+        Lag in months → tensor axis position; None for "best".
+        Raises KeyError for lags that were not computed.
+        """
+        if lag is None:
+            return None
+        return self._lag_pos[int(lag)]
+
+    def pair(self, base: str, target: str):
+        """
+        The source JSON entry {"lag_0": r, ...} for one pair, or None.
+        """
+        i, j = self.index.get(base), self.index.get(target)
+        if i is None or j is None or not self.present[i, j]:
+            return None
+        return {f"lag_{lag}": _num(self.values[i, j, l]) for l, lag in enumerate(self.lags)}
+
+    def _scores(self, values: np.ndarray, sign: str) -> np.ndarray:
+        if sign == "positive":
+            scores = values
+        elif sign == "negative":
+            scores = -values
+        else:
+            scores = np.abs(values)
+        return np.where(np.isnan(scores), -np.inf, scores)
+
+    def _reduce_lags(self, values: np.ndarray, lag_pos, sign: str):
+        """
+        Picks one lag per (…, target): the requested one or, for best, the
+        highest-scoring one. Returns (scores, lag positions).
+        """
+        if lag_pos is not None:
+            return self._scores(values[..., lag_pos], sign), np.full(values.shape[:-1], lag_pos)
+        scores = self._scores(values, sign)
+        best = np.argmax(scores, axis=-1)
+        return np.take_along_axis(scores, best[..., None], axis=-1)[..., 0], best
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Flat indices of the k highest finite scores, best first (argpartition + sort of k;
+        ties resolve to the lower index so results are deterministic).
+        """
+        flat = scores.ravel()
+        k = min(k, int(np.isfinite(flat).sum()))
+        if k <= 0:
+            return np.array([], dtype=int)
+        idx = np.argpartition(-flat, k - 1)[:k]
+        return idx[np.lexsort((idx, -flat[idx]))]
+
+    def top_partners(self, base: str, k: int = 10, lag=None, sign: str = "abs") -> list:
+        """
+        The k targets most correlated with base at one lag, or at each target's best lag.
+        """
+        i = self.index[base]
+        scores, lag_idx = self._reduce_lags(self.values[i], self.lag_position(lag), sign)
+        scores[~self.present[i]] = -np.inf
+        out = []
+        for j in self._top(scores, k):
+            l = int(lag_idx[j])
+            out.append({"material": self.materials[j], "lag": self.lags[l], "correlation": _num(self.values[i, j, l])})
+        return out
+
+    def strongest_pairs(self, k: int = 20, lag=None, sign: str = "abs") -> list:
+        """
+        The k strongest (base, target) pairs overall at one lag or each pair's best lag.
+        Lag-0 correlation is symmetric, so only one orientation of a lag-0 pair is kept.
+        """
+        scores, lag_idx = self._reduce_lags(self.values, self.lag_position(lag), sign)
+        scores = np.where(self.present, scores, -np.inf)
+        n = len(self.materials)
+        if self.lags and self.lags[0] == 0:
+            lower = np.tril(np.ones((n, n), dtype=bool), -1)
+            scores[lower & (lag_idx == 0)] = -np.inf
+        out = []
+        for flat in self._top(scores, k):
+            i, j = divmod(int(flat), n)
+            l = int(lag_idx[i, j])
+            out.append({
+                "base": self.materials[i],
+                "target": self.materials[j],
+                "lag": self.lags[l],
+                "correlation": _num(self.values[i, j, l]),
+            })
+        return out
+
+    def matrix(self, lag: int = 0, materials: list = None) -> dict:
+        """
+        Full base × target slice at one lag, optionally restricted to a subset.
+        Diagonal and missing pairs are null.
+        """
+        names = list(materials) if materials else self.materials
+        rows = [self.index[m] for m in names]
+        block = self.values[np.ix_(rows, rows, [self.lag_position(lag)])][..., 0]
+        block = np.where(self.present[np.ix_(rows, rows)], block, np.nan)
+        return {
+            "lag": int(lag),
+            "materials": names,
+            "values": [[None if v != v else v for v in row] for row in block.tolist()],
+        }
+
+
+def _num(v):
+    return None if np.isnan(v) else float(v)
@@ -0,0 +1,235 @@
+# dataset_loader.py
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app_logging import get_logger
+from panel_artifact import MANIFEST_FILE, PANEL_DATASETS, PANEL_FILE, check_panel, read_panel
+
+log = get_logger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# === CONFIG ===
+BASE_URL = "https://raw.githubusercontent.com/evilb1000/whatsitcost/main/AIBrain/JSONS"
+LOCAL_JSON_DIR = os.path.join(HERE, "AIBrain", "JSONS")
+CACHE_DIR = os.getenv("DATASET_CACHE_DIR", os.path.join(HERE, ".dataset_cache"))
+REQUEST_TIMEOUT = float(os.getenv("DATASET_TIMEOUT", "10"))
+# Skip the network entirely and serve from the on-disk cache / checked-in JSONS
+OFFLINE = os.getenv("DATASET_OFFLINE", "").lower() in ("1", "true", "yes")
+# Load the series datasets from the columnar panel instead of their JSON files
+PANEL_ARTIFACT = os.getenv("PANEL_ARTIFACT", "1").lower() in ("1", "true", "yes")
+
+# Dataset name → artifact filename
+DATASET_FILES = {
+    "trends": "material_trends.json",
+    "trendlines": "material_trendlines.json",
+    "spikes": "material_spikes.json",
+    "rolling": "material_rolling.json",
+    "rolling_12mo": "material_rolling_12mo.json",
+    "rolling_3yr": "material_rolling_3yr.json",
+    "correlations": "material_correlations.json",
+    "snapshot": "latest_snapshot.json",
+    "clusters": "cluster_data.json",
+}
+
+# Loaded when present but never required for readiness
+OPTIONAL_DATASET_FILES = {
+    "narratives": "summary_narratives.json",
+}
+
+ALL_DATASET_FILES = {**DATASET_FILES, **OPTIONAL_DATASET_FILES}
+
+# Columnar panel (see panel_artifact.py) covering the PANEL_DATASETS; their
+# JSON files are only fetched when it is missing or inconsistent
+PANEL_FILES = {
+    "panel": PANEL_FILE,
+    "panel_manifest": MANIFEST_FILE,
+}
+ARTIFACT_FILES = {**ALL_DATASET_FILES, **PANEL_FILES}
+
+_session = None
+
+
+def get_session():
+    """
+    One pooled session shared by every fetch so all artifacts reuse the same
+    keep-alive connection(s) to raw.githubusercontent.com.
+    """
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=len(ARTIFACT_FILES))
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+    return _session
+
+
+def _cache_paths(filename):
+    return (
+        os.path.join(CACHE_DIR, filename),
+        os.path.join(CACHE_DIR, filename + ".etag"),
+    )
+
+
+def _read_bytes(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_cache(filename, content, etag):
+    data_path, etag_path = _cache_paths(filename)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{data_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, data_path)
+        if etag:
+            with open(etag_path, "w") as f:
+                f.write(etag)
+        elif os.path.exists(etag_path):
+            os.remove(etag_path)
+    except OSError as e:
+        log.warning(f"⚠️ Could not write dataset cache for {filename}: {e}", exc_info=True)
+
+
+def _fetch_bytes(filename):
+    """
+    Returns (content, source) for one artifact.
+    Order: network (revalidated against the on-disk cache with If-None-Match)
+    → on-disk cache → checked-in AIBrain/JSONS. content is None if all fail.
+    """
+    data_path, etag_path = _cache_paths(filename)
+    cached = _read_bytes(data_path)
+
+    if not OFFLINE:
+        headers = {}
+        etag = _read_bytes(etag_path)
+        if cached is not None and etag:
+            headers["If-None-Match"] = etag.decode().strip()
+        url = f"{BASE_URL}/{filename}"
+        try:
+            response = get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 304 and cached is not None:
+                return cached, "cache"
+            response.raise_for_status()
+            _write_cache(filename, response.content, response.headers.get("ETag"))
+            return response.content, "network"
+        except requests.RequestException as e:
+            log.warning(f"⚠️ Network fetch failed for {filename}: {e}", exc_info=True)
+
+    if cached is not None:
+        return cached, "cache"
+
+    local = _read_bytes(os.path.join(LOCAL_JSON_DIR, filename))
+    if local is not None:
+        return local, "local"
+    return None, None
+
+
+def _fetch_all(files: dict) -> dict:
+    with ThreadPoolExecutor(max_workers=len(files)) as pool:
+        futures = {name: pool.submit(_fetch_bytes, filename) for name, filename in files.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def _panel_problem(artifacts):
+    """
+    Why the fetched panel cannot be used, or None if it can.
+    """
+    try:
+        check_panel(artifacts.get("panel", (None, None))[0], artifacts.get("panel_manifest", (None, None))[0])
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def fetch_artifacts():
+    """
+    Fetches the raw bytes of the artifacts concurrently: the panel plus the
+    JSON files it does not cover, then the JSON files it does only if the
+    panel turned out unusable. Returns {name: (content, source)}; content is
+    None if unavailable.
+    """
+    if not PANEL_ARTIFACT:
+        return _fetch_all(ALL_DATASET_FILES)
+    artifacts = _fetch_all({
+        **{name: f for name, f in ALL_DATASET_FILES.items() if name not in PANEL_DATASETS},
+        **PANEL_FILES,
+    })
+    problem = _panel_problem(artifacts)
+    if problem:
+        log.warning(f"⚠️ Panel artifact unusable ({problem}) — fetching the JSON files")
+        artifacts.update(_fetch_all({name: ALL_DATASET_FILES[name] for name in PANEL_DATASETS}))
+    return artifacts
+
+
+def dataset_version(artifacts):
+    """
+    Content-derived version string: changes whenever any artifact's bytes change.
+    """
+    digest = hashlib.sha256()
+    for name in ARTIFACT_FILES:
+        content = artifacts.get(name, (None, None))[0]
+        digest.update(name.encode())
+        digest.update(hashlib.sha256(content).digest() if content is not None else b"-")
+    return digest.hexdigest()[:12]
+
+
+def parse_artifacts(artifacts):
+    """
+    Parses fetched artifacts. Returns (datasets, sources) keyed by dataset name;
+    a dataset that could not be loaded or parsed maps to None. Datasets
+    covered by a usable panel come from it as prebuilt tables.
+    """
+    datasets, sources = {}, {}
+    panel, panel_source = artifacts.get("panel", (None, None))
+    if panel is not None:
+        try:
+            datasets = read_panel(panel, artifacts.get("panel_manifest", (None, None))[0])
+            sources = {name: panel_source for name in datasets}
+            log.info(f"✅ Loaded {len(datasets['trendlines'])} series from {PANEL_FILE} ({panel_source})")
+        except ValueError as e:
+            log.warning(f"⚠️ Not using {PANEL_FILE} from {panel_source}: {e}", exc_info=True)
+
+    for name, filename in ALL_DATASET_FILES.items():
+        if name in datasets:
+            continue
+        content, source = artifacts.get(name, (None, None))
+        data = None
+        if content is None:
+            if name in DATASET_FILES:
+                log.error(f"❌ No copy of {filename} available (network, cache and local all failed)")
+        else:
+            try:
+                data = json.loads(content)
+                log.debug(f"✅ Loaded {len(data)} records from {filename} ({source})")
+            except ValueError as e:
+                log.error(f"❌ Could not parse {filename} from {source}: {e}", exc_info=True)
+                source = None
+        datasets[name] = data
+        sources[name] = source
+    return datasets, sources
+
+
+def load_datasets():
+    """
+    Fetches and parses every dataset in ALL_DATASET_FILES.
+    Returns (datasets, sources, version).
+    """
+    artifacts = fetch_artifacts()
+    datasets, sources = parse_artifacts(artifacts)
+    return datasets, sources, dataset_version(artifacts)
+
+
+def missing_datasets(datasets):
+    return [name for name in DATASET_FILES if datasets.get(name) is None]
@@ -0,0 +1,303 @@
+# dataset_snapshot.py
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from types import MappingProxyType
+
+from app_logging import get_logger
+from correlation_engine import CorrelationTensor
+from dataset_loader import (
+    dataset_version,
+    fetch_artifacts,
+    missing_datasets,
+    parse_artifacts,
+)
+from encoded_responses import EncodedBodyCache
+from fuzzy_index import FuzzyMatch, build_fuzzy_index
+from prompt_matcher import build_prompt_matcher
+from rolling_windows import ROLLING_ON_DEMAND, DerivedRollingTable
+from shared_dataset import SHARED_DATASET, attach_version, has_version, read_pointer, version_lock, write_pointer, write_version
+from series_store import SeriesTable, SpikeTable
+from summary_narratives import NarrativeStore
+
+log = get_logger(__name__)
+
+# Seconds between polls for a new dataset version (0 disables the refresher)
+REFRESH_INTERVAL = float(os.getenv("DATASET_REFRESH_SECONDS", "300"))
+# A version another worker confirmed upstream this recently is attached without fetching
+SHARED_POINTER_MAX_AGE = float(os.getenv("SHARED_DATASET_MAX_AGE", str(REFRESH_INTERVAL or 300)))
+
+# Datasets whose keys make up the material list
+MATERIAL_DATASETS = ["rolling", "trendlines", "spikes", "rolling_12mo", "rolling_3yr", "correlations"]
+
+
+class DatasetSnapshot:
+    """
+    One immutable, fully-built dataset version. Handlers grab the current
+    snapshot once per request and read everything from it, so a swap in the
+    middle of a request never mixes two versions. `datasets` holds parsed JSON
+    or, when attached to a shared mapping, the already-built tables.
+    """
+
+    def __init__(self, datasets: dict, sources: dict, version: str):
+        self.version = version
+        self.loaded_at = datetime.now(timezone.utc)
+        self.sources = MappingProxyType(dict(sources))
+        self.missing = tuple(missing_datasets(datasets))
+
+        # Date-indexed series are held column-wise; the source dicts are not kept
+        # (material_trends.json is the trendlines keyed by date, so it is only checked for presence)
+        self.spikes_by_material = _table(SpikeTable, datasets.get("spikes"))
+        self.trendlines_by_material = _table(SeriesTable, datasets.get("trendlines"))
+        # Raw values, only when loaded from the panel artifact; windows are derived from them
+        values = datasets.get("values")
+        self.values_by_material = values if isinstance(values, SeriesTable) and len(values) else None
+        if ROLLING_ON_DEMAND and self.values_by_material is not None:
+            self.rolling_by_material = DerivedRollingTable(self.values_by_material, 3, "3mo")
+            self.rolling_12mo_by_material = DerivedRollingTable(self.values_by_material, 12, "12mo")
+            self.rolling_3yr_by_material = DerivedRollingTable(self.values_by_material, 36, "3yr")
+        else:
+            if ROLLING_ON_DEMAND:
+                log.info("ℹ️ No panel values loaded — serving the precomputed rolling files")
+            self.rolling_by_material = _table(SeriesTable, datasets.get("rolling"))
+            self.rolling_12mo_by_material = _table(SeriesTable, datasets.get("rolling_12mo"))
+            self.rolling_3yr_by_material = _table(SeriesTable, datasets.get("rolling_3yr"))
+        self.correlations = _table(CorrelationTensor, datasets.get("correlations"))
+        self.snapshot_summary = datasets.get("snapshot") or {}
+        self.cluster_data = datasets.get("clusters") or {}
+        self.narratives = NarrativeStore(datasets.get("narratives"), self.snapshot_summary, self.cluster_data)
+
+        all_keys = set()
+        for name in MATERIAL_DATASETS:
+            all_keys.update((datasets.get(name) or {}).keys())
+        self.material_list = tuple(sorted(all_keys))
+        self._by_lower = {m.strip().lower(): m for m in self.material_list}
+        # Pre-encoded response bodies for this version, filled on first request
+        self.encoded = EncodedBodyCache()
+        self.matcher = build_prompt_matcher(self.material_list)
+        self.fuzzy = build_fuzzy_index(self.material_list)
+
+    def canonical_material(self, name: str):
+        """
+        Exact or case-insensitive material name → canonical name, or None.
+        """
+        if name in self.trendlines_by_material:
+            return name
+        return self._by_lower.get((name or "").strip().lower())
+
+    def resolve_material(self, name: str):
+        """
+        Exact, case-insensitive, then typo-tolerant lookup. Returns a
+        FuzzyMatch (confidence 1.0 for a direct hit) or None.
+        """
+        canonical = self.canonical_material(name)
+        if canonical:
+            return FuzzyMatch(canonical, name, 1.0)
+        return self.fuzzy.best(name or "")
+
+    def split_materials(self, text: str) -> list:
+        """
+        Splits a comma-separated material list. Several material names contain
+        commas themselves, so adjacent pieces are re-joined (longest first)
+        whenever the joined text is a known material.
+        """
+        parts = (text or "").split(",")
+        names, i = [], 0
+        while i < len(parts):
+            for j in range(len(parts), i + 1, -1):
+                joined = ",".join(parts[i:j]).strip()
+                if self.canonical_material(joined):
+                    names.append(joined)
+                    i = j
+                    break
+            else:
+                if parts[i].strip():
+                    names.append(parts[i].strip())
+                i += 1
+        return names
+
+    @property
+    def ready(self) -> bool:
+        return not self.missing
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at.isoformat(),
+            "ready": self.ready,
+            "missing": list(self.missing),
+            "sources": dict(self.sources),
+            "cached_narratives": self.narratives.cached(),
+        }
+
+
+def _table(cls, value):
+    return value if isinstance(value, cls) else cls(value)
+
+
+_current = None
+_swap_lock = threading.Lock()
+_refresher = None
+_stop_event = threading.Event()
+
+
+def get_snapshot() -> DatasetSnapshot:
+    return _current
+
+
+def build_snapshot(artifacts: dict) -> DatasetSnapshot:
+    datasets, sources = parse_artifacts(artifacts)
+    return DatasetSnapshot(datasets, sources, dataset_version(artifacts))
+
+
+def attach_snapshot(version: str):
+    """
+    Snapshot backed by the shared read-only mapping of a version, or None if
+    no worker has materialized it.
+    """
+    attached = attach_version(version)
+    if attached is None:
+        return None
+    datasets, sources = attached
+    return DatasetSnapshot(datasets, sources, version)
+
+
+def build_or_attach(artifacts: dict) -> DatasetSnapshot:
+    """
+    With SHARED_DATASET on, the first worker to see a version parses it and
+    writes the shared file (under a per-version lock); everyone, including
+    that worker, then maps it instead of keeping private copies. Incomplete
+    versions and any shared-file failure fall back to a private snapshot.
+    """
+    if not SHARED_DATASET:
+        return build_snapshot(artifacts)
+    version = dataset_version(artifacts)
+    try:
+        with version_lock(version):
+            if not has_version(version):
+                snapshot = build_snapshot(artifacts)
+                if snapshot.missing:
+                    return snapshot
+                write_version(snapshot)
+            snapshot = attach_snapshot(version)
+        if snapshot is not None:
+            log.info(f"🔗 Attached to shared dataset {version}")
+            return snapshot
+    except OSError as e:
+        log.warning(f"⚠️ Shared dataset unavailable ({e}) — building a private copy", exc_info=True)
+    return build_snapshot(artifacts)
+
+
+def _confirm_upstream(artifacts: dict, version: str):
+    """
+    Records that this version was fetched (not a checked-in fallback) so
+    other workers can skip their own fetch for a while.
+    """
+    if not SHARED_DATASET or any(source == "local" for _, source in artifacts.values()):
+        return
+    try:
+        write_pointer(version)
+    except OSError as e:
+        log.warning(f"⚠️ Could not update shared dataset pointer: {e}", exc_info=True)
+
+
+def _recent_shared_version():
+    if not SHARED_DATASET:
+        return None
+    pointer = read_pointer()
+    if pointer and time.time() - pointer.get("checked_at", 0) < SHARED_POINTER_MAX_AGE:
+        return pointer.get("version")
+    return None
+
+
+def _swap(snapshot: DatasetSnapshot):
+    global _current
+    with _swap_lock:
+        previous = _current
+        _current = snapshot
+    if previous is not None:
+        log.info(f"🔄 Dataset snapshot swapped: {previous.version} → {snapshot.version}")
+    log.info(f"🧠 Active dataset version {snapshot.version} with {len(snapshot.material_list)} materials")
+
+
+def load_initial_snapshot() -> DatasetSnapshot:
+    log.info("🚚 Initializing dataset loading (GitHub → cache → local fallback)...")
+    recent = _recent_shared_version()
+    snapshot = attach_snapshot(recent) if recent else None
+    if snapshot is not None:
+        log.info(f"🔗 Attached to shared dataset {recent} (fetched by another worker)")
+    else:
+        artifacts = fetch_artifacts()
+        snapshot = build_or_attach(artifacts)
+        _confirm_upstream(artifacts, snapshot.version)
+    if snapshot.missing:
+        log.warning(f"⚠️ Datasets unavailable: {list(snapshot.missing)} — /ready will report not ready")
+    _swap(snapshot)
+    return snapshot
+
+
+def refresh_snapshot() -> bool:
+    """
+    Polls for a new dataset version and swaps it in if it is complete (or if
+    the active snapshot is itself incomplete). Parsing and building happen
+    here, off the request path; unchanged versions are never re-parsed.
+    When another worker confirmed a version recently, that version is attached
+    without a fetch. Returns True if a new snapshot was swapped in.
+    """
+    current = get_snapshot()
+    recent = _recent_shared_version()
+    if recent:
+        if current is not None and recent == current.version:
+            return False
+        snapshot = attach_snapshot(recent)
+        if snapshot is not None:
+            log.info(f"📦 New dataset version from another worker: {recent}")
+            _swap(snapshot)
+            return True
+
+    artifacts = fetch_artifacts()
+    version = dataset_version(artifacts)
+    if current is not None and version == current.version:
+        _confirm_upstream(artifacts, version)
+        return False
+    fell_back = any(source == "local" for _, source in artifacts.values())
+    if fell_back and current is not None and "local" not in current.sources.values():
+        log.warning("⚠️ Refresh fell back to the checked-in JSONS — keeping the active snapshot")
+        return False
+
+    log.info(f"📦 New dataset version detected: {version}")
+    snapshot = build_or_attach(artifacts)
+    if snapshot.missing and current is not None and current.ready:
+        log.warning(f"⚠️ Keeping {current.version}: new version is missing {list(snapshot.missing)}")
+        return False
+    _swap(snapshot)
+    _confirm_upstream(artifacts, version)
+    return True
+
+
+def _refresh_loop(interval: float):
+    while not _stop_event.wait(interval):
+        try:
+            refresh_snapshot()
+        except Exception as e:
+            log.error(f"❌ Dataset refresh failed: {e}", exc_info=True)
+
+
+def start_refresher(interval: float = REFRESH_INTERVAL):
+    global _refresher
+    if interval <= 0 or (_refresher is not None and _refresher.is_alive()):
+        return
+    _stop_event.clear()
+    _refresher = threading.Thread(target=_refresh_loop, args=(interval,), name="dataset-refresher", daemon=True)
+    _refresher.start()
+    log.info(f"⏲️ Dataset refresher polling every {interval:g}s")
+
+
+def stop_refresher():
+    global _refresher
+    _stop_event.set()
+    if _refresher is not None:
+        _refresher.join(timeout=5)
+    _refresher = None
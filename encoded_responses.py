@@ -0,0 +1,120 @@
+# encoded_responses.py
+
+import gzip
+import json
+import threading
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+    FastJSONResponse = JSONResponse
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """
+    Picks br, gzip or identity from an Accept-Encoding header (q=0 means refused).
+    """
+    accepted = {}
+    for part in (accept_encoding or "").lower().split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return "identity"
+
+
+class EncodedBody:
+    """
+    One JSON body encoded once, with compressed variants built on first use.
+    """
+
+    __slots__ = ("identity", "_variants", "_lock")
+
+    def __init__(self, identity: bytes):
+        self.identity = identity
+        self._variants = {"identity": identity}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding: str) -> bytes:
+        body = self._variants.get(encoding)
+        if body is not None:
+            return body
+        with self._lock:
+            body = self._variants.get(encoding)
+            if body is None:
+                if encoding == "br":
+                    body = brotli.compress(self.identity, quality=BROTLI_QUALITY)
+                else:
+                    body = gzip.compress(self.identity, compresslevel=GZIP_LEVEL, mtime=0)
+                self._variants[encoding] = body
+        return body
+
+
+class EncodedBodyCache:
+    """
+    Encoded bodies for one dataset version, keyed by (route, params). It lives on
+    the DatasetSnapshot, so a version swap drops it with the old data.
+    """
+
+    def __init__(self):
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def get_or_encode(self, key, produce) -> EncodedBody:
+        body = self._bodies.get(key)
+        if body is None:
+            encoded = EncodedBody(dumps(produce()))
+            with self._lock:
+                body = self._bodies.setdefault(key, encoded)
+        return body
+
+    def __len__(self):
+        return len(self._bodies)
+
+
+def encoded_json(request: Request, cache: EncodedBodyCache, key, produce) -> Response:
+    """
+    Serves a cached, pre-encoded JSON body in the best encoding the client accepts.
+    `produce` builds the payload and is only called on the first request per version.
+    """
+    body = cache.get_or_encode(key, produce)
+    encoding = "identity"
+    if len(body.identity) >= MIN_COMPRESS_BYTES:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body.variant(encoding), media_type="application/json", headers=headers)
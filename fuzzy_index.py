@@ -0,0 +1,213 @@
+# fuzzy_index.py
+
+import os
+import re
+from collections import defaultdict
+
+from material_map import get_material_map
+from prompt_matcher import ALIASES, normalize
+
+# === CONFIG ===
+# Lowest score a name lookup accepts without asking GPT
+FUZZY_ACCEPT_SCORE = float(os.getenv("FUZZY_ACCEPT_SCORE", "0.6"))
+# Stricter bar for spotting a material inside free text
+FUZZY_PROMPT_SCORE = float(os.getenv("FUZZY_PROMPT_SCORE", "0.62"))
+# Candidates below this are never reported
+FUZZY_MIN_SCORE = 0.3
+# A winner this close to a different runner-up is ambiguous
+FUZZY_MARGIN = 0.05
+# Longest word window tried when scanning free text
+MAX_WINDOW_WORDS = 5
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words that never start or end a material mention in a prompt
+STOPWORDS = frozenset("""
+    a about an and any are average been chart cost costs doing for from give graph has have how in is last lately latest
+    me month months momentum my of on or over past plot price prices recent recently rolling show spike spikes
+    the this to trend trendline trends volatile volatility was what with year years
+""".split())
+
+
+def trigrams(text: str) -> set:
+    """
+    Word trigrams in the pg_trgm style: each word padded with two leading
+    and one trailing space, so short words and word starts still match.
+    """
+    grams = set()
+    for word in _WORD.findall(normalize(text)):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def word_coverage(text: str, phrase: str) -> float:
+    """
+    Mean over the words of `text` of the share of each word's trigrams found
+    in a single word of `phrase`. Unlike plain coverage, trigrams scattered
+    across several words do not count: "paint" is fully covered by "Maint &
+    Repair of Nonres Buildings (Partial)" but no word of it contains "paint".
+    """
+    targets = [trigrams(word) for word in _WORD.findall(normalize(phrase))]
+    words = _WORD.findall(normalize(text))
+    if not words or not targets:
+        return 0.0
+    total = 0.0
+    for word in words:
+        grams = trigrams(word)
+        total += max(len(grams & target) for target in targets) / len(grams)
+    return total / len(words)
+
+
+class FuzzyMatch:
+    __slots__ = ("material", "phrase", "score", "coverage", "word_coverage")
+
+    def __init__(self, material: str, phrase: str, score: float, coverage: float = 1.0):
+        self.material = material
+        self.phrase = phrase
+        self.score = score
+        # Share of the query's trigrams found in the phrase
+        self.coverage = coverage
+        # word_coverage() of the prompt words, set by find_in_text
+        self.word_coverage = None
+
+    def to_dict(self) -> dict:
+        return {"material": self.material, "matched": self.phrase, "confidence": round(self.score, 3)}
+
+    def __repr__(self):
+        return f"FuzzyMatch({self.material!r}, {self.phrase!r}, {self.score:.3f})"
+
+
+class FuzzyMaterialIndex:
+    """
+    Trigram inverted index over material names and aliases. A lookup counts
+    shared trigrams through the posting lists (no scan over all names) and
+    scores each candidate as the mean of Dice similarity and query coverage,
+    so "alumnium" finds "aluminium" and "ready mix" finds "Ready Mixed Concrete".
+    """
+
+    def __init__(self, phrases: dict):
+        # phrases: display phrase → canonical material
+        self.phrases = []
+        self.sizes = []
+        self.postings = defaultdict(list)
+        for phrase, material in phrases.items():
+            grams = trigrams(phrase)
+            if not grams:
+                continue
+            pid = len(self.phrases)
+            self.phrases.append((phrase, material))
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(pid)
+
+    def search(self, text: str, limit: int = 5, min_score: float = FUZZY_MIN_SCORE) -> list:
+        """
+        Ranked candidates (best phrase per material), highest confidence first.
+        """
+        grams = trigrams(text)
+        if not grams:
+            return []
+        shared = defaultdict(int)
+        for gram in grams:
+            for pid in self.postings.get(gram, ()):
+                shared[pid] += 1
+
+        best = {}
+        n = len(grams)
+        for pid, common in shared.items():
+            coverage = common / n
+            score = (2 * common / (n + self.sizes[pid]) + coverage) / 2
+            if score < min_score:
+                continue
+            phrase, material = self.phrases[pid]
+            if material not in best or score > best[material].score:
+                best[material] = FuzzyMatch(material, phrase, score, coverage)
+        ranked = sorted(best.values(), key=lambda m: (-m.score, len(m.phrase)))
+        return ranked[:limit]
+
+    def best(self, text: str, min_score: float = FUZZY_ACCEPT_SCORE):
+        """
+        The top candidate if it is confident and clearly ahead of the next
+        material; None when the lookup is unknown or ambiguous. A query that
+        is wholly contained in several names ("concrete") is ambiguous unless
+        it is itself a name or alias.
+        """
+        ranked = self.search(text, limit=2, min_score=FUZZY_MIN_SCORE)
+        if not ranked or ranked[0].score < min_score:
+            return None
+        top = ranked[0]
+        if len(ranked) > 1 and top.score < 1.0:
+            runner_up = ranked[1]
+            if top.score - runner_up.score < FUZZY_MARGIN or runner_up.coverage >= top.coverage:
+                return None
+        return top
+
+    def find_in_text(self, text: str, limit: int = 4, min_score: float = FUZZY_PROMPT_SCORE) -> list:
+        """
+        Materials mentioned (possibly misspelled) in free text. Tries every
+        window of up to MAX_WINDOW_WORDS words that starts and ends on a
+        non-stopword, then keeps the best non-overlapping confident windows.
+        Each match carries the word_coverage of its window.
+        """
+        hits = []
+        for i, j, window in _windows(text):
+            match = self.best(window, min_score)
+            if match is not None:
+                match.word_coverage = word_coverage(window, match.phrase)
+                hits.append((match.score, j - i, i, j, match))
+
+        found, used, taken = [], set(), []
+        for _, _, i, j, match in sorted(hits, key=lambda h: (-h[0], -h[1], h[2])):
+            if match.material in used or any(i < b and a < j for a, b in taken):
+                continue
+            used.add(match.material)
+            taken.append((i, j))
+            found.append((i, match))
+        return [match for _, match in sorted(found, key=lambda f: f[0])][:limit]
+
+    def rank_in_text(self, text: str, limit: int = 8, min_score: float = FUZZY_MIN_SCORE) -> list:
+        """
+        Loose shortlist: every material scored by its best word window in the
+        text, ambiguous and low-confidence candidates included.
+        """
+        best = {}
+        for _, _, window in _windows(text):
+            for match in self.search(window, limit=limit, min_score=min_score):
+                if match.score > best.get(match.material, 0.0):
+                    best[match.material] = match.score
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return [material for material, _ in ranked[:limit]]
+
+
+def _windows(text: str):
+    """
+    (start, end, phrase) for every window of up to MAX_WINDOW_WORDS words
+    that starts and ends on a non-stopword.
+    """
+    words = _WORD.findall(normalize(text))
+    for i in range(len(words)):
+        if words[i] in STOPWORDS:
+            continue
+        for j in range(i + 1, min(i + MAX_WINDOW_WORDS, len(words)) + 1):
+            if words[j - 1] in STOPWORDS:
+                continue
+            window = " ".join(words[i:j])
+            if len(window) >= 4:
+                yield i, j, window
+
+
+def build_fuzzy_index(material_list) -> FuzzyMaterialIndex:
+    """
+    Index for one dataset version: canonical names plus ALIASES and
+    material_map.json keys that point at a loaded material.
+    """
+    materials = set(material_list)
+    phrases = {m.strip(): m for m in material_list}
+    for alias, canonical in ALIASES.items():
+        if canonical in materials:
+            phrases.setdefault(alias, canonical)
+    for alias in (get_material_map() or {}):
+        if alias in materials:
+            phrases.setdefault(alias.strip(), alias)
+    return FuzzyMaterialIndex(phrases)
@@ -0,0 +1,106 @@
+# gpt_client.py
+
+import asyncio
+import logging
+import os
+import time
+
+from openai import AsyncOpenAI
+
+from app_logging import get_logger
+from metrics import call_outcome, observe_openai_call
+from prompt_builder import estimate_tokens
+
+# === CONFIG ===
+GPT_MODEL = os.getenv("GPT_MODEL", "gpt-4")
+# Hard per-call deadline in seconds, including time spent waiting for a slot
+GPT_TIMEOUT = float(os.getenv("GPT_TIMEOUT", "30"))
+# Max OpenAI calls in flight per worker; extra callers queue instead of piling on
+GPT_MAX_CONCURRENCY = int(os.getenv("GPT_MAX_CONCURRENCY", "8"))
+
+_gpt_key = os.getenv("GPT_KEY") or os.getenv("OPENAI_API_KEY")
+async_client = AsyncOpenAI(api_key=_gpt_key, max_retries=1) if _gpt_key else None
+
+_semaphore = asyncio.Semaphore(GPT_MAX_CONCURRENCY)
+log = get_logger("gpt")
+
+
+def gpt_configured() -> bool:
+    return async_client is not None
+
+
+async def chat_completion(messages: list, temperature: float = None, timeout: float = GPT_TIMEOUT,
+                          call: str = "other"):
+    """
+    Non-blocking chat completion bounded by the concurrency semaphore and a
+    per-call timeout. Raises asyncio.TimeoutError if the deadline passes;
+    cancelling the awaiting task cancels the upstream request. Latency and
+    token usage are recorded under the `call` type.
+    """
+    if async_client is None:
+        raise RuntimeError("GPT key not configured. Set GPT_KEY or OPENAI_API_KEY.")
+
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(f"📏 {call}: ~{estimate_tokens(messages)} prompt tokens")
+    kwargs = {"model": GPT_MODEL, "messages": messages, "timeout": timeout}
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+
+    async def _call():
+        async with _semaphore:
+            return await async_client.chat.completions.create(**kwargs)
+
+    start = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(_call(), timeout)
+    except BaseException as e:
+        observe_openai_call(call, call_outcome(e), time.perf_counter() - start)
+        raise
+    observe_openai_call(call, "ok", time.perf_counter() - start, getattr(response, "usage", None))
+    return response
+
+
+async def stream_chat_completion(messages: list, temperature: float = None, timeout: float = GPT_TIMEOUT,
+                                 call: str = "other"):
+    """
+    Streaming chat completion: yields content deltas as they arrive. Holds a
+    concurrency slot for the life of the stream; `timeout` bounds the wait for
+    the first response and each read from the upstream connection. The
+    recorded latency covers the whole stream; usage arrives in the final chunk.
+    """
+    if async_client is None:
+        raise RuntimeError("GPT key not configured. Set GPT_KEY or OPENAI_API_KEY.")
+
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(f"📏 {call} (stream): ~{estimate_tokens(messages)} prompt tokens")
+    kwargs = {
+        "model": GPT_MODEL,
+        "messages": messages,
+        "timeout": timeout,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+
+    start = time.perf_counter()
+    usage = None
+    try:
+        async with _semaphore:
+            stream = await asyncio.wait_for(async_client.chat.completions.create(**kwargs), timeout)
+            # Closing releases the upstream connection when the consumer stops early
+            async with stream:
+                async for chunk in stream:
+                    if getattr(chunk, "usage", None) is not None:
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+    except BaseException as e:
+        # GeneratorExit = the consumer stopped reading (client went away)
+        outcome = "cancelled" if isinstance(e, GeneratorExit) else call_outcome(e)
+        observe_openai_call(call, outcome, time.perf_counter() - start, usage)
+        raise
+    observe_openai_call(call, "ok", time.perf_counter() - start, usage)
@@ -0,0 +1,46 @@
+# intent_cache.py
+
+import hashlib
+import os
+import re
+
+from ttl_cache import TTLCache
+
+# === CONFIG ===
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "2048"))
+INTENT_CACHE_TTL = float(os.getenv("INTENT_CACHE_TTL", "86400"))
+
+# main.resolve_prompt_with_gpt → {material, metric, date}
+gpt_intent_cache = TTLCache(INTENT_CACHE_SIZE, INTENT_CACHE_TTL)
+# resolve_intent.resolve_intent → {material, metric}
+resolver_intent_cache = TTLCache(INTENT_CACHE_SIZE, INTENT_CACHE_TTL)
+
+_NON_WORD = re.compile(r"[^\w\s#%&()/-]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Cache-key form of a prompt: lowercased, curly quotes folded, stray
+    punctuation dropped and whitespace collapsed, so "How is steel doing?"
+    and "how is steel  doing" share an entry.
+    """
+    text = (prompt or "").lower().replace("’", "'")
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def materials_hash(materials) -> str:
+    digest = hashlib.sha1("\n".join(materials).encode()).hexdigest()
+    return digest[:12]
+
+
+def intent_key(prompt: str, material_hash: str) -> tuple:
+    return normalize_prompt(prompt), material_hash
+
+
+def cache_stats() -> dict:
+    return {
+        "gpt_intent": gpt_intent_cache.stats(),
+        "resolve_intent": resolver_intent_cache.stats(),
+    }
@@ -0,0 +1,121 @@
+# intent_parser.py
+
+import os
+import re
+
+# === CONFIG ===
+# Local intents at or above this confidence skip the GPT intent call
+LOCAL_INTENT_MIN_CONFIDENCE = float(os.getenv("LOCAL_INTENT_MIN_CONFIDENCE", "0.75"))
+
+# Metric → keywords; the first three are specific, momentum is the catch-all
+METRIC_KEYWORDS = {
+    "spike": ("spike", "spikes", "spiked", "spiking", "jump", "jumps", "jumped", "surge", "surged",
+              "surging", "soar", "soared", "soaring", "shock", "shocks"),
+    "volatility": ("volatile", "volatility", "swing", "swings", "swinging", "fluctuate", "fluctuates",
+                   "fluctuating", "fluctuation", "fluctuations", "unstable", "stability", "erratic", "choppy"),
+    "rolling": ("rolling", "average", "averages", "avg", "moving average", "smoothed", "3 month average",
+                "12 month average"),
+    "momentum": ("momentum", "trend", "trends", "trending", "direction", "heading", "moving", "doing",
+                 "change", "changes", "changed", "mom", "month over month"),
+}
+DEFAULT_METRIC = "momentum"
+
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3, "april": 4, "apr": 4,
+    "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7, "august": 8, "aug": 8, "september": 9,
+    "sept": 9, "sep": 9, "october": 10, "oct": 10, "november": 11, "nov": 11, "december": 12, "dec": 12,
+}
+_MONTH_NAMES = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+_ISO_MONTH = re.compile(r"\b((?:19|20)\d{2})[-/.](0?[1-9]|1[0-2])\b")
+_US_MONTH = re.compile(r"\b(0?[1-9]|1[0-2])[-/]((?:19|20)\d{2})\b")
+_NAMED_MONTH = re.compile(rf"\b({_MONTH_NAMES})\.?,?\s+(?:of\s+)?('\d{{2}}|(?:19|20)\d{{2}})\b")
+# A month with no year ("in March") or a bare year needs GPT to pick the period
+_BARE_MONTH = re.compile(r"\b(january|february|march|april|june|july|august|september|october|november|december)\b")
+_BARE_YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+_RECENT = re.compile(
+    r"\b(latest|lately|recent|recently|current|currently|now|today|this month|last month|past month|most recent)\b"
+)
+# Offsets from some other month; left to GPT
+_RELATIVE = re.compile(r"\b(ago|last year|past year|this year|last quarter|since|before|after|between)\b")
+_WORDS = re.compile(r"[a-z0-9]+")
+
+
+class LocalIntent:
+    __slots__ = ("material", "metric", "date", "confidence")
+
+    def __init__(self, material, metric: str, date: str, confidence: float):
+        self.material = material
+        self.metric = metric
+        self.date = date
+        self.confidence = confidence
+
+    def to_dict(self) -> dict:
+        return {"material": self.material, "metric": self.metric, "date": self.date}
+
+    def __repr__(self):
+        return f"LocalIntent({self.material!r}, {self.metric!r}, {self.date!r}, {self.confidence:.2f})"
+
+
+def parse_metric(prompt: str):
+    """
+    (metric, confidence). One specific metric keyword wins outright; several
+    conflicting ones are ambiguous. Momentum keywords, or none at all, fall
+    back to momentum, as the GPT instructions do.
+    """
+    text = " " + " ".join(_WORDS.findall(prompt.lower())) + " "
+    found = [metric for metric, words in METRIC_KEYWORDS.items() if any(f" {w} " in text for w in words)]
+    specific = [m for m in found if m != DEFAULT_METRIC]
+    if len(specific) == 1:
+        return specific[0], 1.0
+    if len(specific) > 1:
+        return specific[0], 0.4
+    if found:
+        return DEFAULT_METRIC, 0.95
+    return DEFAULT_METRIC, 0.8
+
+
+def parse_date(prompt: str):
+    """
+    (YYYY-MM or 'latest', confidence). Explicit months are certain, recency
+    words map to 'latest', and anything relative or partial is left to GPT.
+    """
+    text = prompt.lower()
+    m = _ISO_MONTH.search(text)
+    if m:
+        return f"{m.group(1)}-{int(m.group(2)):02d}", 1.0
+    m = _US_MONTH.search(text)
+    if m:
+        return f"{m.group(2)}-{int(m.group(1)):02d}", 1.0
+    m = _NAMED_MONTH.search(text)
+    if m:
+        year = m.group(2)
+        year = f"20{year[1:]}" if year.startswith("'") else year
+        return f"{year}-{MONTHS[m.group(1)]:02d}", 1.0
+    if _RELATIVE.search(text) or _BARE_MONTH.search(text) or _BARE_YEAR.search(text):
+        return "latest", 0.4
+    if _RECENT.search(text):
+        return "latest", 0.95
+    return "latest", 0.85
+
+
+def parse_intent(prompt: str, candidates) -> LocalIntent:
+    """
+    Rule-based {material, metric, date} for a prompt. `candidates` are
+    (material, confidence) pairs already found in it (exact/alias matches
+    at 1.0, fuzzy matches at their word coverage). Overall confidence is the weakest
+    of the three parts; several different materials are left to GPT.
+    """
+    materials = {}
+    for material, score in candidates:
+        materials[material] = max(score, materials.get(material, 0.0))
+    if len(materials) == 1:
+        material, material_confidence = next(iter(materials.items()))
+    else:
+        material = max(materials, key=materials.get) if materials else None
+        material_confidence = 0.5 if materials else 0.0
+
+    metric, metric_confidence = parse_metric(prompt)
+    date, date_confidence = parse_date(prompt)
+    confidence = min(material_confidence, metric_confidence, date_confidence)
+    return LocalIntent(material, metric, date, confidence)
@@ -1,13 +1,27 @@
-print("🔥 MAIN.PY LOADED")
+from app_logging import get_logger, log_request
 
-from fastapi import FastAPI, HTTPException
+log = get_logger("main")
+log.info("🔥 MAIN.PY LOADED")
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from openai import OpenAI
 from typing import Optional
 import os
-import requests
 import json
+import asyncio
+from contextlib import asynccontextmanager
+from dataset_snapshot import get_snapshot, load_initial_snapshot, start_refresher, stop_refresher
+from conditional_get import ConditionalGetMiddleware
+from correlation_engine import SIGN_MODES
+from encoded_responses import FastJSONResponse, encoded_json
+from series_store import align_columns, month_ordinal
+from rolling_windows import MAX_HALFLIFE, MAX_WINDOW, cached_window, rolling_cache
+from gpt_client import chat_completion, gpt_configured, stream_chat_completion
+from intent_cache import cache_stats, gpt_intent_cache, intent_key, materials_hash, normalize_prompt
+from metrics import CALL_FINAL_ANSWER, CALL_INTENT, CONTENT_TYPE, MetricsMiddleware, render_metrics
+import metrics
 from GPT_Tools.functions import (
     get_latest_trend_entry,
     get_trend_mom_summary,
@@ -18,113 +32,93 @@ from GPT_Tools.functions import (
 
 # == cluster logic
 from GPT_Tools.material_clusters import CLUSTERS
-from material_map import get_material_map
+from prompt_matcher import ALIAS, CLUSTER, MATERIAL, SUMMARY, PromptMatcher
+from fuzzy_index import FuzzyMaterialIndex
+from intent_parser import LOCAL_INTENT_MIN_CONFIDENCE, parse_intent
+from prompt_builder import intent_messages, shortlist_materials, tool_output
+from single_flight import SingleFlight
 def resolve_cluster(name):
     return CLUSTERS.get(name.lower(), [])
 #== entry point for prompt resolution
 
-def resolve_prompt_with_gpt(prompt: str, materials: list) -> dict:
-    print("📥 Starting resolve_prompt_with_gpt")
-    print(f"📝 Incoming prompt: {prompt}")
-    print(f"📦 Material count: {len(materials)}")
-    matched_materials = [m for m in materials if m.lower() in prompt.lower()]
-    print(f"🔎 Matched materials from prompt: {matched_materials}")
+async def resolve_prompt_with_gpt(prompt: str, materials: list, matcher: PromptMatcher,
+                                  fuzzy: FuzzyMaterialIndex = None) -> dict:
+    log.debug("📥 Starting resolve_prompt_with_gpt")
+    log.debug(f"📝 Incoming prompt: {prompt}")
+    log.debug(f"📦 Material count: {len(materials)}")
+    # One pass over the prompt finds every material, alias, cluster and summary phrase
+    matches = matcher.find(prompt)
+    material_hits = [(v, 1.0) for m in matches for v in m.values(MATERIAL, ALIAS)]
+    if not material_hits and fuzzy is not None:
+        # Misspelled or partial names ("alumnium", "ready mix") still count as a
+        # material mention, as sure as the prompt's words are found in the name
+        material_hits = [(m.material, m.word_coverage) for m in fuzzy.find_in_text(prompt)]
+    matched_materials = [name for name, _ in material_hits]
+    log.debug(f"🔎 Matched materials from prompt: {matched_materials}")
 
 
     # 🧠 Exec summary detection — shortcut out
-    if not matched_materials and any(phrase in prompt.lower() for phrase in [
-        "latest update",
-        "latest summary",
-        "overall summary",
-        "overall update",
-        "market snapshot",
-        "snapshot overview",
-        "high-level update",
-        "executive summary",
-        "broad market trends",
-        "what’s happening in the market",
-        "give me the overview",
-        "what happened recently",
-        "what’s the market doing",
-        "summary of latest data",
-        "latest market movement",
-        "market-wide update",
-        "construction trends lately",
-        "general pricing trends",
-        "current state of the market",
-        "latest on construction materials",
-        "what's the latest on construction materials",
-        "latest construction materials data",
-        "construction material update",
-        "latest construction material summary",
-        "summary of construction materials",
-        "overall construction market",
-        "how is the construction materials market doing",
-        "broad view of construction costs",
-        "state of construction prices"
-    ]):
-        print("🧠 Resolver: Exec summary match — no material to extract.")
+    if not matched_materials and any(m.values(SUMMARY) for m in matches):
+        log.debug("🧠 Resolver: Exec summary match — no material to extract.")
+        metrics.intent_resolutions.inc("shortcut")
         return { "material": None, "metric": None, "date": "latest" }
 
     # 🧩 Cluster detection — shortcut out
-    for cluster_name in CLUSTERS:
-        if cluster_name.lower() in prompt.lower():
-            print(f"🧠 Resolver: Cluster match → {cluster_name}")
+    for m in matches:
+        for cluster_name in m.values(CLUSTER):
+            log.debug(f"🧠 Resolver: Cluster match → {cluster_name}")
+            metrics.intent_resolutions.inc("shortcut")
             return { "material": cluster_name, "metric": None, "date": "latest" }
 
+    # ⚡ Local rules: one clear material plus metric keywords and an explicit or implied month
+    local = parse_intent(prompt, material_hits)
+    log.debug(f"⚡ Local intent → {local}")
+    if local.confidence >= LOCAL_INTENT_MIN_CONFIDENCE:
+        metrics.intent_resolutions.inc("local")
+        return local.to_dict()
+
+    # ♻️ Repeated phrasings skip the GPT round trip entirely
+    cache_key = intent_key(prompt, materials_hash(materials))
+    cached = gpt_intent_cache.get(cache_key)
+    if cached is not None:
+        log.debug(f"♻️ Intent cache hit → {cached}")
+        metrics.intent_resolutions.inc("cache")
+        return dict(cached)
+
     # 🎯 Fallback to GPT intent extraction
-    print("🎯 No shortcut match — falling back to GPT resolution")
-
-    system_prompt = (
-            "You are a helpful assistant. A user will send a freeform question about construction materials.\n"
-            "From their prompt, extract:\n"
-            "- The most relevant material (must be from the provided list)\n"
-            "- The requested metric (must be exactly one of: 'momentum', 'volatility', 'spike', or 'rolling')\n"
-            "- The most specific date (must be in YYYY-MM format — or use 'latest' for the date only)\n\n"
-            "IMPORTANT:\n"
-            "- Do not use 'latest' as a metric.\n"
-            "- If no metric is specified, default to 'momentum'.\n"
-            "- Only use 'latest' in the 'date' field.\n"
-            "- Stay strictly clinical. Do not infer causes or offer explanations.\n\n"
-            "Return only a valid JSON object like:\n"
-            "{ \"material\": \"Asphalt (At Refinery)\", \"metric\": \"momentum\", \"date\": \"2024-11\" }\n\n"
-            "Here is the list of materials:\n" +
-            "\n".join(f"- {m}" for m in materials)
-    )
+    log.debug("🎯 No shortcut match — falling back to GPT resolution")
 
-    messages = [
-        { "role": "system", "content": system_prompt },
-        { "role": "user", "content": prompt }
-    ]
+    # Only the materials the prompt plausibly refers to, not all ~80
+    candidates = shortlist_materials(prompt, materials, fuzzy, matched_materials)
+    log.debug(f"📋 Intent shortlist: {candidates}")
+    messages = intent_messages(prompt, candidates)
 
-    if client is None:
-        print("⚠️ No GPT key present; cannot resolve via GPT")
+    if not gpt_configured():
+        log.warning("⚠️ No GPT key present; cannot resolve via GPT")
         raise HTTPException(status_code=400, detail="GPT key not configured for intent resolution.")
 
-    print("📡 Sending prompt to GPT...")
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=messages,
-        temperature=0
-    )
+    log.debug("📡 Sending prompt to GPT...")
+    metrics.intent_resolutions.inc("gpt")
+    response = await chat_completion(messages, temperature=0, call=CALL_INTENT)
 
     content = response.choices[0].message.content.strip()
-    print(f"🧾 Raw GPT content: {content}")
+    log.debug(f"🧾 Raw GPT content: {content}")
 
     try:
         parsed = eval(content)
-        print(f"📊 Parsed dict: {parsed}")
+        log.debug(f"📊 Parsed dict: {parsed}")
 
         # 🧼 Post-process — force 'latest' only in date field
         if not parsed.get("date") or "lately" in prompt.lower() or "recently" in prompt.lower():
-            print("📅 Prompt implies recency or no date provided — setting date to 'latest'")
+            log.debug("📅 Prompt implies recency or no date provided — setting date to 'latest'")
             parsed["date"] = "latest"
 
-        print(f"🧠 Final parsed values → material: {parsed.get('material')}, metric: {parsed.get('metric')}, date: {parsed.get('date')}")
+        log.debug(f"🧠 Final parsed values → material: {parsed.get('material')}, metric: {parsed.get('metric')}, date: {parsed.get('date')}")
+        gpt_intent_cache.set(cache_key, dict(parsed))
         return parsed
 
     except Exception as e:
-        print(f"⚠️ Failed to parse GPT response: {e}")
+        log.warning(f"⚠️ Failed to parse GPT response: {e}")
         raise HTTPException(status_code=400, detail="Failed to extract intent from prompt.")
 
 
@@ -134,13 +128,37 @@ class GPTQuery(BaseModel):
     prompt: str
 
 
-# === CONFIG ===
-BASE_URL = "https://raw.githubusercontent.com/evilb1000/whatsitcost/main/AIBrain/JSONS"
-# Allow running without GPT in local/dev
-_gpt_key = os.getenv("GPT_KEY") or os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=_gpt_key) if _gpt_key else None
-
-app = FastAPI(title="Material Trends API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Poll for new auto-sync data in the background; swaps are atomic
+    start_refresher()
+    yield
+    stop_refresher()
+
+
+app = FastAPI(title="Material Trends API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# === Conditional GET for data routes (body depends only on dataset version + request) ===
+DATA_ROUTE_PREFIXES = [
+    "/latest-trend/",
+    "/trends/",
+    "/trendline/",
+    "/spikes/",
+    "/rolling/",
+    "/rolling-12mo/",
+    "/rolling-3yr/",
+    "/rolling-window/",
+    "/correlations/",
+    "/correlations-",
+    "/mom-series/",
+    "/mom-series-multi",
+    "/series-bulk",
+]
+app.add_middleware(
+    ConditionalGetMiddleware,
+    version=lambda: get_snapshot().version,
+    prefixes=DATA_ROUTE_PREFIXES,
+)
 
 # === Enable CORS ===
 app.add_middleware(
@@ -151,147 +169,254 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# === Load JSON Helper ===
-def load_json_from_github(url):
-    try:
-        print(f"📦 Loading: {url}")
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        print(f"✅ Loaded {len(data)} records from {url}")
-        return data
-    except Exception as e:
-        print(f"❌ Error loading {url}: {e}")
-        return {}
+# === Metrics + sampled access log (outermost, so 304s and CORS preflights count) ===
+app.add_middleware(
+    MetricsMiddleware,
+    routes=lambda: app.routes,
+    on_complete=lambda scope, route, status, seconds: log_request(
+        scope, route, status, seconds, dataset_version=get_snapshot().version
+    ),
+)
 
-# === Load Data ===
-print("🚚 Initializing dataset loading from GitHub...")
-trends_by_date = load_json_from_github(f"{BASE_URL}/material_trends.json")
-trendlines_by_material = load_json_from_github(f"{BASE_URL}/material_trendlines.json")
-spikes_by_material = load_json_from_github(f"{BASE_URL}/material_spikes.json")
-rolling_by_material = load_json_from_github(f"{BASE_URL}/material_rolling.json")
-rolling_12mo_by_material = load_json_from_github(f"{BASE_URL}/material_rolling_12mo.json")
-rolling_3yr_by_material = load_json_from_github(f"{BASE_URL}/material_rolling_3yr.json")
-correlations_by_material = load_json_from_github(f"{BASE_URL}/material_correlations.json")
-snapshot_summary = load_json_from_github(f"{BASE_URL}/latest_snapshot.json")
-cluster_data = load_json_from_github(f"{BASE_URL}/cluster_data.json")  # ✅ Added for cluster summaries
-# ✅ Added
-print("✅ Finished loading datasets.")
-
-
-
-# === Aggregate Keys ===
-all_keys = set()
-check_material = "Precast Concrete Products"
-print("🔍 Verifying material presence across datasets...")
-for name, dataset in [
-    ("Rolling", rolling_by_material),
-    ("Trendlines", trendlines_by_material),
-    ("Spikes", spikes_by_material),
-    ("12mo", rolling_12mo_by_material),
-    ("3yr", rolling_3yr_by_material),
-    ("Correlations", correlations_by_material),
-]:
-    if check_material in dataset:
-        print(f"🧱 Found '{check_material}' in {name}")
-    else:
-        print(f"⚠️ Missing '{check_material}' in {name}")
-    all_keys.update(dataset.keys())
-
-material_list = sorted(all_keys)
-alias_map = get_material_map() or {}
-
-# Common loose aliases → canonical material names (best-effort, non-exhaustive)
-ALIASES = {
-    "diesel": "#2 Diesel Fuel",
-    "diesel fuel": "#2 Diesel Fuel",
-    "aluminum shapes": "Aluminum Mill Shapes",
-    "aluminum mill": "Aluminum Mill Shapes",
-    "aluminium": "Aluminum Mill Shapes",
-    "asphalt": "Asphalt (At Refinery)",
-    "cement": "Cement",
-    "flat glass": "Flatt Glass",
-    "glass": "Flatt Glass",
-    "rebar": "Fabricated Structural Metal Bar Joists and Rebar",
-    "steel": "Steel Mill Products",
-    "ppi": "Producer Price Index (PPI For Final Demand",
-    "cpi": "Consumer Price Index (CPI-U)",
-}
-print(f"🧠 Final material list contains {len(material_list)} materials")
 
+def collect_runtime_metrics():
+    snapshot = get_snapshot()
+    metrics.dataset_info.clear()
+    metrics.dataset_info.set(snapshot.version, str(snapshot.ready).lower(), value=1)
+    metrics.dataset_loaded_timestamp.set(value=snapshot.loaded_at.timestamp())
+    metrics.dataset_materials.set(value=len(snapshot.material_list))
+    stats = {**cache_stats(), "rolling_window": rolling_cache.stats()}
+    for name, cache in stats.items():
+        metrics.cache_entries.set(name, value=cache["size"])
+        metrics.cache_hits.set(name, value=cache["hits"])
+        metrics.cache_misses.set(name, value=cache["misses"])
+    metrics.cache_entries.set("encoded_bodies", value=len(snapshot.encoded))
 
 
+metrics.register_collector(collect_runtime_metrics)
+
+# === Load Data ===
+load_initial_snapshot()
+log.info("✅ Finished loading datasets.")
+
 # === ROUTES ===
 
 @app.get("/latest-trend/{material}")
 def latest_trend(material: str):
-    print(f"📈 Fetching latest trend entry for: {material}")
-    return get_latest_trend_entry(material, trendlines_by_material)
+    log.debug(f"📈 Fetching latest trend entry for: {material}")
+    return get_latest_trend_entry(material, get_snapshot().trendlines_by_material)
 
 @app.get("/")
 def root():
-    print("🌐 Root endpoint accessed")
+    log.debug("🌐 Root endpoint accessed")
     return {"message": "Material Trends API is live!"}
 
+@app.get("/ready")
+def ready():
+    snapshot = get_snapshot()
+    if not snapshot.ready:
+        log.warning(f"⏳ Not ready — missing datasets: {list(snapshot.missing)}")
+        raise HTTPException(status_code=503, detail={"ready": False, "missing": list(snapshot.missing)})
+    return {"ready": True, "sources": dict(snapshot.sources)}
+
+@app.get("/cache-stats")
+def get_cache_stats():
+    return {**cache_stats(), "rolling_window": rolling_cache.stats()}
+
+@app.get("/metrics")
+def get_metrics():
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
+@app.get("/dataset-version")
+def dataset_version_info():
+    return get_snapshot().info()
+
 @app.get("/trends/{material}/{date}")
 def get_trend_for_material_date(material: str, date: str):
-    print(f"📅 Looking up MoM/YoY for '{material}' on {date}")
-    return get_trend_mom_summary(material, trendlines_by_material, date)
+    log.debug(f"📅 Looking up MoM/YoY for '{material}' on {date}")
+    return get_trend_mom_summary(material, get_snapshot().trendlines_by_material, date)
 
 
 @app.get("/trendline/{material}")
-def get_trendline(material: str):
-    print(f"📊 Getting trendline for: {material}")
-    data = trendlines_by_material.get(material)
-    if data is None:
-        print(f"❌ No trendline found for: {material}")
+def get_trendline(material: str, request: Request):
+    log.debug(f"📊 Getting trendline for: {material}")
+    snapshot = get_snapshot()
+    series = snapshot.trendlines_by_material.get(material)
+    if series is None:
+        log.debug(f"❌ No trendline found for: {material}")
         raise HTTPException(status_code=404, detail="Material not found")
-    return data
+    return encoded_json(request, snapshot.encoded, ("trendline", material), series.records)
 
 @app.get("/spikes/{material}")
-def get_spikes(material: str):
-    print(f"📉 Checking for spikes in: {material}")
-    data = spikes_by_material.get(material)
-    if data is None:
-        print(f"❌ No spike data found for: {material}")
+def get_spikes(material: str, request: Request):
+    log.debug(f"📉 Checking for spikes in: {material}")
+    snapshot = get_snapshot()
+    spikes = snapshot.spikes_by_material
+    if material not in spikes:
+        log.debug(f"❌ No spike data found for: {material}")
         raise HTTPException(status_code=404, detail="Material not found")
-    return data
+    # The records are only rebuilt on a cache miss
+    return encoded_json(request, snapshot.encoded, ("spikes", material), lambda: spikes.get(material))
 
 @app.get("/rolling/{material}")
-def get_rolling_avg(material: str):
-    print(f"📊 Getting rolling average for: {material}")
-    data = rolling_by_material.get(material)
-    if data is None:
-        print(f"❌ No rolling data found for: {material}")
+def get_rolling_avg(material: str, request: Request):
+    log.debug(f"📊 Getting rolling average for: {material}")
+    snapshot = get_snapshot()
+    series = snapshot.rolling_by_material.get(material)
+    if series is None:
+        log.debug(f"❌ No rolling data found for: {material}")
         raise HTTPException(status_code=404, detail="Material not found")
-    return data
+    return encoded_json(request, snapshot.encoded, ("rolling", material), series.records)
 
 @app.get("/rolling-12mo/{material}")
-def get_rolling_12mo(material: str):
-    print(f"📆 Getting 12-month rolling data for: {material}")
-    data = rolling_12mo_by_material.get(material)
-    if data is None:
-        print(f"❌ No 12mo data found for: {material}")
+def get_rolling_12mo(material: str, request: Request):
+    log.debug(f"📆 Getting 12-month rolling data for: {material}")
+    snapshot = get_snapshot()
+    series = snapshot.rolling_12mo_by_material.get(material)
+    if series is None:
+        log.debug(f"❌ No 12mo data found for: {material}")
         raise HTTPException(status_code=404, detail="Material not found")
-    return data
+    return encoded_json(request, snapshot.encoded, ("rolling-12mo", material), series.records)
 
 @app.get("/rolling-3yr/{material}")
-def get_rolling_3yr(material: str):
-    print(f"📅 Getting 3-year rolling data for: {material}")
-    data = rolling_3yr_by_material.get(material)
-    if data is None:
-        print(f"❌ No 3yr data found for: {material}")
+def get_rolling_3yr(material: str, request: Request):
+    log.debug(f"📅 Getting 3-year rolling data for: {material}")
+    snapshot = get_snapshot()
+    series = snapshot.rolling_3yr_by_material.get(material)
+    if series is None:
+        log.debug(f"❌ No 3yr data found for: {material}")
+        raise HTTPException(status_code=404, detail="Material not found")
+    return encoded_json(request, snapshot.encoded, ("rolling-3yr", material), series.records)
+
+
+def check_month_bounds(*bounds):
+    for bound in bounds:
+        if bound is not None and month_ordinal(bound) is None:
+            raise HTTPException(status_code=400, detail=f"Invalid month '{bound}', expected YYYY-MM")
+
+
+@app.get("/rolling-window/{material}")
+def get_rolling_window(material: str,
+                       window: Optional[int] = Query(None, ge=1, le=MAX_WINDOW),
+                       halflife: Optional[float] = Query(None, gt=0, le=MAX_HALFLIFE),
+                       date_from: Optional[str] = Query(None, alias="from"),
+                       date_to: Optional[str] = Query(None, alias="to")):
+    """
+    Any-length trailing average (window, in months) or exponentially weighted
+    average (halflife, in months) of MoM and YoY, computed from the raw values
+    (or, without the panel artifact, the precomputed files and trendlines).
+    Records use the rolling-file shape: {Date, MoM_<N>mo_avg, YoY_<N>mo_avg}
+    or {Date, MoM_ewma_<h>, YoY_ewma_<h>}.
+    """
+    log.debug(f"🪟 Rolling window for: {material} | window={window} halflife={halflife}")
+    if (window is None) == (halflife is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of window or halflife")
+    check_month_bounds(date_from, date_to)
+    snapshot = get_snapshot()
+    key = snapshot.canonical_material(material)
+    series = cached_window(snapshot, key, window, halflife) if key else None
+    if series is None:
+        log.debug(f"❌ No trendline data found for: {material}")
         raise HTTPException(status_code=404, detail="Material not found")
-    return data
+    return series.records(date_from, date_to)
 
 @app.get("/correlations/{base}/{target}")
 def get_correlation(base: str, target: str):
-    print(f"🔗 Fetching correlation from {base} to {target}")
-    base_data = correlations_by_material.get(base)
-    if base_data is None or target not in base_data:
-        print(f"❌ Correlation not found: {base} → {target}")
+    log.debug(f"🔗 Fetching correlation from {base} to {target}")
+    snapshot = get_snapshot()
+    base = snapshot.canonical_material(base) or base
+    target = snapshot.canonical_material(target) or target
+    pair = snapshot.correlations.pair(base, target)
+    if pair is None:
+        log.debug(f"❌ Correlation not found: {base} → {target}")
         raise HTTPException(status_code=404, detail="Correlation data not found")
-    return base_data[target]
+    return pair
+
+
+MAX_CORRELATION_RESULTS = 500
+
+
+def parse_lag(correlations, lag: str):
+    """
+    "best" (or empty) → None, otherwise a lag the dataset was computed for.
+    """
+    if lag is None or lag.strip().lower() in ("", "best"):
+        return None
+    try:
+        correlations.lag_position(lag)
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid lag '{lag}'; valid: best, {correlations.lags}")
+    return int(lag)
+
+
+def check_sign(sign: str) -> str:
+    sign = sign.lower()
+    if sign not in SIGN_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid sign '{sign}'; valid: {list(SIGN_MODES)}")
+    return sign
+
+
+@app.get("/correlations-top/{base}")
+def get_top_correlations(base: str, k: int = Query(10, ge=1, le=MAX_CORRELATION_RESULTS),
+                         lag: str = "best", sign: str = "abs"):
+    """
+    The k materials most correlated with `base`.
+    lag: months the target leads by, or "best" for each target's strongest lag
+    sign: abs (strongest either way), positive, or negative
+    """
+    log.debug(f"🔗 Top {k} correlations for {base} | lag={lag} sign={sign}")
+    snapshot = get_snapshot()
+    correlations = snapshot.correlations
+    base = snapshot.canonical_material(base) or base
+    if base not in correlations:
+        raise HTTPException(status_code=404, detail="Material not found")
+    lag_value, sign = parse_lag(correlations, lag), check_sign(sign)
+    return {
+        "base": base,
+        "lag": lag_value if lag_value is not None else "best",
+        "sign": sign,
+        "results": correlations.top_partners(base, k, lag_value, sign),
+    }
+
+
+@app.get("/correlations-strongest")
+def get_strongest_correlations(k: int = Query(20, ge=1, le=MAX_CORRELATION_RESULTS),
+                               lag: str = "best", sign: str = "abs"):
+    """
+    The k strongest material pairs across the whole correlation set.
+    """
+    log.debug(f"🔗 Strongest {k} correlated pairs | lag={lag} sign={sign}")
+    correlations = get_snapshot().correlations
+    lag_value, sign = parse_lag(correlations, lag), check_sign(sign)
+    return {
+        "lag": lag_value if lag_value is not None else "best",
+        "sign": sign,
+        "results": correlations.strongest_pairs(k, lag_value, sign),
+    }
+
+
+@app.get("/correlations-matrix")
+def get_correlation_matrix(request: Request, lag: str = "0", materials: Optional[str] = None):
+    """
+    Base × target correlation matrix at one lag.
+    materials: optional comma-separated subset (defaults to every material)
+    """
+    log.debug(f"🔗 Correlation matrix | lag={lag} materials={materials}")
+    snapshot = get_snapshot()
+    correlations = snapshot.correlations
+    lag_value = parse_lag(correlations, lag)
+    if lag_value is None:
+        raise HTTPException(status_code=400, detail="The matrix needs a specific lag")
+    names = None
+    if materials:
+        names = [snapshot.canonical_material(n) or n for n in snapshot.split_materials(materials)]
+        unknown = [n for n in names if n not in correlations]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Material(s) not found: {unknown}")
+        return correlations.matrix(lag_value, names)
+    # The full matrix is the same for every caller of this version — encode it once
+    return encoded_json(request, snapshot.encoded, ("correlations-matrix", lag_value),
+                        lambda: correlations.matrix(lag_value))
 
 # === Visualization helpers and endpoint ===
 def parse_months_from_prompt(prompt: str) -> int:
@@ -320,299 +445,397 @@ def parse_months_from_prompt(prompt: str) -> int:
     return 24
 
 
-def build_mom_series(material: str, months: int):
+def build_mom_series(snapshot, material: str, months: int):
     """
-    Build a sequence of {date, value} for MoM over the last N months from trendlines_by_material.
+    Build a sequence of {date, value} for MoM over the last N months from the snapshot's trendlines.
     Skips entries with null MoM.
     """
-    records = trendlines_by_material.get(material)
-    if not records:
+    series = snapshot.trendlines_by_material.get(material)
+    if series is None:
         raise HTTPException(status_code=404, detail=f"Material '{material}' not found")
 
-    # Keep entries that have Date and MoM
-    clean = [r for r in records if r.get("Date") and (r.get("MoM") is not None)]
-    if not clean:
+    # Positions with a non-null MoM are precomputed in date order — just slice
+    if "MoM" not in series.valid or not len(series.valid["MoM"]):
         raise HTTPException(status_code=404, detail=f"No MoM data for material '{material}'")
 
-    # Sort by Date and slice
-    clean = sorted(clean, key=lambda r: r["Date"])  # YYYY-MM sorts lexicographically
-    points = clean[-months:]
-    return [{"date": r["Date"], "value": r["MoM"]} for r in points]
+    mom = series.columns["MoM"]
+    return [{"date": series.date_at(i), "value": float(mom[i])} for i in series.last_valid("MoM", months)]
 
 
 @app.get("/mom-series/{material}")
 def get_mom_series(material: str, months: int = 24):
-    print(f"📈 Building MoM series for {material} over last {months} months")
-    points = build_mom_series(material, months)
+    log.debug(f"📈 Building MoM series for {material} over last {months} months")
+    points = build_mom_series(get_snapshot(), material, months)
     return {"material": material, "metric": "MoM", "months": months, "points": points}
 
 
+def not_found_entry(snapshot, name: str) -> dict:
+    """
+    Error entry for an unresolved material name, with the closest candidates.
+    """
+    return {
+        "material": name,
+        "error": "Material not found",
+        "candidates": [m.to_dict() for m in snapshot.fuzzy.search(name, limit=3)],
+    }
+
+
 @app.get("/mom-series-multi")
 def get_mom_series_multi(materials: str, months: int = 24):
     """
     materials: comma-separated list of material names
     months: number of months to include
     """
-    print(f"📈 Building multi-series MoM for: {materials} over {months} months")
-    names = [m.strip() for m in materials.split(",") if m.strip()]
+    log.debug(f"📈 Building multi-series MoM for: {materials} over {months} months")
+    snapshot = get_snapshot()
+    names = snapshot.split_materials(materials)
     if not names:
         raise HTTPException(status_code=400, detail="No materials provided")
     if len(names) > 4:
         names = names[:4]
     series_list = []
     for name in names:
-        # Try exact match; if not found, try case-insensitive lookup from material_list
-        key = name if name in trendlines_by_material else next((m for m in material_list if m.lower() == name.lower()), None)
-        if not key:
-            series_list.append({"material": name, "error": "Material not found"})
+        # Exact, then case-insensitive, then typo-tolerant lookup
+        match = snapshot.resolve_material(name)
+        if match is None:
+            series_list.append(not_found_entry(snapshot, name))
             continue
+        key = match.material
+        entry = {"material": key}
+        if match.score < 1.0:
+            entry.update(matched_from=name, confidence=round(match.score, 3))
         try:
-            points = build_mom_series(key, months)
-            series_list.append({"material": key, "points": points})
+            entry["points"] = build_mom_series(snapshot, key, months)
         except HTTPException as e:
-            series_list.append({"material": key, "error": e.detail})
+            entry["error"] = e.detail
+        series_list.append(entry)
     return {"metric": "MoM", "months": months, "series": series_list}
 
+# Bulk metric name → (snapshot table attribute, field)
+BULK_METRICS = {
+    "mom": ("trendlines_by_material", "MoM"),
+    "yoy": ("trendlines_by_material", "YoY"),
+    "mom_3mo_avg": ("rolling_by_material", "MoM_3mo_avg"),
+    "yoy_3mo_avg": ("rolling_by_material", "YoY_3mo_avg"),
+    "mom_12mo_avg": ("rolling_12mo_by_material", "MoM_12mo_avg"),
+    "yoy_12mo_avg": ("rolling_12mo_by_material", "YoY_12mo_avg"),
+    "mom_36mo_avg": ("rolling_3yr_by_material", "MoM_3yr_avg"),
+    "yoy_36mo_avg": ("rolling_3yr_by_material", "YoY_3yr_avg"),
+}
+MAX_BULK_SERIES = int(os.getenv("MAX_BULK_SERIES", "400"))
+
+
+@app.get("/series-bulk")
+def get_series_bulk(materials: str, metric_list: str = Query("mom", alias="metrics"), date_from: Optional[str] = Query(None, alias="from"),
+                    date_to: Optional[str] = Query(None, alias="to")):
+    """
+    Columnar multi-material, multi-metric pull.
+    materials: comma-separated material names (any number)
+    metrics: comma-separated subset of BULK_METRICS keys
+    from / to: optional inclusive YYYY-MM bounds
+    Returns one shared date axis plus one value array per (material, metric).
+    """
+    log.debug(f"📦 Bulk series for: {materials} | metrics: {metric_list} | {date_from} → {date_to}")
+    snapshot = get_snapshot()
+    names = snapshot.split_materials(materials)
+    metric_names = [m.strip().lower() for m in metric_list.split(",") if m.strip()]
+    if not names or not metric_names:
+        raise HTTPException(status_code=400, detail="Provide at least one material and one metric")
+    unknown = [m for m in metric_names if m not in BULK_METRICS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown metric(s) {unknown}; valid: {list(BULK_METRICS)}")
+    if len(names) * len(metric_names) > MAX_BULK_SERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_SERIES} series per request")
+    check_month_bounds(date_from, date_to)
+
+    labels, columns, errors, resolved = [], [], [], []
+    for name in names:
+        match = snapshot.resolve_material(name)
+        if match is None:
+            errors.append(not_found_entry(snapshot, name))
+            continue
+        key = match.material
+        if match.score < 1.0:
+            resolved.append({"requested": name, **match.to_dict()})
+        for metric in metric_names:
+            table, field = BULK_METRICS[metric]
+            series = getattr(snapshot, table).get(key)
+            if series is None or field not in series.columns:
+                errors.append({"material": key, "metric": metric, "error": "No data"})
+                continue
+            labels.append((key, metric))
+            columns.append((series, field))
+
+    dates, values = align_columns(columns, date_from, date_to)
+    return {
+        "dates": dates,
+        "series": [
+            {"material": material, "metric": metric, "values": vals}
+            for (material, metric), vals in zip(labels, values)
+        ],
+        "errors": errors,
+        "resolved": resolved,
+    }
+
 # === GPT Chat Endpoint ===
 
 class GPTRequest(BaseModel):
     messages: list
 
-@app.post("/gpt")
-async def run_gpt(query: GPTQuery):
-    print(f"🧠 GPT Prompt received: {query.prompt}")
+GPT_ERROR_MESSAGE = (
+    "I'm sorry, I could not process this request. "
+    "Please let Ben know at Ben@mbawpa.org. "
+    "Copy and paste your query. "
+    "The errors can be fixed and will make me smarter."
+)
+
+# Seconds between client-disconnect checks while GPT work is in flight
+DISCONNECT_POLL_SECONDS = 0.5
+# Identical /gpt prompts in flight at the same time share one answer (0 disables)
+GPT_COALESCE = os.getenv("GPT_COALESCE", "1") != "0"
 
+# In-flight /gpt answers keyed by (normalized prompt, dataset version)
+gpt_flights = SingleFlight()
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def run_until_disconnect(request: Request, coro):
+    """
+    Awaits coro, cancelling it (and any OpenAI call it is waiting on) if the
+    client goes away first.
+    """
+    task = asyncio.ensure_future(coro)
     try:
-        # Visualization intent: detect chart requests and return chart data payload
-        viz_triggers = [
-            "chart", "graph", "plot", "visual", "visualize", "visualisation", "visualization",
-            "trendline", "trendlines", "trend", "trends"
-        ]
-        if any(t in query.prompt.lower() for t in viz_triggers):
-            print("🖼️ Visualization intent detected — preparing chart data")
-            # Collect up to 4 materials mentioned in the prompt (with alias support)
-            lowered = query.prompt.lower()
-            matched = []
-            # 1) Exact substring matches
-            for m in material_list:
-                if m.lower() in lowered:
-                    matched.append(m)
-                if len(matched) >= 4:
-                    break
-            # 2) Alias approximate matches (always run hardcoded ALIASES)
-            if len(matched) < 4:
-                for alias, canonical in ALIASES.items():
-                    if len(matched) >= 4:
-                        break
-                    if canonical in matched:
-                        continue
-                    if alias in lowered and canonical in material_list:
-                        matched.append(canonical)
-            # 3) Try keys from material_map.json (treat keys as aliases if not exact canonical names)
-            if len(matched) < 4 and alias_map:
-                for alias, series_id in alias_map.items():
-                    if len(matched) >= 4:
-                        break
-                    if alias in matched:
-                        continue
-                    if alias in material_list and alias.lower() in lowered:
-                        matched.append(alias)
-            # Do NOT call GPT for viz matching; rely on aliases to avoid API dependency
-            if not matched:
-                raise HTTPException(status_code=400, detail="Could not determine material(s) for the chart.")
-
-            months = parse_months_from_prompt(query.prompt)
-            multi_series = []
-            for mat in matched:
-                try:
-                    pts = build_mom_series(mat, months)
-                    multi_series.append({"material": mat, "points": pts})
-                except HTTPException as e:
-                    multi_series.append({"material": mat, "error": e.detail, "points": []})
-            title = ", ".join(matched[:4]) + f" — MoM over last {months} months"
-            return {
-                "chartData": {
-                    "type": "line",
-                    "metric": "MoM",
-                    "months": months,
-                    "series": multi_series,
-                    "title": title
-                }
-            }
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
 
-        # Step 1: Resolve material, metric, date
-        if client is None:
-            raise HTTPException(status_code=400, detail="GPT key not configured. Set GPT_KEY or OPENAI_API_KEY.")
-        intent = resolve_prompt_with_gpt(query.prompt, material_list)
-        # ✨ EXECUTIVE SUMMARY BYPASS (no material → snapshot summary)
-        if intent.get("material") is None:
-            print("📊 Exec summary triggered — no material provided.")
-
-            snapshot_prompt = (
-                    "You are a market analyst assistant. Based on the following snapshot of construction material trends, "
-                    "write a clean, structured executive summary **as of the provided snapshot_date**. Follow this format:\n\n"
-                    "1. Begin with the core indexes:\n"
-                    "   - Consumer Price Index (CPI-U)\n"
-                    "   - Producer Price Index (PPI) for Final Demand\n"
-                    "   - Final Demand Construction Index\n"
-                    "   - Inputs to Construction Industries\n"
-                    "   - For each index, include both the month-over-month (MoM) and year-over-year (YoY) percentage change.\n\n"
-                    "2. Summarize the overall market direction (clinical statement only):\n"
-                    "   - State whether movements are mostly up, down, or stable based on counts.\n"
-                    "   - Do not speculate on causes or implications.\n\n"
-                    "3. Include the percentage breakdown:\n"
-                    "   - % of materials that increased\n"
-                    "   - % that decreased\n"
-                    "   - % that remained stable\n"
-                    "   - Start by stating: 'Out of the [total series count] materials we track...'\n\n"
-                    "4. List the standout performers:\n"
-                    "   - Top risers with both MoM and YoY percentage increases\n"
-                    "   - Top fallers with both MoM and YoY percentage decreases\n\n"
-                    "**Formatting & Style Instructions:**\n"
-                    "- Structure the output as concise, readable paragraphs — do not use numbered sections or bullet points.\n"
-                    "- Each of the four items above should be its own paragraph.\n"
-                    "- Use formal, clinical language.\n"
-                    "- Do NOT offer reasons, implications, or commentary (e.g., 'indicating demand has gone up', 'doing well', 'due to').\n"
-                    "- Only state observed direction and percentages from the data.\n\n"
-                    "Snapshot data:\n" + json.dumps(snapshot_summary, indent=2)
-            )
 
+@app.post("/gpt")
+async def run_gpt(query: GPTQuery, request: Request):
+    log.debug(f"🧠 GPT Prompt received: {query.prompt}")
 
+    try:
+        return await run_until_disconnect(request, coalesced_answer(query.prompt, get_snapshot()))
 
-            final_response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system",
-                     "content": "You summarize construction material market data into concise, expert-level insights."},
-                    {"role": "user", "content": snapshot_prompt}
-                ],
-                temperature=0.5
-            )
+    except ClientDisconnected:
+        log.info("🔌 Client disconnected — cancelled in-flight GPT work")
+        return Response(status_code=499)
 
-            result = final_response.choices[0].message.content.strip()
-            print(f"📈 Exec Summary GPT Result: {result}")
-            return {"response": result}
-        material = intent["material"]
-        metric = intent["metric"]
-        date = intent["date"]
-        # ✳️ CLUSTER SUMMARY HANDLER
-        if material in cluster_data:
-            print(f"📦 Cluster summary triggered for: {material}")
-
-            cluster_blob = cluster_data[material]
-
-            cluster_prompt = (
-                f"You are a market analyst assistant. Based on the following data for the '{material}' cluster, "
-                f"write a concise, expert-level report. Your tone must be formal and strictly clinical.\n\n"
-                f"Cluster data:\n{json.dumps(cluster_blob, indent=2)}\n\n"
-                f"**Output Structure:**\n"
-                f"1) A single paragraph of 1–2 sentences summarizing observed movements across the cluster (no causes).\n"
-                f"2) A vertical bulleted list with each material on its own line:\n"
-                f"   - <Material>: MoM <x.xx>% | YoY <y.yy>%\n"
-                f"   - <Material>: MoM <x.xx>% | YoY <y.yy>%\n"
-                f"   (etc.)\n\n"
-                f"**Rules:**\n"
-                f"- Focus only on MoM and YoY direction and magnitudes.\n"
-                f"- Do not offer reasons, implications, or commentary (no 'indicates', 'suggests', 'demand', 'due to').\n"
-                f"- Use hyphen bullets only; each bullet must be on its own line.\n"
-                f"- If a value is missing, write 'n/a'."
-            )
+    except Exception as e:
 
-            final_response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system",
-                     "content": "You generate financial summaries for construction material clusters."},
-                    {"role": "user", "content": cluster_prompt}
-                ],
-                temperature=0.5
-            )
+        log.exception(f"🔥 Error in /gpt handler: {e!r}")
 
-            result = final_response.choices[0].message.content.strip()
-            print(f"📊 Cluster Summary Result: {result}")
-            return {"response": result}
-
-        print(f"🔎 Resolved — Material: {material}, Metric: {metric}, Date: {date}")
-
-        # Step 2: Get data for the requested insight
-        # ✅ Resolve "latest" to actual date in dataset
-        # 🛡️ Validate metric first
-        valid_metrics = ["momentum", "volatility", "spike", "rolling"]
-        if metric not in valid_metrics:
-            print(f"❌ Invalid metric parsed: {metric}")
-            raise HTTPException(
-                status_code=400,
-                detail="I'm sorry, I could not process that metric. Please ask about momentum, volatility, spike, or rolling."
-            )
+        return { "response": GPT_ERROR_MESSAGE }
 
-        # ✅ Resolve "latest" to actual date
-        if date == "latest":
-            all_dates = [entry.get("date") or entry.get("Date") for entry in trendlines_by_material[material]]
-            date = max(all_dates)
-            print(f"⏱️ 'latest' resolved to → {date}")
-
-        # Step 2: Get data for the requested insight
-        trend_output = get_latest_trend_entry(
-            material=material,
-            dataset=trendlines_by_material,
-            date=date,
-            field=metric
-        )
 
-        summary = get_trend_mom_summary(
-            material=material,
-            dataset=trendlines_by_material,
-            date=date
-        )
+@app.post("/gpt/stream")
+async def stream_gpt(query: GPTQuery):
+    """
+    Opt-in SSE variant of /gpt. Events:
+    - chart: the chartData payload, sent once
+    - token: {"text": ...} chunks of the answer as they are generated
+    - error: {"response": ...} if the request could not be processed
+    - done: terminator; carries the full {"response": ...} for text answers
+    Starlette cancels the generator (and the upstream stream) on disconnect.
+    """
+    log.debug(f"🧠 GPT stream prompt received: {query.prompt}")
+    return StreamingResponse(
+        gpt_event_stream(query.prompt, get_snapshot()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-        combined_summary = {
-            "trend_entry": trend_output,
-            "mom_trend": summary
-        }
-
-        # Step 3: Send to GPT for final chat response
-        final_response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a clinical economic reporting assistant. Use ONLY the provided tool output to summarize observed movements.\n"
-                        "Rules:\n"
-                        "- Do NOT explain causes, implications, or motivations.\n"
-                        "- Do NOT use speculative phrasing (e.g., 'indicates', 'suggests', 'due to', 'demand', 'supply', 'doing well').\n"
-                        "- Only state direction (up/down/stable) and magnitudes (MoM/YoY percentages).\n"
-                    )
-                },
-                { "role": "user", "content": query.prompt },
-                { "role": "assistant", "content": f"Tool output: {combined_summary}" }
-            ]
-        )
 
-        result = final_response.choices[0].message.content
-        print(f"💬 Final GPT Message: {result}")
-        return { "response": result }
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 
+async def gpt_event_stream(prompt: str, snapshot):
+    try:
+        payload, messages = await plan_gpt(prompt, snapshot)
+        if payload is not None:
+            if "chartData" in payload:
+                yield sse_event("chart", payload["chartData"])
+                yield sse_event("done", {})
+            else:
+                yield sse_event("token", {"text": payload["response"]})
+                yield sse_event("done", payload)
+            return
+
+        parts = []
+        async for delta in stream_chat_completion(messages, call=CALL_FINAL_ANSWER):
+            parts.append(delta)
+            yield sse_event("token", {"text": delta})
+        result = "".join(parts)
+        log.debug(f"💬 Final GPT Message (streamed): {result}")
+        yield sse_event("done", {"response": result})
 
     except Exception as e:
+        log.exception(f"🔥 Error in /gpt/stream handler: {e!r}")
+        yield sse_event("error", {"response": GPT_ERROR_MESSAGE})
+        yield sse_event("done", {})
 
-        print(f"🔥 Error in /gpt handler: {e}")
 
-        return {
+async def coalesced_answer(prompt: str, snapshot) -> dict:
+    """
+    answer_gpt, with concurrent duplicates (newsletter bursts) waiting on
+    the first caller's upstream calls instead of starting their own.
+    """
+    if not GPT_COALESCE:
+        return await answer_gpt(prompt, snapshot)
+    key = (normalize_prompt(prompt), snapshot.version)
+    result, shared = await gpt_flights.do(key, lambda: answer_gpt(prompt, snapshot))
+    metrics.gpt_coalesced.inc("follower" if shared else "leader")
+    if shared:
+        log.debug(f"🤝 Joined in-flight answer for: {prompt}")
+    return result
 
-            "response": (
 
-                "I'm sorry, I could not process this request. "
+async def answer_gpt(prompt: str, snapshot) -> dict:
+    payload, messages = await plan_gpt(prompt, snapshot)
+    if payload is not None:
+        return payload
 
-                "Please let Ben know at Ben@mbawpa.org. "
+    # Step 3: Send to GPT for final chat response
+    final_response = await chat_completion(messages, call=CALL_FINAL_ANSWER)
 
-                "Copy and paste your query. "
+    result = final_response.choices[0].message.content
+    log.debug(f"💬 Final GPT Message: {result}")
+    return { "response": result }
 
-                "The errors can be fixed and will make me smarter."
 
-            )
+async def plan_gpt(prompt: str, snapshot):
+    """
+    Everything /gpt does before the final answer call.
+    Returns (payload, None) when the answer is already known (chart data,
+    exec/cluster narratives) or (None, messages) for the final GPT call.
+    """
+    material_list = snapshot.material_list
+
+    # Visualization intent: detect chart requests and return chart data payload
+    viz_triggers = [
+        "chart", "graph", "plot", "visual", "visualize", "visualisation", "visualization",
+        "trendline", "trendlines", "trend", "trends"
+    ]
+    lowered = prompt.lower()
+    if any(t in lowered for t in viz_triggers):
+        log.debug("🖼️ Visualization intent detected — preparing chart data")
+        # Collect up to 4 materials mentioned in the prompt (canonical names and aliases,
+        # longest match wins so "steel" never shadows "Steel Mill Products")
+        matched = snapshot.matcher.materials(prompt, limit=4)
+        if not matched:
+            # Typos and near-misses: trigram index, still no GPT call
+            matched = [m.material for m in snapshot.fuzzy.find_in_text(prompt, limit=4)]
+        # Do NOT call GPT for viz matching; rely on aliases to avoid API dependency
+        if not matched:
+            raise HTTPException(status_code=400, detail="Could not determine material(s) for the chart.")
+
+        months = parse_months_from_prompt(prompt)
+        multi_series = []
+        for mat in matched:
+            try:
+                pts = build_mom_series(snapshot, mat, months)
+                multi_series.append({"material": mat, "points": pts})
+            except HTTPException as e:
+                multi_series.append({"material": mat, "error": e.detail, "points": []})
+        title = ", ".join(matched[:4]) + f" — MoM over last {months} months"
+        return {
+            "chartData": {
+                "type": "line",
+                "metric": "MoM",
+                "months": months,
+                "series": multi_series,
+                "title": title
+            }
+        }, None
+
+    # Step 1: Resolve material, metric, date
+    intent = await resolve_prompt_with_gpt(prompt, material_list, snapshot.matcher, snapshot.fuzzy)
+    # ✨ EXECUTIVE SUMMARY BYPASS (no material → snapshot summary)
+    if intent.get("material") is None:
+        log.debug("📊 Exec summary triggered — no material provided.")
+
+        # Generated once per dataset version (or at pipeline time) and served from memory
+        result = await snapshot.narratives.exec_summary()
+        log.debug(f"📈 Exec Summary GPT Result: {result}")
+        return {"response": result}, None
+    material = intent["material"]
+    metric = intent["metric"]
+    date = intent["date"]
+    # ✳️ CLUSTER SUMMARY HANDLER
+    if material in snapshot.cluster_data:
+        log.debug(f"📦 Cluster summary triggered for: {material}")
+
+        result = await snapshot.narratives.cluster_summary(material)
+        log.debug(f"📊 Cluster Summary Result: {result}")
+        return {"response": result}, None
+
+    # GPT occasionally returns a near-miss of a list entry; snap it to the canonical name
+    resolved = snapshot.resolve_material(material)
+    if resolved is None:
+        log.info(f"❌ Unknown material parsed: {material}")
+        raise HTTPException(status_code=400, detail=f"I'm sorry, I could not find data for '{material}'.")
+    material = resolved.material
+
+    log.debug(f"🔎 Resolved — Material: {material}, Metric: {metric}, Date: {date}")
+
+    # Step 2: Get data for the requested insight
+    # ✅ Resolve "latest" to actual date in dataset
+    # 🛡️ Validate metric first
+    valid_metrics = ["momentum", "volatility", "spike", "rolling"]
+    if metric not in valid_metrics:
+        log.info(f"❌ Invalid metric parsed: {metric}")
+        raise HTTPException(
+            status_code=400,
+            detail="I'm sorry, I could not process that metric. Please ask about momentum, volatility, spike, or rolling."
+        )
 
-        }
+    # ✅ Resolve "latest" to actual date
+    if date == "latest":
+        series = snapshot.trendlines_by_material.get(material)
+        date = series.date_at(series.latest)
+        log.debug(f"⏱️ 'latest' resolved to → {date}")
+
+    # Step 2: Get data for the requested insight
+    trend_output = get_latest_trend_entry(
+        material=material,
+        dataset=snapshot.trendlines_by_material,
+        date=date,
+        field=metric
+    )
+
+    summary = get_trend_mom_summary(
+        material=material,
+        dataset=snapshot.trendlines_by_material,
+        date=date
+    )
+
+    # Final answer messages — sent by answer_gpt or streamed by gpt_event_stream
+    return None, [
+        {
+            "role": "system",
+            "content": (
+                "You are a clinical economic reporting assistant. Use ONLY the provided tool output to summarize observed movements.\n"
+                "Rules:\n"
+                "- Do NOT explain causes, implications, or motivations.\n"
+                "- Do NOT use speculative phrasing (e.g., 'indicates', 'suggests', 'due to', 'demand', 'supply', 'doing well').\n"
+                "- Only state direction (up/down/stable) and magnitudes (MoM/YoY percentages).\n"
+            )
+        },
+        { "role": "user", "content": prompt },
+        { "role": "assistant", "content": tool_output(material, trend_output, summary) }
+    ]
 
 
 from pydantic import BaseModel
@@ -623,15 +846,19 @@ class ResolveIntentRequest(BaseModel):
 
 @app.post("/resolve-intent")
 def handle_resolve_intent(payload: ResolveIntentRequest):
-    print(f"🔍 Resolving intent for: {payload.user_input}")
-    result = gpt_resolve_intent(payload.user_input, material_list)
+    log.debug(f"🔍 Resolving intent for: {payload.user_input}")
+    snapshot = get_snapshot()
+    result = gpt_resolve_intent(payload.user_input, snapshot.material_list)
 
     material = result.get("material")
+    resolved = snapshot.resolve_material(material) if material else None
+    if resolved is not None:
+        material = resolved.material
     metric = result.get("metric")
-    print(f"🧠 Resolved → Material: {material}, Metric: {metric}")
+    log.debug(f"🧠 Resolved → Material: {material}, Metric: {metric}")
 
     if not material or not metric:
-        print(f"❌ Intent resolution failed for input: {payload.user_input}")
+        log.info(f"❌ Intent resolution failed for input: {payload.user_input}")
         raise HTTPException(status_code=400, detail="Intent could not be resolved.")
 
     metric_to_endpoint = {
@@ -646,10 +873,10 @@ def handle_resolve_intent(payload: ResolveIntentRequest):
 
     endpoint = metric_to_endpoint.get(metric)
     if not endpoint:
-        print(f"❌ Unknown metric: {metric}")
+        log.info(f"❌ Unknown metric: {metric}")
         raise HTTPException(status_code=400, detail=f"Unknown metric '{metric}'")
 
-    print(f"🚀 GPT mapped '{payload.user_input}' → {endpoint}")
+    log.debug(f"🚀 GPT mapped '{payload.user_input}' → {endpoint}")
     return {"material": material, "metric": metric, "endpoint": endpoint}
 
 
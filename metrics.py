@@ -0,0 +1,260 @@
+# metrics.py
+
+import threading
+import time
+from bisect import bisect_left
+
+from starlette.routing import Match
+
+from ttl_cache import TTLCache
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+OPENAI_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+# OpenAI call types (the `call` label)
+CALL_INTENT = "intent"
+CALL_RESOLVE_INTENT = "resolve_intent"
+CALL_EXEC_SUMMARY = "exec_summary"
+CALL_CLUSTER_SUMMARY = "cluster_summary"
+CALL_FINAL_ANSWER = "final_answer"
+
+_registry = []
+_collectors = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(v) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    render = Counter.render
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram; per label set it keeps bucket counts, sum and count.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value: float):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            items = [(k, (list(s[0]), s[1], s[2])) for k, s in self._values.items()]
+        lines = self._header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = _labels(self.labelnames, labels, [f'le="{_number(bound)}"'])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+def register_collector(collect):
+    """
+    `collect()` runs on every scrape, for values read from elsewhere (dataset, caches).
+    """
+    _collectors.append(collect)
+
+
+def render_metrics() -> str:
+    for collect in _collectors:
+        collect()
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# === HTTP ===
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Request latency by route template",
+    ("method", "route", "status"), HTTP_BUCKETS,
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Requests currently being served", ("route",),
+)
+
+# === OpenAI ===
+openai_request_duration = Histogram(
+    "openai_request_duration_seconds", "OpenAI call latency by call type and outcome",
+    ("call", "outcome"), OPENAI_BUCKETS,
+)
+openai_tokens = Counter(
+    "openai_tokens_total", "Tokens used by OpenAI calls", ("call", "kind"),
+)
+gpt_coalesced = Counter(
+    "gpt_coalesced_total", "/gpt answers by whether they started the upstream work or joined one in flight",
+    ("role",),
+)
+openai_prompt_tokens = Histogram(
+    "openai_prompt_tokens", "Prompt tokens per OpenAI call by call type", ("call",), TOKEN_BUCKETS,
+)
+
+# === Intent resolution ===
+intent_resolutions = Counter(
+    "intent_resolutions_total", "/gpt intents by how they were resolved (shortcut, local, cache, gpt)", ("source",),
+)
+
+# === Dataset / caches (filled by collectors) ===
+dataset_info = Gauge(
+    "dataset_info", "Active dataset version (value is always 1)", ("version", "ready"),
+)
+dataset_loaded_timestamp = Gauge(
+    "dataset_loaded_timestamp_seconds", "When the active dataset version was loaded",
+)
+dataset_materials = Gauge(
+    "dataset_materials", "Materials in the active dataset version",
+)
+cache_entries = Gauge("cache_entries", "Entries held per cache", ("cache",))
+cache_hits = Gauge("cache_hits", "Lookups served from cache since start", ("cache",))
+cache_misses = Gauge("cache_misses", "Lookups that missed the cache since start", ("cache",))
+
+
+def observe_openai_call(call: str, outcome: str, seconds: float, usage=None):
+    """
+    Records one OpenAI call; `usage` is the response's usage object, if any.
+    """
+    openai_request_duration.observe(call, outcome, value=seconds)
+    if usage is not None:
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        openai_tokens.inc(call, "prompt", amount=prompt_tokens)
+        openai_prompt_tokens.observe(call, value=prompt_tokens)
+        openai_tokens.inc(call, "completion", amount=getattr(usage, "completion_tokens", 0) or 0)
+
+
+def call_outcome(error: BaseException) -> str:
+    name = type(error).__name__
+    if name in ("TimeoutError", "APITimeoutError"):
+        return "timeout"
+    if name == "CancelledError":
+        return "cancelled"
+    return "error"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: request latency histogram and in-flight gauge labelled by
+    route template (/trendline/{material}, not the raw path), plus a hook for
+    the per-request access log. The template is resolved by matching the
+    app's routes and memoized per (method, path).
+    """
+
+    def __init__(self, app, routes, on_complete=None):
+        self.app = app
+        self.routes = routes            # callable → current route list
+        self.on_complete = on_complete  # (scope, route, status, seconds) → None
+        self._templates = TTLCache(maxsize=4096)
+
+    def _template(self, scope) -> str:
+        key = (scope["method"], scope["path"])
+        template = self._templates.get(key)
+        if template is None:
+            template = "unmatched"
+            for route in self.routes():
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    template = getattr(route, "path", template)
+                    break
+            self._templates.set(key, template)
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._template(scope)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(route)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec(route)
+            http_request_duration.observe(scope["method"], route, str(status), value=elapsed)
+            if self.on_complete is not None:
+                self.on_complete(scope, route, status, elapsed)
@@ -0,0 +1,155 @@
+# panel_artifact.py
+
+import hashlib
+import io
+import json
+import zipfile
+
+import numpy as np
+
+from correlation_engine import CorrelationTensor
+from series_store import MaterialSeries, SeriesTable, SpikeTable, month_ordinal
+
+# === FORMAT ===
+# One deflated .npz of series × month float64 panels plus a small JSON
+# manifest, written by prepare_data.py next to the JSON files. Loading it is
+# a handful of array reads, with no per-record parsing.
+PANEL_FILE = "material_panel.npz"
+MANIFEST_FILE = "material_panel.json"
+FORMAT = 1
+
+# Panel array → (dataset, field) it serves; values are rounded as in the JSON files
+SERIES_FIELDS = {
+    "mom": ("trendlines", "MoM"),
+    "yoy": ("trendlines", "YoY"),
+    "mom_3mo_avg": ("rolling", "MoM_3mo_avg"),
+    "yoy_3mo_avg": ("rolling", "YoY_3mo_avg"),
+    "mom_12mo_avg": ("rolling_12mo", "MoM_12mo_avg"),
+    "yoy_12mo_avg": ("rolling_12mo", "YoY_12mo_avg"),
+    "mom_3yr_avg": ("rolling_3yr", "MoM_3yr_avg"),
+    "yoy_3yr_avg": ("rolling_3yr", "YoY_3yr_avg"),
+}
+# Datasets the panel replaces; the remaining JSON files are still read as JSON
+PANEL_DATASETS = ("trends", "trendlines", "spikes", "rolling", "rolling_12mo", "rolling_3yr", "correlations")
+SPIKE_TYPES = ["MoM", "YoY"]
+
+
+def encode_panel(months: list, series: list, series_ids: dict, arrays: dict, meta: dict = None):
+    """
+    (PANEL_FILE bytes, MANIFEST_FILE dict). `arrays` holds "value" plus every
+    SERIES_FIELDS key as (series, months) float arrays, "spike_mom" and
+    "spike_yoy" as (series, months) bool masks, and "correlations" as a
+    (series, series, lags) float array. Same data, same bytes.
+    """
+    arrays = {"months": np.array([month_ordinal(m) for m in months], dtype=np.int32), **arrays}
+    # np.savez_compressed stamps entries with the current time; a fixed stamp
+    # keeps the bytes (and so the dataset version) unchanged when the data is
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, values in arrays.items():
+            info = zipfile.ZipInfo(f"{name}.npy", date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with zf.open(info, "w", force_zip64=True) as f:
+                np.lib.format.write_array(f, np.ascontiguousarray(values), allow_pickle=False)
+    content = buffer.getvalue()
+    manifest = {
+        "format": FORMAT,
+        "npz_sha256": hashlib.sha256(content).hexdigest(),
+        "months": {"first": months[0] if months else None, "last": months[-1] if months else None,
+                   "count": len(months)},
+        "series": [{"name": name, "series_id": series_ids.get(name)} for name in series],
+        "arrays": {name: {"dtype": np.asarray(v).dtype.str, "shape": list(np.shape(v))} for name, v in arrays.items()},
+        **(meta or {}),
+    }
+    return content, manifest
+
+
+def _span(present: np.ndarray):
+    idx = np.flatnonzero(present)
+    return (int(idx[0]), int(idx[-1]) + 1) if len(idx) else None
+
+
+def check_panel(content: bytes, manifest_content: bytes) -> dict:
+    """
+    Parsed manifest if it is of this FORMAT and describes exactly this .npz
+    (both files are fetched separately and could come from different
+    pushes); raises ValueError otherwise.
+    """
+    if content is None or manifest_content is None:
+        raise ValueError("panel artifact missing")
+    manifest = json.loads(manifest_content)
+    if manifest.get("format") != FORMAT:
+        raise ValueError(f"unsupported panel format {manifest.get('format')}")
+    if manifest.get("npz_sha256") != hashlib.sha256(content).hexdigest():
+        raise ValueError("panel manifest does not match the .npz")
+    return manifest
+
+
+def read_panel(content: bytes, manifest_content: bytes) -> dict:
+    """
+    Panel artifact → {dataset name: table} for PANEL_DATASETS, built as the
+    same SeriesTable / SpikeTable / CorrelationTensor objects the JSON files
+    produce, plus "values": the raw value per material and month. Raises ValueError if check_panel rejects the pair or the .npz
+    cannot be read.
+    """
+    manifest = check_panel(content, manifest_content)
+    try:
+        with np.load(io.BytesIO(content), allow_pickle=False) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+    except (OSError, zipfile.BadZipFile) as e:
+        raise ValueError(f"unreadable panel: {e}") from e
+    missing = {"months", "value", "spike_mom", "spike_yoy", "correlations", *SERIES_FIELDS} - set(arrays)
+    if missing:
+        raise ValueError(f"panel lacks {', '.join(sorted(missing))}")
+
+    names = [entry["name"] for entry in manifest["series"]]
+    months = arrays["months"]
+    if not len(months):
+        raise ValueError("empty panel")
+    first = int(months[0])
+    full = np.ones(len(months), dtype=bool)
+
+    datasets = {"trendlines": {}, "rolling": {}, "rolling_12mo": {}, "rolling_3yr": {}}
+    for dataset in datasets:
+        fields = [(key, field) for key, (name, field) in SERIES_FIELDS.items() if name == dataset]
+        for s, material in enumerate(names):
+            columns = {field: arrays[key][s] for key, field in fields}
+            if dataset == "trendlines":
+                # material_trendlines.json has a row for every month
+                datasets[dataset][material] = MaterialSeries(first, full, columns)
+                continue
+            present = np.zeros(len(months), dtype=bool)
+            for values in columns.values():
+                present |= ~np.isnan(values)
+            span = _span(present)
+            if span is None:
+                continue
+            lo, hi = span
+            datasets[dataset][material] = MaterialSeries(
+                first + lo, present[lo:hi], {field: values[lo:hi] for field, values in columns.items()}
+            )
+    datasets = {name: SeriesTable.from_series(series) for name, series in datasets.items()}
+    # Unrounded inputs for windows derived on demand (rolling_windows.py)
+    datasets["values"] = SeriesTable.from_series({
+        material: MaterialSeries(first, full, {"value": arrays["value"][s]}) for s, material in enumerate(names)
+    })
+
+    # MoM before YoY within a month, as in material_spikes.json
+    spikes = {}
+    for s, material in enumerate(names):
+        hits = np.stack([arrays["spike_mom"][s], arrays["spike_yoy"][s]], axis=1)
+        month_idx, kinds = np.nonzero(hits)
+        changes = np.where(kinds == 0, arrays["mom"][s][month_idx], arrays["yoy"][s][month_idx])
+        spikes[material] = (months[month_idx].astype(np.int32), kinds.astype(np.uint8), changes.astype(np.float64))
+    datasets["spikes"] = SpikeTable.from_arrays(SPIKE_TYPES, spikes)
+
+    # CorrelationTensor orders materials by name
+    order = sorted(range(len(names)), key=names.__getitem__)
+    values = arrays["correlations"][np.ix_(order, order)]
+    present = ~np.eye(len(names), dtype=bool)
+    datasets["correlations"] = CorrelationTensor.from_arrays(
+        [names[i] for i in order], manifest["correlation_lags"], np.ascontiguousarray(values), present
+    )
+    # material_trends.json is only ever checked for presence
+    datasets["trends"] = {}
+    return datasets
@@ -1,153 +1,566 @@
 import pandas as pd
+import numpy as np
+import argparse
+import hashlib
 import json
 import os
+import re
+
+from artifact_writer import COMPRESSIONS, ArtifactWriter, encode_json
+from panel_artifact import MANIFEST_FILE, PANEL_FILE, encode_panel
 
 # === PATHS ===
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
 INPUT_CSV = "/Users/benatwood/PycharmProjects/WhatsItCost/AIBrain/theBehemoth.csv"
 OUTPUT_DIR = "/Users/benatwood/PycharmProjects/WhatsItCost/AIBrain/JSONS"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# Outside the original workstation, read and write next to this script
+if not os.path.exists(INPUT_CSV):
+    INPUT_CSV = os.path.join(REPO_DIR, "AIBrain", "theBehemoth.csv")
+    OUTPUT_DIR = os.path.join(REPO_DIR, "AIBrain", "JSONS")
+
+# |MoM| or |YoY| at or above this (in %) is a spike
+SPIKE_THRESHOLD = 5
+CORRELATION_LAGS = range(0, 4)
+# (file, window, field suffix) for the rolling averages
+ROLLING_WINDOWS = [
+    ("material_rolling.json", 3, "3mo"),
+    ("material_rolling_12mo.json", 12, "12mo"),
+    ("material_rolling_3yr.json", 36, "3yr"),
+]
+
 
 # === LOAD AND PREP DATA ===
-df = pd.read_csv(INPUT_CSV)
-df["month"] = df["month"].astype(str).str.replace("M", "").str.zfill(2)
-df["Date"] = pd.to_datetime(df["year"].astype(str) + "-" + df["month"], format="%Y-%m")
-df_pivot = df.pivot(index="Date", columns="series_name", values="value").sort_index()
-df_mom = df_pivot.pct_change(fill_method=None) * 100
-df_yoy = df_pivot.pct_change(periods=12, fill_method=None) * 100
-
-# === material_trends.json ===
-material_trends = {}
-for date in df_pivot.index:
-    date_str = date.strftime("%Y-%m")
-    material_trends[date_str] = {}
-    for series in df_pivot.columns:
-        mom = df_mom.at[date, series]
-        yoy = df_yoy.at[date, series]
-        if pd.notna(mom) or pd.notna(yoy):
-            material_trends[date_str][series] = {
-                "MoM": round(mom, 2) if pd.notna(mom) else None,
-                "YoY": round(yoy, 2) if pd.notna(yoy) else None
-            }
-with open(os.path.join(OUTPUT_DIR, "material_trends.json"), "w") as f:
-    json.dump(material_trends, f, indent=2)
-print("✅ material_trends.json")
-
-# === material_trendlines.json ===
-trendlines = {}
-for series in df_pivot.columns:
-    trendlines[series] = []
-    series_mom = df_mom[series]
-    series_yoy = df_yoy[series]
-    for date in df_pivot.index:
-        date_str = date.strftime("%Y-%m")
-        mom = series_mom.at[date] if date in series_mom.index else None
-        yoy = series_yoy.at[date] if date in series_yoy.index else None
-        trendlines[series].append({
-            "Date": date_str,
-            "MoM": round(mom, 2) if pd.notna(mom) else None,
-            "YoY": round(yoy, 2) if pd.notna(yoy) else None
-        })
-with open(os.path.join(OUTPUT_DIR, "material_trendlines.json"), "w") as f:
-    json.dump(trendlines, f, indent=2)
-print("✅ material_trendlines.json")
-
-# === material_spikes.json ===
-spikes = {}
-threshold = 5
-for series in df_pivot.columns:
-    spikes[series] = []
-    for date in df_pivot.index:
-        date_str = date.strftime("%Y-%m")
-        mom = df_mom.at[date, series]
-        yoy = df_yoy.at[date, series]
-        if pd.notna(mom) and abs(mom) >= threshold:
-            spikes[series].append({ "Date": date_str, "Type": "MoM", "Change": round(mom, 2) })
-        if pd.notna(yoy) and abs(yoy) >= threshold:
-            spikes[series].append({ "Date": date_str, "Type": "YoY", "Change": round(yoy, 2) })
-with open(os.path.join(OUTPUT_DIR, "material_spikes.json"), "w") as f:
-    json.dump(spikes, f, indent=2)
-print("✅ material_spikes.json")
-
-# === material_rolling.json ===
-rolling = {}
-df_mom_rolling = df_mom.rolling(3).mean()
-df_yoy_rolling = df_yoy.rolling(3).mean()
-for series in df_pivot.columns:
-    rolling[series] = []
-    series_mom = df_mom_rolling[series].dropna()
-    series_yoy = df_yoy_rolling[series].dropna()
-    valid_dates = series_mom.index.union(series_yoy.index).sort_values()
-    for date in valid_dates:
-        mom = series_mom[date] if date in series_mom else None
-        yoy = series_yoy[date] if date in series_yoy else None
-        if pd.notna(mom) or pd.notna(yoy):
-            rolling[series].append({
-                "Date": date.strftime("%Y-%m"),
-                "MoM_3mo_avg": round(mom, 2) if pd.notna(mom) else None,
-                "YoY_3mo_avg": round(yoy, 2) if pd.notna(yoy) else None
-            })
-with open(os.path.join(OUTPUT_DIR, "material_rolling.json"), "w") as f:
-    json.dump(rolling, f, indent=2)
-print("✅ material_rolling.json")
-
-# === material_correlations.json ===
-correlations = {}
-for base in df_pivot.columns:
-    correlations[base] = {}
-    for target in df_pivot.columns:
-        if base == target:
+def load_panel(input_csv: str = INPUT_CSV):
+    """
+    theBehemoth.csv → (value, MoM %, YoY %) frames: one row per month, one
+    column per series. The value frame's attrs["series_id"] maps each series
+    name to its BLS series id.
+    """
+    df = pd.read_csv(input_csv)
+    df["month"] = df["month"].astype(str).str.replace("M", "").str.zfill(2)
+    df["Date"] = pd.to_datetime(df["year"].astype(str) + "-" + df["month"], format="%Y-%m")
+    df_pivot = df.pivot(index="Date", columns="series_name", values="value").sort_index()
+    df_pivot.attrs["series_id"] = df.drop_duplicates("series_name").set_index("series_name")["series_id"].to_dict()
+    df_mom = df_pivot.pct_change(fill_method=None) * 100
+    df_yoy = df_pivot.pct_change(periods=12, fill_method=None) * 100
+    return df_pivot, df_mom, df_yoy
+
+
+def _cells(frame: pd.DataFrame):
+    """
+    (raw values, present mask, rounded values) for a whole frame at once.
+    Rounded cells are Python floats rounded exactly like round(np.float64, 2),
+    with None where the value is missing.
+    """
+    values = frame.to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    rounded = np.round(values, 2).astype(object)
+    rounded[~present] = None
+    return values, present, rounded
+
+
+# === Artifact builders (whole-frame, no per-cell pandas lookups) ===
+# `start` limits output to the tail an incremental run recomputes: one month
+# index per series.
+def _starts(start, frame: pd.DataFrame) -> np.ndarray:
+    if start is None:
+        return np.zeros(frame.shape[1], dtype=int)
+    return np.asarray(start, dtype=int)
+
+
+def build_trends(df_mom: pd.DataFrame, df_yoy: pd.DataFrame) -> dict:
+    """
+    material_trends.json: date → series → {MoM, YoY} for series with either value.
+    """
+    dates = df_mom.index.strftime("%Y-%m").tolist()
+    series = df_mom.columns.tolist()
+    _, mom_present, mom = _cells(df_mom)
+    _, yoy_present, yoy = _cells(df_yoy)
+    mom, yoy = mom.tolist(), yoy.tolist()
+    present = mom_present | yoy_present
+
+    material_trends = {}
+    for i in range(len(dates)):
+        row_mom, row_yoy = mom[i], yoy[i]
+        material_trends[dates[i]] = {
+            series[j]: {"MoM": row_mom[j], "YoY": row_yoy[j]}
+            for j in np.flatnonzero(present[i]).tolist()
+        }
+    return material_trends
+
+
+def build_trendlines(df_mom: pd.DataFrame, df_yoy: pd.DataFrame, start=None) -> dict:
+    """
+    material_trendlines.json: series → one {Date, MoM, YoY} row per month.
+    """
+    dates = df_mom.index.strftime("%Y-%m").tolist()
+    mom = _cells(df_mom)[2].T.tolist()
+    yoy = _cells(df_yoy)[2].T.tolist()
+    start = _starts(start, df_mom).tolist()
+    return {
+        name: [{"Date": d, "MoM": m, "YoY": y}
+               for d, m, y in zip(dates[start[j]:], mom[j][start[j]:], yoy[j][start[j]:])]
+        for j, name in enumerate(df_mom.columns.tolist())
+    }
+
+
+def build_spikes(df_mom: pd.DataFrame, df_yoy: pd.DataFrame, threshold: float = SPIKE_THRESHOLD,
+                 start=None) -> dict:
+    """
+    material_spikes.json: series → months where |MoM| or |YoY| ≥ threshold,
+    MoM before YoY within a month.
+    """
+    dates = df_mom.index.strftime("%Y-%m").tolist()
+    mom_values, mom_present, mom = _cells(df_mom)
+    yoy_values, yoy_present, yoy = _cells(df_yoy)
+    since = np.arange(len(dates))[:, None] >= _starts(start, df_mom)[None, :]
+    with np.errstate(invalid="ignore"):
+        mom_hit = since & mom_present & (np.abs(mom_values) >= threshold)
+        yoy_hit = since & yoy_present & (np.abs(yoy_values) >= threshold)
+
+    spikes = {}
+    for j, name in enumerate(df_mom.columns.tolist()):
+        entries = []
+        for i in np.flatnonzero(mom_hit[:, j] | yoy_hit[:, j]).tolist():
+            if mom_hit[i, j]:
+                entries.append({"Date": dates[i], "Type": "MoM", "Change": mom[i, j]})
+            if yoy_hit[i, j]:
+                entries.append({"Date": dates[i], "Type": "YoY", "Change": yoy[i, j]})
+        spikes[name] = entries
+    return spikes
+
+
+def build_rolling(df_mom: pd.DataFrame, df_yoy: pd.DataFrame, window: int, suffix: str, start=None) -> dict:
+    """
+    Rolling-average file: series → rows for months where either average exists.
+    """
+    dates = np.array(df_mom.index.strftime("%Y-%m").tolist(), dtype=object)
+    _, mom_present, mom = _cells(df_mom.rolling(window).mean())
+    _, yoy_present, yoy = _cells(df_yoy.rolling(window).mean())
+    since = np.arange(len(dates))[:, None] >= _starts(start, df_mom)[None, :]
+    present = since & (mom_present | yoy_present)
+    mom_key, yoy_key = f"MoM_{suffix}_avg", f"YoY_{suffix}_avg"
+
+    rolling = {}
+    for j, name in enumerate(df_mom.columns.tolist()):
+        rows = present[:, j]
+        rolling[name] = [
+            {"Date": d, mom_key: m, yoy_key: y}
+            for d, m, y in zip(dates[rows].tolist(), mom[rows, j].tolist(), yoy[rows, j].tolist())
+        ]
+    return rolling
+
+
+def lagged_correlations(values: np.ndarray, lags) -> np.ndarray:
+    """
+    All-pairs Pearson correlation for each lag, as matrix products over a
+    months × series panel. out[k, i, j] = corr(series i, series j shifted
+    lags[k] months), using only months where both are present, like
+    Series.corr(other.shift(lag)). Undefined pairs (fewer than two shared
+    months, no variance, or an infinite value) are NaN.
+    """
+    months, n = values.shape
+    present = ~np.isnan(values)
+    finite = np.isfinite(values)
+    # Centering each series first keeps the one-pass sums well conditioned
+    with np.errstate(invalid="ignore"):
+        means = np.nanmean(np.where(finite, values, np.nan), axis=0) if finite.any() else np.zeros(n)
+    centered = np.where(finite, values - np.nan_to_num(means), 0.0)
+    weight = finite.astype(float)
+    squares = centered * centered
+    infinite = (present & ~finite).astype(float)
+    present = present.astype(float)
+
+    out = np.full((len(lags), n, n), np.nan)
+    for k, lag in enumerate(lags):
+        # Base rows t, target rows t - lag
+        a = slice(lag, months)
+        b = slice(0, months - lag)
+        count = weight[a].T @ weight[b]
+        sum_x = centered[a].T @ weight[b]
+        sum_y = weight[a].T @ centered[b]
+        sum_xy = centered[a].T @ centered[b]
+        sum_xx = squares[a].T @ weight[b]
+        sum_yy = weight[a].T @ squares[b]
+        has_inf = (infinite[a].T @ present[b] + present[a].T @ infinite[b]) > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = sum_xy - sum_x * sum_y / count
+            var_x = sum_xx - sum_x * sum_x / count
+            var_y = sum_yy - sum_y * sum_y / count
+            r = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+        r[(count < 2) | (var_x <= 0) | (var_y <= 0) | has_inf] = np.nan
+        out[k] = r
+    return out
+
+
+def build_correlations(df_mom: pd.DataFrame) -> dict:
+    """
+    material_correlations.json: base → target → lag_N Pearson correlation of
+    MoM, with the target shifted N months.
+    """
+    lags = list(CORRELATION_LAGS)
+    series = df_mom.columns.tolist()
+    corr = lagged_correlations(df_mom.to_numpy(dtype=float), lags)
+    rounded = np.round(corr, 3).astype(object)
+    rounded[np.isnan(corr)] = None
+    # series × series × lags, as nested Python lists
+    cells = rounded.transpose(1, 2, 0).tolist()
+    keys = [f"lag_{lag}" for lag in lags]
+
+    correlations = {}
+    for i, base in enumerate(series):
+        row = cells[i]
+        correlations[base] = {
+            target: dict(zip(keys, row[j]))
+            for j, target in enumerate(series) if j != i
+        }
+    return correlations
+
+
+def build_panel(df_pivot: pd.DataFrame, df_mom: pd.DataFrame, df_yoy: pd.DataFrame) -> dict:
+    """
+    Arrays for the columnar panel artifact, series-major so each series is
+    one contiguous row: the same numbers as the JSON files (rounded the same
+    way), NaN where those have null or no row.
+    """
+    def rows(frame: pd.DataFrame, decimals: int = None) -> np.ndarray:
+        values = frame.to_numpy(dtype=float).T
+        return values if decimals is None else np.round(values, decimals)
+
+    arrays = {"value": rows(df_pivot), "mom": rows(df_mom, 2), "yoy": rows(df_yoy, 2)}
+    for _, window, suffix in ROLLING_WINDOWS:
+        arrays[f"mom_{suffix}_avg"] = rows(df_mom.rolling(window).mean(), 2)
+        arrays[f"yoy_{suffix}_avg"] = rows(df_yoy.rolling(window).mean(), 2)
+    # Thresholded before rounding, like build_spikes
+    with np.errstate(invalid="ignore"):
+        arrays["spike_mom"] = np.abs(rows(df_mom)) >= SPIKE_THRESHOLD
+        arrays["spike_yoy"] = np.abs(rows(df_yoy)) >= SPIKE_THRESHOLD
+    # base × target × lag; a series is not paired with itself
+    corr = np.round(lagged_correlations(df_mom.to_numpy(dtype=float), list(CORRELATION_LAGS)), 3)
+    corr = corr.transpose(1, 2, 0).copy()
+    corr[np.arange(corr.shape[0]), np.arange(corr.shape[0])] = np.nan
+    arrays["correlations"] = corr
+    return arrays
+
+
+def write_panel_artifact(writer: ArtifactWriter, df_pivot: pd.DataFrame, df_mom: pd.DataFrame, df_yoy: pd.DataFrame):
+    content, manifest = encode_panel(
+        df_pivot.index.strftime("%Y-%m").tolist(),
+        df_pivot.columns.tolist(),
+        df_pivot.attrs.get("series_id", {}),
+        build_panel(df_pivot, df_mom, df_yoy),
+        meta={
+            "spike_threshold": SPIKE_THRESHOLD,
+            "rolling_windows": {suffix: window for _, window, suffix in ROLLING_WINDOWS},
+            "correlation_lags": list(CORRELATION_LAGS),
+        },
+    )
+    writer.write(PANEL_FILE, content)
+    writer.write(MANIFEST_FILE, manifest)
+
+
+# === INCREMENTAL STATE ===
+# The previous run's panel, kept next to the CSV (not an artifact; never pushed)
+STATE_FILE = ".prepare_state.npz"
+STATE_FORMAT = 3
+# Artifacts patched in place by an incremental run, in write order
+SERIES_ARTIFACTS = ["material_trends.json", "material_trendlines.json", "material_spikes.json"] + [
+    name for name, _, _ in ROLLING_WINDOWS
+]
+
+
+def output_layout(writer: ArtifactWriter) -> str:
+    """
+    How artifacts are written; a change forces a full rebuild so no file is
+    left in the old layout.
+    """
+    return json.dumps({"compact": writer.compact, "siblings": sorted(writer.siblings)})
+
+
+def artifact_digests(output_dir: str) -> dict:
+    """
+    sha256 of each SERIES_ARTIFACTS file, or None where it is missing.
+    """
+    digests = {}
+    for name in SERIES_ARTIFACTS:
+        try:
+            with open(os.path.join(output_dir, name), "rb") as f:
+                digests[name] = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            digests[name] = None
+    return digests
+
+
+def save_state(df_pivot: pd.DataFrame, path: str, layout: str, digests: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            format=STATE_FORMAT,
+            layout=layout,
+            digests=json.dumps(digests),
+            series=np.array(df_pivot.columns.tolist(), dtype=str),
+            dates=np.array(df_pivot.index.strftime("%Y-%m").tolist(), dtype=str),
+            values=df_pivot.to_numpy(dtype=float),
+        )
+    os.replace(tmp, path)
+
+
+def load_state(path: str):
+    try:
+        with np.load(path, allow_pickle=False) as state:
+            if int(state["format"]) != STATE_FORMAT:
+                return None
+            return (state["series"].tolist(), state["dates"].tolist(), state["values"], str(state["layout"]),
+                    json.loads(str(state["digests"])))
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def changed_from(df_pivot: pd.DataFrame, state):
+    """
+    Per series, the first month whose value differs from the previous run
+    (the old month count when only new months were added). None when the
+    panel cannot be patched: series added, removed or reordered, or the old
+    months are no longer a prefix of the new ones.
+    """
+    series, dates, values = state[:3]
+    new_dates = df_pivot.index.strftime("%Y-%m").tolist()
+    if series != df_pivot.columns.tolist() or new_dates[:len(dates)] != dates:
+        return None
+    old_months = len(dates)
+    new = df_pivot.to_numpy(dtype=float)[:old_months]
+    differs = ~((new == values) | (np.isnan(new) & np.isnan(values)))
+    return np.where(differs.any(axis=0), differs.argmax(axis=0), old_months)
+
+
+# === Patching serialized artifacts ===
+# An incremental run never parses or re-encodes what it keeps: the previous
+# file's text is cut at each series' first changed row and only the tail is
+# encoded. The pieces below are how encode_json lays out {key: [rows]}; the
+# state's digests guarantee the files are still the ones this script wrote.
+JSON_LAYOUT = {
+    # file open/close, separator between top-level entries, row list open/separator/close
+    False: {"open": "{\n", "close": "\n}", "sep": ",\n", "rows": ("\n    ", ",\n    ", "\n  ]")},
+    True: {"open": "{", "close": "}", "sep": ",", "rows": ("", ",", "]")},
+}
+ROW_DATE = re.compile(r'"Date": ?"(\d{4}-\d{2})"')
+
+
+def _entry(key: str, value, compact: bool) -> str:
+    """
+    One top-level `"key": value` entry exactly as it appears in the file.
+    """
+    layout = JSON_LAYOUT[compact]
+    return encode_json({key: value}, compact).decode()[len(layout["open"]):-len(layout["close"])]
+
+
+def _entries(text: str, keys: list, compact: bool) -> list:
+    """
+    Start offset of each top-level key's entry in `text`, in file order,
+    plus the offset where the last entry ends.
+    """
+    layout = JSON_LAYOUT[compact]
+    offsets, pos = [], len(layout["open"])
+    for key in keys:
+        marker = _entry(key, [], compact)[:-2]  # '  "key": ' / '"key":'
+        pos = text.index(("\n" if not compact else "") + marker, pos - 1) + (0 if compact else 1)
+        offsets.append(pos)
+        pos += len(marker)
+    offsets.append(len(text) - len(layout["close"]))
+    return offsets
+
+
+def _splice_rows(old: str, key: str, cutoff: str, tail: list, compact: bool) -> str:
+    """
+    One per-series entry: the old entry's rows dated before `cutoff`, as
+    written, followed by the encoded `tail` rows.
+    """
+    row_open, row_sep, row_close = JSON_LAYOUT[compact]["rows"]
+    head = _entry(key, [], compact)[:-2] + "["
+    kept_end = len(old) - len(row_close)
+    if old.endswith("[]"):
+        kept_end = None
+    else:
+        # Rows are in date order; walk back from the end over the replaced ones
+        pos = old.rfind('"Date"')
+        while pos > 0:
+            match = ROW_DATE.match(old, pos)
+            if match.group(1) < cutoff:
+                break
+            kept_end = old.rfind("{", 0, pos) - len(row_sep)
+            pos = old.rfind('"Date"', 0, pos)
+        if kept_end < len(head) + len(row_open):
+            kept_end = None
+    kept = old[len(head) + len(row_open):kept_end] if kept_end is not None else None
+    added = _entry(key, tail, compact)[len(head) + len(row_open):-len(row_close)] if tail else None
+    rows = [part for part in (kept, added) if part is not None]
+    if not rows:
+        return head + "]"
+    return head + row_open + row_sep.join(rows) + row_close
+
+
+def patch_series_artifact(text: str, tail: dict, dates: list, start, compact: bool) -> str:
+    """
+    Per-series artifact text with each series' rows from `start` onward
+    replaced by `tail` (series → recomputed rows, in file order).
+    """
+    layout = JSON_LAYOUT[compact]
+    keys = list(tail)
+    offsets = _entries(text, keys, compact)
+    entries = []
+    for j, key in enumerate(keys):
+        old = text[offsets[j]:offsets[j + 1] - (len(layout["sep"]) if j + 1 < len(keys) else 0)]
+        if start[j] >= len(dates):
+            entries.append(old)
+        else:
+            entries.append(_splice_rows(old, key, dates[start[j]], tail[key], compact))
+    return layout["open"] + layout["sep"].join(entries) + layout["close"] if entries else "{}"
+
+
+def patch_trends_artifact(text: str, tail: dict, compact: bool) -> str:
+    """
+    material_trends.json text with every date from the first key of `tail`
+    onward replaced by `tail`.
+    """
+    layout = JSON_LAYOUT[compact]
+    if not tail:
+        return text
+    first = next(iter(tail))
+    marker = _entry(first, {}, compact)[:-2]
+    cut = text.find(("\n" if not compact else "") + marker)
+    if cut < 0:
+        kept = text[len(layout["open"]):len(text) - len(layout["close"])]
+    else:
+        kept = text[len(layout["open"]):cut + (0 if compact else 1) - len(layout["sep"])]
+    entries = [kept] if kept else []
+    entries += [_entry(date, row, compact) for date, row in tail.items()]
+    return layout["open"] + layout["sep"].join(entries) + layout["close"]
+
+
+def build_tail(name: str, df_mom: pd.DataFrame, df_yoy: pd.DataFrame, start) -> dict:
+    """
+    Rows of one patched artifact from each series' first changed month
+    onward. MoM/YoY cells depend only on their own month, so those builders
+    get the frames sliced from the earliest change; pandas' rolling sums
+    depend on where the window starts, so rolling averages keep the whole
+    frame to stay identical to a full rebuild.
+    """
+    first = int(start.min())
+    if name == "material_trends.json":
+        return build_trends(df_mom.iloc[first:], df_yoy.iloc[first:])
+    if name == "material_trendlines.json":
+        return build_trendlines(df_mom.iloc[first:], df_yoy.iloc[first:], start=start - first)
+    if name == "material_spikes.json":
+        return build_spikes(df_mom.iloc[first:], df_yoy.iloc[first:], start=start - first)
+    for file_name, window, suffix in ROLLING_WINDOWS:
+        if name == file_name:
+            return build_rolling(df_mom, df_yoy, window, suffix, start=start)
+    raise KeyError(name)
+
+
+def incremental_start(df_pivot: pd.DataFrame, output_dir: str, state_path: str, layout: str):
+    """
+    Per-series first changed month for an incremental run, or None (with
+    the reason printed) when only a full rebuild is safe.
+    """
+    state = load_state(state_path)
+    if state is None:
+        print("ℹ️ No previous state — full rebuild")
+        return None
+    if state[3] != layout:
+        print("ℹ️ Output layout changed since the last run — full rebuild")
+        return None
+    start = changed_from(df_pivot, state)
+    if start is None:
+        print("ℹ️ Series or months changed shape since the last run — full rebuild")
+        return None
+    missing = [n for n in ["material_correlations.json", PANEL_FILE, MANIFEST_FILE]
+               if not os.path.exists(os.path.join(output_dir, n))]
+    if missing:
+        print(f"ℹ️ Missing {', '.join(missing)} — full rebuild")
+        return None
+    if artifact_digests(output_dir) != state[4]:
+        print("ℹ️ Artifacts changed since the last run — full rebuild")
+        return None
+    return start
+
+
+def run_full(writer: ArtifactWriter, df_pivot: pd.DataFrame, df_mom: pd.DataFrame, df_yoy: pd.DataFrame):
+    write_panel_artifact(writer, df_pivot, df_mom, df_yoy)
+    writer.write("material_trends.json", build_trends(df_mom, df_yoy))
+    writer.write("material_trendlines.json", build_trendlines(df_mom, df_yoy))
+    writer.write("material_spikes.json", build_spikes(df_mom, df_yoy))
+    name, window, suffix = ROLLING_WINDOWS[0]
+    writer.write(name, build_rolling(df_mom, df_yoy, window, suffix))
+    writer.write("material_correlations.json", build_correlations(df_mom))
+    for name, window, suffix in ROLLING_WINDOWS[1:]:
+        writer.write(name, build_rolling(df_mom, df_yoy, window, suffix))
+
+
+def run_incremental(writer: ArtifactWriter, df_pivot: pd.DataFrame, df_mom: pd.DataFrame, df_yoy: pd.DataFrame, start):
+    """
+    Patches the existing artifacts: each series is recomputed from its first
+    changed month and only those rows are encoded; the rest of every file is
+    copied as written. A file is only rewritten if its content changed.
+    """
+    dates = df_mom.index.strftime("%Y-%m").tolist()
+    changed = int((start < len(dates)).sum())
+    print(f"🔁 Incremental: {changed} series touched, earliest from {dates[int(start.min())]}")
+    # The panel is rewritten whole; it is a few array dumps
+    write_panel_artifact(writer, df_pivot, df_mom, df_yoy)
+
+    for name in SERIES_ARTIFACTS:
+        with open(os.path.join(writer.output_dir, name), "rb") as f:
+            old = f.read().decode()
+        tail = build_tail(name, df_mom, df_yoy, start)
+        if name == "material_trends.json":
+            text = patch_trends_artifact(old, tail, writer.compact)
+        else:
+            text = patch_series_artifact(old, tail, dates, start, writer.compact)
+        if text == old:
+            print(f"➖ {name} unchanged")
             continue
-        lags = {}
-        for lag in range(0, 4):
-            shifted = df_mom[target].shift(lag)
-            corr = df_mom[base].corr(shifted)
-            lags[f"lag_{lag}"] = round(corr, 3) if pd.notna(corr) else None
-        correlations[base][target] = lags
-with open(os.path.join(OUTPUT_DIR, "material_correlations.json"), "w") as f:
-    json.dump(correlations, f, indent=2)
-print("✅ material_correlations.json")
-
-# === material_rolling_12mo.json ===
-rolling_12mo = {}
-df_mom_12mo = df_mom.rolling(12).mean()
-df_yoy_12mo = df_yoy.rolling(12).mean()
-for series in df_pivot.columns:
-    rolling_12mo[series] = []
-    series_mom = df_mom_12mo[series].dropna()
-    series_yoy = df_yoy_12mo[series].dropna()
-    valid_dates = series_mom.index.union(series_yoy.index).sort_values()
-    for date in valid_dates:
-        mom = series_mom[date] if date in series_mom else None
-        yoy = series_yoy[date] if date in series_yoy else None
-        if pd.notna(mom) or pd.notna(yoy):
-            rolling_12mo[series].append({
-                "Date": date.strftime("%Y-%m"),
-                "MoM_12mo_avg": round(mom, 2) if pd.notna(mom) else None,
-                "YoY_12mo_avg": round(yoy, 2) if pd.notna(yoy) else None
-            })
-with open(os.path.join(OUTPUT_DIR, "material_rolling_12mo.json"), "w") as f:
-    json.dump(rolling_12mo, f, indent=2)
-print("✅ material_rolling_12mo.json")
-
-
-# === material_rolling_3yr.json ===
-rolling_3yr = {}
-df_mom_3yr = df_mom.rolling(36).mean()
-df_yoy_3yr = df_yoy.rolling(36).mean()
-for series in df_pivot.columns:
-    rolling_3yr[series] = []
-    series_mom = df_mom_3yr[series].dropna()
-    series_yoy = df_yoy_3yr[series].dropna()
-    valid_dates = series_mom.index.union(series_yoy.index).sort_values()
-    for date in valid_dates:
-        mom = series_mom[date] if date in series_mom else None
-        yoy = series_yoy[date] if date in series_yoy else None
-        if pd.notna(mom) or pd.notna(yoy):
-            rolling_3yr[series].append({
-                "Date": date.strftime("%Y-%m"),
-                "MoM_3yr_avg": round(mom, 2) if pd.notna(mom) else None,
-                "YoY_3yr_avg": round(yoy, 2) if pd.notna(yoy) else None
-            })
-with open(os.path.join(OUTPUT_DIR, "material_rolling_3yr.json"), "w") as f:
-    json.dump(rolling_3yr, f, indent=2)
-print("✅ material_rolling_3yr.json")
+        writer.write(name, text.encode())
+
+    # Every pair involving a changed series needs its full-history
+    # correlation again; the matrix kernel redoes all pairs in milliseconds
+    writer.write("material_correlations.json", build_correlations(df_mom))
+
+
+def main(input_csv: str = INPUT_CSV, output_dir: str = OUTPUT_DIR, incremental: bool = False, state_path: str = None,
+         compact: bool = False, siblings=()):
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = state_path or os.path.join(os.path.dirname(os.path.abspath(input_csv)), STATE_FILE)
+    df_pivot, df_mom, df_yoy = load_panel(input_csv)
+
+    with ArtifactWriter(output_dir, compact=compact, siblings=siblings) as writer:
+        layout = output_layout(writer)
+        start = incremental_start(df_pivot, output_dir, state_path, layout) if incremental else None
+        if start is None:
+            run_full(writer, df_pivot, df_mom, df_yoy)
+        elif (start >= len(df_pivot.index)).all():
+            print("✅ No changes since the last run — artifacts left as they are")
+        else:
+            run_incremental(writer, df_pivot, df_mom, df_yoy, start)
+    # Only once every artifact is in place, so a failed run is picked up again by the next one
+    save_state(df_pivot, state_path, layout, artifact_digests(output_dir))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="theBehemoth.csv → AIBrain/JSONS artifacts")
+    parser.add_argument("--incremental", action="store_true",
+                        help="patch the previous run's artifacts, recomputing only months changed since then")
+    parser.add_argument("--full", action="store_true", help="rebuild every artifact from scratch (the default)")
+    parser.add_argument("--csv", default=INPUT_CSV)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--state", help=f"previous-run panel used to detect changes (default: {STATE_FILE} next to the CSV)")
+    parser.add_argument("--compact", action="store_true", help="write JSON without indentation")
+    parser.add_argument("--compress", default="", metavar="KINDS",
+                        help=f"comma-separated precompressed siblings to write next to each artifact ({', '.join(COMPRESSIONS)})")
+    args = parser.parse_args()
+    siblings = [kind for kind in args.compress.split(",") if kind]
+    unknown = set(siblings) - set(COMPRESSIONS)
+    if unknown:
+        parser.error(f"unknown --compress kind(s): {', '.join(sorted(unknown))}")
+    main(args.csv, args.output_dir, args.incremental and not args.full, args.state, args.compact, siblings)
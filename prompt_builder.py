@@ -0,0 +1,137 @@
+# prompt_builder.py
+
+import json
+import os
+
+try:
+    import tiktoken
+except ImportError:  # estimates fall back to ~4 characters per token
+    tiktoken = None
+
+# === CONFIG ===
+# Candidate materials offered to the GPT intent resolver
+INTENT_SHORTLIST_SIZE = int(os.getenv("INTENT_SHORTLIST_SIZE", "8"))
+# Lexical candidates weaker than this are not trusted to stand in for the full list
+INTENT_SHORTLIST_MIN_SCORE = float(os.getenv("INTENT_SHORTLIST_MIN_SCORE", "0.45"))
+# Model whose tokenizer is used for estimates
+TOKENIZER_MODEL = os.getenv("GPT_MODEL", "gpt-4")
+
+# Per-message framing overhead in the chat format
+_MESSAGE_OVERHEAD = 4
+
+_encoding = None
+if tiktoken is not None:
+    try:
+        _encoding = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+    except Exception:  # unknown model name or tokenizer files not available offline
+        _encoding = None
+
+
+def compact_json(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def estimate_tokens(messages: list) -> int:
+    """
+    Prompt tokens for a chat message list: exact with tiktoken, otherwise a
+    ~4 characters per token estimate.
+    """
+    total = 0
+    for m in messages:
+        content = m.get("content") or ""
+        total += _MESSAGE_OVERHEAD + (len(_encoding.encode(content)) if _encoding else len(content) // 4 + 1)
+    return total
+
+
+def _drop_empty(obj):
+    if isinstance(obj, dict):
+        cleaned = {k: _drop_empty(v) for k, v in obj.items()}
+        return {k: v for k, v in cleaned.items() if v is not None and v != {} and v != []}
+    if isinstance(obj, list):
+        return [_drop_empty(v) for v in obj]
+    return obj
+
+
+# === Intent resolution ===
+INTENT_SYSTEM_PROMPT = (
+    "You are a helpful assistant. A user will send a freeform question about construction materials.\n"
+    "From their prompt, extract:\n"
+    "- The most relevant material (must be from the provided list)\n"
+    "- The requested metric (must be exactly one of: 'momentum', 'volatility', 'spike', or 'rolling')\n"
+    "- The most specific date (must be in YYYY-MM format — or use 'latest' for the date only)\n\n"
+    "IMPORTANT:\n"
+    "- Do not use 'latest' as a metric.\n"
+    "- If no metric is specified, default to 'momentum'.\n"
+    "- Only use 'latest' in the 'date' field.\n"
+    "- Stay strictly clinical. Do not infer causes or offer explanations.\n\n"
+    "Return only a valid JSON object like:\n"
+    "{ \"material\": \"Asphalt (At Refinery)\", \"metric\": \"momentum\", \"date\": \"2024-11\" }\n\n"
+    "Here is the list of materials:\n"
+)
+
+
+def shortlist_materials(prompt: str, materials, fuzzy, hits=(), limit: int = INTENT_SHORTLIST_SIZE) -> list:
+    """
+    The few materials GPT has to choose between: names already found in the
+    prompt first, then the lexical ranker's closest candidates. Falls back
+    to the full list when nothing in the prompt resembles a material.
+    """
+    shortlist = list(dict.fromkeys(hits))
+    if fuzzy is not None:
+        for material in fuzzy.rank_in_text(prompt, limit=limit, min_score=INTENT_SHORTLIST_MIN_SCORE):
+            if material not in shortlist:
+                shortlist.append(material)
+    return shortlist[:max(limit, len(hits))] or list(materials)
+
+
+def intent_messages(prompt: str, candidates: list) -> list:
+    return [
+        {"role": "system", "content": INTENT_SYSTEM_PROMPT + "\n".join(f"- {m}" for m in candidates)},
+        {"role": "user", "content": prompt},
+    ]
+
+
+# === Data blocks ===
+def compact_snapshot_summary(snapshot_summary: dict) -> dict:
+    """
+    latest_snapshot.json without the BLS series ids; the exec summary
+    instructions only refer to names, MoM/YoY and the breakdown percentages.
+    """
+    def strip(value):
+        if isinstance(value, list):
+            return [{k: v for k, v in item.items() if k != "material"} if isinstance(item, dict) else item
+                    for item in value]
+        return value
+
+    return {key: strip(value) for key, value in (snapshot_summary or {}).items()}
+
+
+def compact_cluster_blob(cluster_blob: dict) -> dict:
+    """
+    One cluster from cluster_data.json as name → MoM/YoY in percent (two
+    decimals, as the report prints them). A material's month is only kept
+    when it differs from the cluster's as_of month.
+    """
+    as_of = cluster_blob.get("as_of")
+    materials = []
+    for item in cluster_blob.get("materials") or []:
+        entry = {"name": item.get("series_name")}
+        for field in ("MoM", "YoY"):
+            value = item.get(field)
+            entry[field] = round(value * 100, 2) if isinstance(value, (int, float)) else None
+        month = f"{item.get('year')}-{item.get('month')}"
+        if as_of and item.get("year") and month != as_of:
+            entry["as_of"] = month
+        materials.append(entry)
+    return {"as_of": as_of, "count": cluster_blob.get("count"), "values_in": "percent", "materials": materials}
+
+
+def tool_output(material: str, trend_entry: dict, mom_summary: dict) -> str:
+    """
+    Final-answer tool block: compact JSON with empty fields dropped.
+    """
+    return "Tool output: " + compact_json(_drop_empty({
+        "material": material,
+        "trend_entry": trend_entry,
+        "mom_trend": mom_summary,
+    }))
@@ -0,0 +1,217 @@
+# prompt_matcher.py
+
+from collections import deque
+
+from GPT_Tools.material_clusters import CLUSTERS
+from material_map import get_material_map
+
+# Common loose aliases → canonical material names (best-effort, non-exhaustive)
+ALIASES = {
+    "diesel": "#2 Diesel Fuel",
+    "diesel fuel": "#2 Diesel Fuel",
+    "aluminum shapes": "Aluminum Mill Shapes",
+    "aluminum mill": "Aluminum Mill Shapes",
+    "aluminium": "Aluminum Mill Shapes",
+    "asphalt": "Asphalt (At Refinery)",
+    "cement": "Cement",
+    "flat glass": "Flatt Glass",
+    "glass": "Flatt Glass",
+    "rebar": "Fabricated Structural Metal Bar Joists and Rebar",
+    "steel": "Steel Mill Products",
+    "ppi": "Producer Price Index (PPI For Final Demand",
+    "cpi": "Consumer Price Index (CPI-U)",
+}
+
+# Phrases that route a material-free prompt to the executive summary
+EXEC_SUMMARY_PHRASES = [
+    "latest update",
+    "latest summary",
+    "overall summary",
+    "overall update",
+    "market snapshot",
+    "snapshot overview",
+    "high-level update",
+    "executive summary",
+    "broad market trends",
+    "what’s happening in the market",
+    "give me the overview",
+    "what happened recently",
+    "what’s the market doing",
+    "summary of latest data",
+    "latest market movement",
+    "market-wide update",
+    "construction trends lately",
+    "general pricing trends",
+    "current state of the market",
+    "latest on construction materials",
+    "what's the latest on construction materials",
+    "latest construction materials data",
+    "construction material update",
+    "latest construction material summary",
+    "summary of construction materials",
+    "overall construction market",
+    "how is the construction materials market doing",
+    "broad view of construction costs",
+    "state of construction prices"
+]
+
+# Match kinds
+MATERIAL = "material"   # canonical material name
+ALIAS = "alias"         # loose alias → canonical material name
+CLUSTER = "cluster"     # cluster name from GPT_Tools/material_clusters.py
+SUMMARY = "summary"     # exec-summary phrase
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercases and folds curly apostrophes. Length-preserving for ASCII, so
+    match spans line up with the original prompt.
+    """
+    return (text or "").lower().replace("’", "'")
+
+
+class Match:
+    __slots__ = ("start", "end", "text", "targets")
+
+    def __init__(self, start: int, end: int, text: str, targets: list):
+        self.start = start
+        self.end = end
+        self.text = text
+        # [(kind, value), ...] — one phrase can be e.g. both an alias and a cluster
+        self.targets = targets
+
+    def values(self, *kinds):
+        return [value for kind, value in self.targets if kind in kinds]
+
+    def to_dict(self) -> dict:
+        return {
+            "start": self.start,
+            "end": self.end,
+            "text": self.text,
+            "targets": [{"kind": k, "value": v} for k, v in self.targets],
+        }
+
+    def __repr__(self):
+        return f"Match({self.start}, {self.end}, {self.text!r}, {self.targets!r})"
+
+
+class PromptMatcher:
+    """
+    Aho-Corasick automaton over every material, alias, cluster and summary
+    phrase. find() scans the prompt once, keeps only whole-word hits and
+    resolves overlaps leftmost-longest, so "steel mill products" wins over
+    "steel".
+    """
+
+    def __init__(self, patterns: dict):
+        # patterns: normalized phrase → [(kind, value), ...]
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        self.phrases = []
+        self.targets = []
+        for phrase, targets in patterns.items():
+            self._add(phrase, targets)
+        self._link()
+
+    def _add(self, phrase: str, targets: list):
+        if not phrase:
+            return
+        node = 0
+        for ch in phrase:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            node = nxt
+        self.output[node].append(len(self.phrases))
+        self.phrases.append(phrase)
+        self.targets.append(list(targets))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(ch, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, prompt: str) -> list:
+        """
+        Returns non-overlapping whole-word Matches in prompt order.
+        Spans index into normalize(prompt).
+        """
+        text = normalize(prompt)
+        hits = []
+        node = 0
+        for pos, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for pid in self.output[node]:
+                end = pos + 1
+                start = end - len(self.phrases[pid])
+                if _is_boundary(text, start - 1) and _is_boundary(text, end):
+                    hits.append((start, end, pid))
+
+        # Leftmost-longest: earliest start first, longer phrase first on ties
+        hits.sort(key=lambda h: (h[0], -(h[1] - h[0])))
+        matches = []
+        cursor = 0
+        for start, end, pid in hits:
+            if start < cursor:
+                continue
+            matches.append(Match(start, end, text[start:end], self.targets[pid]))
+            cursor = end
+        return matches
+
+    def materials(self, prompt: str, include_aliases: bool = True, limit: int = None) -> list:
+        """
+        Canonical material names mentioned in the prompt, de-duplicated, in prompt order.
+        """
+        kinds = (MATERIAL, ALIAS) if include_aliases else (MATERIAL,)
+        found = []
+        for match in self.find(prompt):
+            for value in match.values(*kinds):
+                if value not in found:
+                    found.append(value)
+        return found[:limit] if limit else found
+
+
+def _is_boundary(text: str, i: int) -> bool:
+    return i < 0 or i >= len(text) or not text[i].isalnum()
+
+
+def build_prompt_matcher(material_list) -> PromptMatcher:
+    """
+    Builds the matcher for one dataset version. Aliases (ALIASES and
+    material_map.json keys) only count when they point at a loaded material.
+    """
+    materials = set(material_list)
+    patterns = {}
+
+    def add(phrase, kind, value):
+        targets = patterns.setdefault(normalize(phrase), [])
+        if (kind, value) not in targets:
+            targets.append((kind, value))
+
+    for m in material_list:
+        add(m, MATERIAL, m)
+    for alias, canonical in ALIASES.items():
+        if canonical in materials:
+            add(alias, ALIAS, canonical)
+    for alias in (get_material_map() or {}):
+        if alias in materials:
+            add(alias, ALIAS, alias)
+    for cluster_name in CLUSTERS:
+        add(cluster_name, CLUSTER, cluster_name)
+    for phrase in EXEC_SUMMARY_PHRASES:
+        add(phrase, SUMMARY, phrase)
+    return PromptMatcher(patterns)
@@ -2,8 +2,14 @@
 
 import os
 import json
+import time
 from openai import OpenAI
+from app_logging import get_logger
 from material_map import get_material_map
+from intent_cache import intent_key, materials_hash, resolver_intent_cache
+from metrics import CALL_RESOLVE_INTENT, call_outcome, observe_openai_call
+
+log = get_logger(__name__)
 
 _gpt_key = os.getenv("GPT_KEY") or os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=_gpt_key) if _gpt_key else None
@@ -12,10 +18,16 @@ client = OpenAI(api_key=_gpt_key) if _gpt_key else None
 material_map = get_material_map()
 material_list = list(material_map.keys())
 
-def resolve_intent(user_input: str) -> dict:
+def resolve_intent(user_input: str, materials: list = None) -> dict:
+    materials = list(materials) if materials else material_list
+    cache_key = intent_key(user_input, materials_hash(materials))
+    cached = resolver_intent_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+
     try:
         if client is None:
-            print("⚠️ resolve_intent: No GPT key configured; returning empty result")
+            log.warning("⚠️ resolve_intent: No GPT key configured; returning empty result")
             return {}
         system_prompt = (
             "You are an intent resolver for a construction materials AI system.\n"
@@ -27,33 +39,42 @@ def resolve_intent(user_input: str) -> dict:
             "Do not explain your answer. Do not include extra commentary."
         )
 
-        material_list_string = ", ".join(material_list)
+        material_list_string = ", ".join(materials)
         user_prompt = (
             f"Material list:\n{material_list_string}\n\n"
             f"User input: {user_input}"
         )
 
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
+        start = time.perf_counter()
+        try:
+            response = client.chat.completions.create(
+                model="gpt-4",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ]
+            )
+        except Exception as e:
+            observe_openai_call(CALL_RESOLVE_INTENT, call_outcome(e), time.perf_counter() - start)
+            raise
+        observe_openai_call(CALL_RESOLVE_INTENT, "ok", time.perf_counter() - start, response.usage)
 
         reply = response.choices[0].message.content.strip()
 
         try:
             parsed = json.loads(reply)
-            return {
+            result = {
                 "material": parsed.get("material"),
                 "metric": parsed.get("metric")
             }
+            if result["material"] and result["metric"]:
+                resolver_intent_cache.set(cache_key, dict(result))
+            return result
         except json.JSONDecodeError:
-            print("❌ GPT returned non-JSON format:")
-            print(reply)
+            log.warning("❌ GPT returned non-JSON format")
+            log.debug("Non-JSON resolver reply", extra={"reply": reply})
             return {}
 
     except Exception as e:
-        print(f"❌ Error resolving intent: {e}")
+        log.error(f"❌ Error resolving intent: {e!r}", exc_info=True)
         return {}
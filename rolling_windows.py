@@ -0,0 +1,185 @@
+# rolling_windows.py
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from series_store import MaterialSeries, SeriesTable
+from ttl_cache import TTLCache
+
+# === CONFIG ===
+# Computed (material, window) series kept across requests
+ROLLING_CACHE_SIZE = int(os.getenv("ROLLING_CACHE_SIZE", "512"))
+# Serve /rolling, /rolling-12mo and /rolling-3yr from the raw value panel
+# instead of holding the three precomputed files in memory (0 keeps the files;
+# without the panel artifact they are always used)
+ROLLING_ON_DEMAND = os.getenv("ROLLING_ON_DEMAND", "1") != "0"
+MAX_WINDOW = 240
+MAX_HALFLIFE = 120.0
+
+# Base fields the windows are computed over, with their pct-change period in months
+BASE_FIELDS = {"MoM": 1, "YoY": 12}
+# Same rounding as prepare_data.py
+DECIMALS = 2
+# Window → (DatasetSnapshot attribute, file suffix) of the precomputed rolling files
+PRECOMPUTED_WINDOWS = {
+    3: ("rolling_by_material", "3mo"),
+    12: ("rolling_12mo_by_material", "12mo"),
+    36: ("rolling_3yr_by_material", "3yr"),
+}
+
+rolling_cache = TTLCache(ROLLING_CACHE_SIZE)
+
+
+def pct_change(values: np.ndarray, periods: int) -> np.ndarray:
+    """
+    Unrounded % change over `periods` months, computed exactly as
+    prepare_data.py does (pandas pct_change without filling gaps).
+    """
+    return (pd.Series(values).pct_change(periods=periods, fill_method=None) * 100).to_numpy()
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing mean over `window` positions; NaN unless every value in the
+    window is present. pandas' own kernel, so results match prepare_data.py
+    to the last bit.
+    """
+    return pd.Series(values).rolling(window).mean().to_numpy()
+
+
+def ewma(values: np.ndarray, halflife: float) -> np.ndarray:
+    """
+    Exponentially weighted mean with the given half-life in months
+    (pandas .ewm(halflife=h).mean(): adjusted weights, gaps still decay).
+    """
+    decay = 0.5 ** (1.0 / halflife)
+    out = np.full(len(values), np.nan)
+    weighted, old_wt = None, 1.0
+    for i, x in enumerate(values.tolist()):
+        if x == x:
+            if weighted is None:
+                weighted = x
+            else:
+                old_wt *= decay
+                weighted = (old_wt * weighted + x) / (old_wt + 1.0)
+                old_wt += 1.0
+        elif weighted is not None:
+            old_wt *= decay
+        if weighted is not None:
+            out[i] = weighted
+    return out
+
+
+def window_label(window: int = None, halflife: float = None, suffix: str = None) -> str:
+    if halflife is not None:
+        return f"ewma_{halflife:g}"
+    return f"{suffix or f'{window}mo'}_avg"
+
+
+def derive_series(base: MaterialSeries, window: int = None, halflife: float = None, suffix: str = None):
+    """
+    A windowed MaterialSeries with columns "<field>_<label>" for MoM and
+    YoY, holding only months where either average exists (None if there are
+    none). From a raw value series (the panel's "value" column) the changes
+    are averaged unrounded and rounded at the end, as prepare_data.py does;
+    a trendline series only has changes already rounded to 2 dp, so results
+    from it can be off by 0.01.
+    """
+    label = window_label(window, halflife, suffix)
+    values = np.where(base.present, base.columns["value"], np.nan) if "value" in base.columns else None
+    columns = {}
+    for field, periods in BASE_FIELDS.items():
+        if values is not None:
+            changes = pct_change(values, periods)
+        elif field in base.columns:
+            changes = np.where(base.present, base.columns[field], np.nan)
+        else:
+            continue
+        smoothed = ewma(changes, halflife) if halflife is not None else rolling_mean(changes, window)
+        columns[f"{field}_{label}"] = np.round(smoothed, DECIMALS)
+    if not columns:
+        return None
+    present = base.present & np.any([~np.isnan(c) for c in columns.values()], axis=0)
+    if not present.any():
+        return None
+    return MaterialSeries(base.start, present, columns)
+
+
+def _relabel(series: MaterialSeries, label: str) -> MaterialSeries:
+    return MaterialSeries(series.start, series.present, {
+        f"{field}_{label}": values for field, values in zip(BASE_FIELDS, series.columns.values())
+    })
+
+
+def _precomputed_window(snapshot, material: str, window: int):
+    """
+    A precomputed rolling file's series under /rolling-window's column names,
+    for snapshots without a value panel.
+    """
+    if window not in PRECOMPUTED_WINDOWS:
+        return None
+    attr, _ = PRECOMPUTED_WINDOWS[window]
+    series = getattr(snapshot, attr).get(material)
+    return _relabel(series, window_label(window)) if series is not None else None
+
+
+def cached_window(snapshot, material: str, window: int = None, halflife: float = None):
+    """
+    Memoized derive_series for one material of the given snapshot. Without
+    a value panel the precomputed windows (3, 12, 36) come from their files
+    and other windows from the trendlines.
+    """
+    key = (snapshot.version, material, window, halflife)
+    series = rolling_cache.get(key)
+    if series is None:
+        if snapshot.values_by_material is not None:
+            base = snapshot.values_by_material.get(material)
+        else:
+            # Stay consistent with /rolling where a precomputed file exists
+            series = _precomputed_window(snapshot, material, window) if halflife is None else None
+            base = snapshot.trendlines_by_material.get(material) if series is None else None
+        if base is not None:
+            series = derive_series(base, window=window, halflife=halflife)
+        if series is not None:
+            rolling_cache.set(key, series)
+    return series
+
+
+class DerivedRollingTable:
+    """
+    One rolling-average table computed from the value panel, each material
+    on first use; serves the same records as the precomputed rolling file
+    (checked in tests/test_rolling_windows.py).
+    """
+
+    def __init__(self, values: SeriesTable, window: int, suffix: str):
+        self.values = values
+        self.window = window
+        self.suffix = suffix
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def get(self, material: str, default=None):
+        series = self.series.get(material)
+        if series is None:
+            base = self.values.get(material)
+            if base is None:
+                return default
+            series = derive_series(base, window=self.window, suffix=self.suffix)
+            if series is None:
+                return default
+            with self._lock:
+                series = self.series.setdefault(material, series)
+        return series
+
+    def __contains__(self, material):
+        return self.get(material) is not None
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        return [m for m in self.values.keys() if m in self]
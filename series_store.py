@@ -0,0 +1,258 @@
+# series_store.py
+
+import re
+
+import numpy as np
+
+DATE_PATTERN = re.compile(r"(\d{4})-(\d{2})")
+
+
+def month_ordinal(date: str):
+    """
+    "YYYY-MM" → integer month ordinal (year * 12 + month - 1), or None if unparseable.
+    """
+    match = DATE_PATTERN.fullmatch(date or "")
+    if not match:
+        return None
+    month = int(match.group(2))
+    if not 1 <= month <= 12:
+        return None
+    return int(match.group(1)) * 12 + month - 1
+
+
+def ordinal_to_date(ordinal: int) -> str:
+    year, month = divmod(int(ordinal), 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+class MaterialSeries:
+    """
+    One material's records held column-wise. Position i holds month ordinal
+    start + i; `present` marks which months had a record in the source JSON and
+    NaN stands in for null values. `valid[field]` lists the positions where the
+    field is non-null, so "last N values" is a slice rather than a scan.
+    """
+
+    __slots__ = ("start", "present", "columns", "valid", "latest")
+
+    def __init__(self, start: int, present: np.ndarray, columns: dict):
+        self.start = start
+        self.present = present
+        self.columns = columns
+        self.valid = {
+            field: np.flatnonzero(present & ~np.isnan(values))
+            for field, values in columns.items()
+        }
+        present_idx = np.flatnonzero(present)
+        self.latest = int(present_idx[-1]) if len(present_idx) else None
+
+    def __len__(self):
+        return len(self.present)
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.present) - 1
+
+    def index_of(self, date: str):
+        """
+        Position of a "YYYY-MM" date, or None if the material has no record for it.
+        """
+        ordinal = month_ordinal(date)
+        if ordinal is None:
+            return None
+        i = ordinal - self.start
+        if i < 0 or i >= len(self.present) or not self.present[i]:
+            return None
+        return i
+
+    def date_at(self, i: int) -> str:
+        return ordinal_to_date(self.start + i)
+
+    def value(self, field: str, i: int):
+        v = self.columns[field][i]
+        return None if np.isnan(v) else float(v)
+
+    def entry(self, i: int) -> dict:
+        record = {"Date": self.date_at(i)}
+        for field in self.columns:
+            record[field] = self.value(field, i)
+        return record
+
+    def bounds(self, date_from: str = None, date_to: str = None):
+        """
+        Positional (lo, hi) half-open bounds covering an inclusive "YYYY-MM" range.
+        """
+        lo, hi = 0, len(self.present)
+        if date_from:
+            ordinal = month_ordinal(date_from)
+            if ordinal is not None:
+                lo = min(max(ordinal - self.start, 0), hi)
+        if date_to:
+            ordinal = month_ordinal(date_to)
+            if ordinal is not None:
+                hi = max(min(ordinal - self.start + 1, hi), lo)
+        return lo, hi
+
+    def records(self, date_from: str = None, date_to: str = None) -> list:
+        """
+        Rebuilds the source JSON records (same keys, order and nulls), optionally
+        restricted to an inclusive date range.
+        """
+        lo, hi = self.bounds(date_from, date_to)
+        fields = list(self.columns.items())
+        out = []
+        for i in np.flatnonzero(self.present[lo:hi]) + lo:
+            record = {"Date": self.date_at(i)}
+            for field, values in fields:
+                v = values[i]
+                record[field] = None if np.isnan(v) else float(v)
+            out.append(record)
+        return out
+
+    def last_valid(self, field: str, count: int):
+        """
+        Positions of the last `count` non-null values of a field
+        (same slicing semantics as records[-count:]).
+        """
+        return self.valid[field][-count:]
+
+
+class SeriesTable:
+    """
+    Per-material columnar replacement for a {material: [ {Date, ...}, ... ]} dataset.
+    Supports the dict-style get/in/keys access the routes already use.
+    """
+
+    def __init__(self, by_material: dict):
+        self.series = {}
+        for material, records in (by_material or {}).items():
+            series = self._build(records or [])
+            if series is not None:
+                self.series[material] = series
+
+    @staticmethod
+    def _build(records: list):
+        dated = []
+        fields = []
+        for r in records:
+            ordinal = month_ordinal(r.get("Date"))
+            if ordinal is None:
+                continue
+            dated.append((ordinal, r))
+            for key in r:
+                if key != "Date" and key not in fields:
+                    fields.append(key)
+        if not dated:
+            return None
+
+        start = min(o for o, _ in dated)
+        length = max(o for o, _ in dated) - start + 1
+        present = np.zeros(length, dtype=bool)
+        columns = {field: np.full(length, np.nan) for field in fields}
+        for ordinal, r in dated:
+            i = ordinal - start
+            present[i] = True
+            for field in fields:
+                v = r.get(field)
+                if v is not None:
+                    columns[field][i] = v
+        return MaterialSeries(start, present, columns)
+
+    @classmethod
+    def from_series(cls, series: dict):
+        """
+        Wraps already-built MaterialSeries (e.g. views into a shared mapping).
+        """
+        table = cls.__new__(cls)
+        table.series = series
+        return table
+
+    def get(self, material: str, default=None):
+        return self.series.get(material, default)
+
+    def __contains__(self, material):
+        return material in self.series
+
+    def __len__(self):
+        return len(self.series)
+
+    def keys(self):
+        return self.series.keys()
+
+
+class SpikeTable:
+    """
+    Columnar {material: [ {Date, Type, Change}, ... ]} spike lists: per material a
+    month-ordinal array, a Type code array (index into `types`) and a Change array.
+    get() rebuilds the source records in their original order.
+    """
+
+    def __init__(self, by_material: dict):
+        self.types = []
+        self.spikes = {}
+        for material, records in (by_material or {}).items():
+            rows = [(month_ordinal(r.get("Date")), r.get("Type"), r.get("Change")) for r in records or []]
+            rows = [row for row in rows if row[0] is not None]
+            for _, kind, _ in rows:
+                if kind not in self.types:
+                    self.types.append(kind)
+            self.spikes[material] = (
+                np.array([o for o, _, _ in rows], dtype=np.int32),
+                np.array([self.types.index(k) for _, k, _ in rows], dtype=np.uint8),
+                np.array([np.nan if c is None else c for _, _, c in rows], dtype=np.float64),
+            )
+
+    @classmethod
+    def from_arrays(cls, types: list, spikes: dict):
+        table = cls.__new__(cls)
+        table.types = list(types)
+        table.spikes = spikes
+        return table
+
+    def get(self, material: str, default=None):
+        arrays = self.spikes.get(material)
+        if arrays is None:
+            return default
+        ordinals, kinds, changes = arrays
+        return [
+            {"Date": ordinal_to_date(o), "Type": self.types[k], "Change": None if c != c else c}
+            for o, k, c in zip(ordinals.tolist(), kinds.tolist(), changes.tolist())
+        ]
+
+    def __contains__(self, material):
+        return material in self.spikes
+
+    def __len__(self):
+        return len(self.spikes)
+
+    def keys(self):
+        return self.spikes.keys()
+
+
+def align_columns(columns: list, date_from: str = None, date_to: str = None):
+    """
+    Aligns several (MaterialSeries, field) columns onto one shared monthly axis.
+    The axis spans the union of the columns' histories, clipped to the
+    inclusive [date_from, date_to] range. Returns (dates, [values, ...]) with
+    None where a column has no value.
+    """
+    if not columns:
+        return [], []
+    lo = min(series.start for series, _ in columns)
+    hi = max(series.end for series, _ in columns)
+    if date_from and month_ordinal(date_from) is not None:
+        lo = max(lo, month_ordinal(date_from))
+    if date_to and month_ordinal(date_to) is not None:
+        hi = min(hi, month_ordinal(date_to))
+    if hi < lo:
+        return [], [[] for _ in columns]
+
+    n = hi - lo + 1
+    out = []
+    for series, field in columns:
+        values = np.full(n, np.nan)
+        a, b = max(lo, series.start), min(hi, series.end)
+        if a <= b:
+            values[a - lo:b - lo + 1] = series.columns[field][a - series.start:b - series.start + 1]
+        out.append([None if v != v else v for v in values.tolist()])
+    return [ordinal_to_date(o) for o in range(lo, hi + 1)], out
@@ -0,0 +1,246 @@
+# shared_dataset.py
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from app_logging import get_logger
+from correlation_engine import CorrelationTensor
+from dataset_loader import CACHE_DIR
+from series_store import MaterialSeries, SeriesTable, SpikeTable
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows); every worker builds its own copy
+    fcntl = None
+
+log = get_logger(__name__)
+
+# === CONFIG ===
+# Materialize each dataset version once into a memory-mapped file that every
+# worker on the host maps read-only
+SHARED_DATASET = os.getenv("SHARED_DATASET", "1") == "1" and fcntl is not None
+SHARED_DIR = os.path.join(CACHE_DIR, "shared")
+# Older versions kept on disk (workers still mapping them are unaffected)
+KEEP_VERSIONS = 3
+
+FORMAT = 2
+# Columnar dataset name → DatasetSnapshot attribute
+SERIES_DATASETS = {
+    "trendlines": "trendlines_by_material",
+    "rolling": "rolling_by_material",
+    "rolling_12mo": "rolling_12mo_by_material",
+    "rolling_3yr": "rolling_3yr_by_material",
+    "values": "values_by_material",
+}
+JSON_DATASETS = ("snapshot", "clusters", "narratives")
+POINTER_FILE = "current.json"
+_ALIGN = 64
+
+
+def _paths(version: str):
+    base = os.path.join(SHARED_DIR, version)
+    return base + ".bin", base + ".json", base + ".lock"
+
+
+@contextmanager
+def version_lock(version: str):
+    """
+    Exclusive cross-process lock for one version, so exactly one worker
+    materializes it while the others wait and then attach.
+    """
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    with open(_paths(version)[2], "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def has_version(version: str) -> bool:
+    return os.path.exists(_paths(version)[1])
+
+
+def read_pointer():
+    """
+    {"version", "checked_at"} of the newest version any worker confirmed upstream.
+    """
+    try:
+        with open(os.path.join(SHARED_DIR, POINTER_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_pointer(version: str):
+    _write_atomic(
+        os.path.join(SHARED_DIR, POINTER_FILE),
+        json.dumps({"version": version, "checked_at": time.time()}).encode(),
+    )
+
+
+def _write_atomic(path: str, content: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class _ArrayWriter:
+    """
+    Appends arrays to one flat buffer and hands back their descriptors.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.offset = 0
+
+    def add(self, array: np.ndarray) -> list:
+        array = np.ascontiguousarray(array)
+        pad = -self.offset % _ALIGN
+        if pad:
+            self.f.write(b"\0" * pad)
+            self.offset += pad
+        self.f.write(array.tobytes())
+        descriptor = [self.offset, array.dtype.str, list(array.shape)]
+        self.offset += array.nbytes
+        return descriptor
+
+
+def write_version(snapshot):
+    """
+    Writes a built DatasetSnapshot's tables to <version>.bin plus a JSON
+    manifest. The manifest is written last, so its presence marks a complete file.
+    Call under version_lock.
+    """
+    bin_path, manifest_path, _ = _paths(snapshot.version)
+    tmp_path = f"{bin_path}.{os.getpid()}.tmp"
+    manifest = {
+        "format": FORMAT,
+        "version": snapshot.version,
+        "sources": dict(snapshot.sources),
+        "missing": list(snapshot.missing),
+        "series": {},
+        "json": {
+            "snapshot": snapshot.snapshot_summary,
+            "clusters": snapshot.cluster_data,
+            "narratives": snapshot.narratives.artifact,
+        },
+    }
+    with open(tmp_path, "wb") as f:
+        writer = _ArrayWriter(f)
+        for name, attr in SERIES_DATASETS.items():
+            table = getattr(snapshot, attr)
+            if not isinstance(table, SeriesTable):
+                continue  # derived on demand, nothing to share
+            manifest["series"][name] = {
+                material: {
+                    "start": series.start,
+                    "present": writer.add(series.present),
+                    "columns": {field: writer.add(values) for field, values in series.columns.items()},
+                }
+                for material, series in table.series.items()
+            }
+        spikes = snapshot.spikes_by_material
+        manifest["spikes"] = {
+            "types": spikes.types,
+            "materials": {material: [writer.add(a) for a in arrays] for material, arrays in spikes.spikes.items()},
+        }
+        correlations = snapshot.correlations
+        manifest["correlations"] = {
+            "materials": correlations.materials,
+            "lags": correlations.lags,
+            "values": writer.add(correlations.values),
+            "present": writer.add(correlations.present),
+        }
+    os.replace(tmp_path, bin_path)
+    _write_atomic(manifest_path, json.dumps(manifest).encode())
+    log.info(f"💾 Shared dataset {snapshot.version} written ({os.path.getsize(bin_path) / 1e6:.1f} MB)")
+    _prune(snapshot.version)
+
+
+def attach_version(version: str):
+    """
+    Maps a materialized version read-only. Returns (datasets, sources) in the
+    shape DatasetSnapshot accepts, or None if the version is not on disk.
+    """
+    bin_path, manifest_path, _ = _paths(version)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != FORMAT:
+        return None
+    try:
+        buffer = np.memmap(bin_path, dtype=np.uint8, mode="r") if os.path.getsize(bin_path) else np.zeros(0, np.uint8)
+    except OSError:
+        # Pruned between reading the manifest and mapping the data
+        return None
+
+    def view(descriptor):
+        offset, dtype, shape = descriptor
+        return np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer, offset=offset)
+
+    datasets = {name: manifest["json"].get(name) for name in JSON_DATASETS}
+    for name, materials in manifest["series"].items():
+        datasets[name] = SeriesTable.from_series({
+            material: MaterialSeries(
+                entry["start"],
+                view(entry["present"]),
+                {field: view(d) for field, d in entry["columns"].items()},
+            )
+            for material, entry in materials.items()
+        })
+    spikes = manifest["spikes"]
+    datasets["spikes"] = SpikeTable.from_arrays(
+        spikes["types"],
+        {material: tuple(view(d) for d in arrays) for material, arrays in spikes["materials"].items()},
+    )
+    correlations = manifest["correlations"]
+    datasets["correlations"] = CorrelationTensor.from_arrays(
+        correlations["materials"], correlations["lags"], view(correlations["values"]), view(correlations["present"]),
+    )
+    # material_trends.json is not held in memory and on-demand rolling tables are
+    # not materialized; for those only whether the artifact loaded matters
+    datasets["trends"] = {}
+    for name in SERIES_DATASETS:
+        datasets.setdefault(name, {})
+    for name in manifest["missing"]:
+        datasets[name] = None
+    return datasets, manifest["sources"]
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:  # removed by another worker's prune
+        return 0.0
+
+
+def _prune(keep_version: str):
+    try:
+        manifests = [
+            os.path.join(SHARED_DIR, name) for name in os.listdir(SHARED_DIR)
+            if name.endswith(".json") and name != POINTER_FILE
+        ]
+    except OSError:
+        return
+    manifests.sort(key=_mtime, reverse=True)
+    for manifest_path in manifests[KEEP_VERSIONS:]:
+        version = os.path.basename(manifest_path)[:-len(".json")]
+        if version == keep_version:
+            continue
+        bin_path, manifest_path, lock_path = _paths(version)
+        # Manifest first: a manifest that can still be read always has its .bin
+        for path in (manifest_path, bin_path, lock_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
@@ -0,0 +1,56 @@
+# single_flight.py
+
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller starts the
+    work, later callers with the same key await the same task, and everyone
+    gets its result (or its exception). Nothing is kept once the task
+    finishes, so this is not a cache; it only collapses duplicates that
+    overlap in time.
+
+    Each caller awaits through asyncio.shield, so one caller being cancelled
+    (client disconnect) does not cancel the shared work for the others. The
+    work itself is cancelled only when its last waiter goes away.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._waiters = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key, make_coro):
+        """
+        Returns (result, shared): shared is True when this caller joined a
+        call another caller had already started.
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(make_coro())
+            self._calls[key] = task
+            self._waiters[task] = 0
+            task.add_done_callback(lambda t: self._finished(key, t))
+
+        self._waiters[task] += 1
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters[task] == 1:
+                task.cancel()
+            raise
+        finally:
+            if task in self._waiters:
+                self._waiters[task] -= 1
+
+    def _finished(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        self._waiters.pop(task, None)
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter already left
+            task.exception()
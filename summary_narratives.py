@@ -0,0 +1,156 @@
+# summary_narratives.py
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from app_logging import get_logger
+from gpt_client import chat_completion
+from metrics import CALL_CLUSTER_SUMMARY, CALL_EXEC_SUMMARY
+from prompt_builder import compact_cluster_blob, compact_json, compact_snapshot_summary
+
+log = get_logger(__name__)
+
+NARRATIVE_TEMPERATURE = 0.5
+
+EXEC_SYSTEM_PROMPT = "You summarize construction material market data into concise, expert-level insights."
+CLUSTER_SYSTEM_PROMPT = "You generate financial summaries for construction material clusters."
+
+
+def exec_summary_messages(snapshot_summary: dict) -> list:
+    snapshot_prompt = (
+            "You are a market analyst assistant. Based on the following snapshot of construction material trends, "
+            "write a clean, structured executive summary **as of the provided snapshot_date**. Follow this format:\n\n"
+            "1. Begin with the core indexes:\n"
+            "   - Consumer Price Index (CPI-U)\n"
+            "   - Producer Price Index (PPI) for Final Demand\n"
+            "   - Final Demand Construction Index\n"
+            "   - Inputs to Construction Industries\n"
+            "   - For each index, include both the month-over-month (MoM) and year-over-year (YoY) percentage change.\n\n"
+            "2. Summarize the overall market direction (clinical statement only):\n"
+            "   - State whether movements are mostly up, down, or stable based on counts.\n"
+            "   - Do not speculate on causes or implications.\n\n"
+            "3. Include the percentage breakdown:\n"
+            "   - % of materials that increased\n"
+            "   - % that decreased\n"
+            "   - % that remained stable\n"
+            "   - Start by stating: 'Out of the [total series count] materials we track...'\n\n"
+            "4. List the standout performers:\n"
+            "   - Top risers with both MoM and YoY percentage increases\n"
+            "   - Top fallers with both MoM and YoY percentage decreases\n\n"
+            "**Formatting & Style Instructions:**\n"
+            "- Structure the output as concise, readable paragraphs — do not use numbered sections or bullet points.\n"
+            "- Each of the four items above should be its own paragraph.\n"
+            "- Use formal, clinical language.\n"
+            "- Do NOT offer reasons, implications, or commentary (e.g., 'indicating demand has gone up', 'doing well', 'due to').\n"
+            "- Only state observed direction and percentages from the data.\n\n"
+            "Snapshot data:\n" + compact_json(compact_snapshot_summary(snapshot_summary))
+    )
+    return [
+        {"role": "system", "content": EXEC_SYSTEM_PROMPT},
+        {"role": "user", "content": snapshot_prompt}
+    ]
+
+
+def cluster_summary_messages(cluster_name: str, cluster_blob: dict) -> list:
+    cluster_prompt = (
+        f"You are a market analyst assistant. Based on the following data for the '{cluster_name}' cluster, "
+        f"write a concise, expert-level report. Your tone must be formal and strictly clinical.\n\n"
+        f"Cluster data:\n{compact_json(compact_cluster_blob(cluster_blob))}\n\n"
+        f"**Output Structure:**\n"
+        f"1) A single paragraph of 1–2 sentences summarizing observed movements across the cluster (no causes).\n"
+        f"2) A vertical bulleted list with each material on its own line:\n"
+        f"   - <Material>: MoM <x.xx>% | YoY <y.yy>%\n"
+        f"   - <Material>: MoM <x.xx>% | YoY <y.yy>%\n"
+        f"   (etc.)\n\n"
+        f"**Rules:**\n"
+        f"- Focus only on MoM and YoY direction and magnitudes.\n"
+        f"- Do not offer reasons, implications, or commentary (no 'indicates', 'suggests', 'demand', 'due to').\n"
+        f"- Use hyphen bullets only; each bullet must be on its own line.\n"
+        f"- If a value is missing, write 'n/a'."
+    )
+    return [
+        {"role": "system", "content": CLUSTER_SYSTEM_PROMPT},
+        {"role": "user", "content": cluster_prompt}
+    ]
+
+
+def source_hash(blob) -> str:
+    """
+    Fingerprint of the data a narrative was written from. A stored narrative is
+    only served while its source data is unchanged.
+    """
+    canonical = json.dumps(blob, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def build_narratives_artifact(snapshot_summary: dict, cluster_data: dict, generate) -> dict:
+    """
+    Pipeline-time builder for summary_narratives.json. `generate` is a sync
+    callable taking chat messages and returning the completion text.
+    """
+    artifact = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "exec_summary": {
+            "source_hash": source_hash(snapshot_summary),
+            "text": generate(exec_summary_messages(snapshot_summary)),
+        },
+        "clusters": {},
+    }
+    for name, blob in cluster_data.items():
+        artifact["clusters"][name] = {
+            "source_hash": source_hash(blob),
+            "text": generate(cluster_summary_messages(name, blob)),
+        }
+    return artifact
+
+
+class NarrativeStore:
+    """
+    Exec and cluster summaries for one dataset version, served from memory.
+    Narratives come from summary_narratives.json when its source hashes match
+    the loaded data; anything else is generated on first request (one GPT call
+    per narrative per version, concurrent callers wait on it).
+    """
+
+    def __init__(self, artifact: dict, snapshot_summary: dict, cluster_data: dict):
+        self.artifact = artifact
+        self.snapshot_summary = snapshot_summary
+        self.cluster_data = cluster_data
+        self._texts = {}
+        self._locks = {}
+
+        artifact = artifact or {}
+        exec_entry = artifact.get("exec_summary") or {}
+        if exec_entry.get("text") and exec_entry.get("source_hash") == source_hash(snapshot_summary):
+            self._texts["exec"] = exec_entry["text"]
+        for name, entry in (artifact.get("clusters") or {}).items():
+            if name in cluster_data and entry.get("text") and entry.get("source_hash") == source_hash(cluster_data[name]):
+                self._texts[("cluster", name)] = entry["text"]
+
+    def cached(self) -> list:
+        return ["exec" if key == "exec" else f"cluster:{key[1]}" for key in self._texts]
+
+    async def exec_summary(self) -> str:
+        return await self._get("exec", lambda: exec_summary_messages(self.snapshot_summary), CALL_EXEC_SUMMARY)
+
+    async def cluster_summary(self, cluster_name: str) -> str:
+        blob = self.cluster_data[cluster_name]
+        return await self._get(
+            ("cluster", cluster_name), lambda: cluster_summary_messages(cluster_name, blob), CALL_CLUSTER_SUMMARY
+        )
+
+    async def _get(self, key, build_messages, call: str) -> str:
+        text = self._texts.get(key)
+        if text is not None:
+            return text
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            text = self._texts.get(key)
+            if text is None:
+                log.info(f"📝 Generating narrative {key} for this dataset version")
+                response = await chat_completion(build_messages(), temperature=NARRATIVE_TEMPERATURE, call=call)
+                text = response.choices[0].message.content.strip()
+                self._texts[key] = text
+        return text
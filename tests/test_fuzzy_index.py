@@ -0,0 +1,61 @@
+"""
+FuzzyMaterialIndex lookups over the material names in the checked-in
+AIBrain/theBehemoth.csv.
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from fuzzy_index import build_fuzzy_index, word_coverage  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def index():
+    names = pd.read_csv(REPO_ROOT / "AIBrain" / "theBehemoth.csv")["series_name"].unique()
+    return build_fuzzy_index(list(names))
+
+
+@pytest.mark.parametrize("query,material", [
+    ("alumnium", "Aluminum Mill Shapes"),
+    ("ready mix", "Ready Mixed Concrete"),
+    ("gypsum", "Gypsum Building MAterials"),
+    ("Plumbing Contractors", "Plumbing Contractors "),
+])
+def test_best_finds_partial_and_misspelled_names(index, query, material):
+    match = index.best(query)
+    assert match is not None and match.material == material
+
+
+@pytest.mark.parametrize("query", ["concrete", "roofing felt", "copper wire", "xyzzy"])
+def test_best_rejects_ambiguous_and_unknown_names(index, query):
+    assert index.best(query) is None
+
+
+def test_search_ranks_best_phrase_per_material(index):
+    ranked = index.search("concrete", limit=10)
+    assert len({m.material for m in ranked}) == len(ranked) > 1
+    assert [m.score for m in ranked] == sorted((m.score for m in ranked), reverse=True)
+
+
+def test_find_in_text_skips_metric_and_date_words(index):
+    hits = index.find_in_text("ready mix volatility lately")
+    assert [(m.material, m.phrase) for m in hits] == [("Ready Mixed Concrete", "Ready Mixed Concrete")]
+    assert hits[0].word_coverage == pytest.approx(0.875)
+
+
+def test_find_in_text_keeps_separate_mentions(index):
+    hits = index.find_in_text("compare gypsum and alumnium")
+    assert [m.material for m in hits] == ["Gypsum Building MAterials", "Aluminum Mill Shapes"]
+
+
+def test_word_coverage_ignores_trigrams_split_across_words():
+    # Every trigram of "paint" is in the name, but no single word holds more than half of them
+    assert word_coverage("paint", "Maint & Repair of Nonres Buildings (Partial)") == pytest.approx(0.5)
+    assert word_coverage("ready mix", "Ready Mixed Concrete") == pytest.approx(0.875)
+    assert word_coverage("gypsum", "Gypsum Building MAterials") == 1.0
@@ -0,0 +1,85 @@
+"""
+Rule-based intents (intent_parser.py), alone and fed with the fuzzy material
+hits main.py passes in for prompts without an exact material name.
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from fuzzy_index import build_fuzzy_index  # noqa: E402
+from intent_parser import LOCAL_INTENT_MIN_CONFIDENCE, parse_date, parse_intent, parse_metric  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def index():
+    names = pd.read_csv(REPO_ROOT / "AIBrain" / "theBehemoth.csv")["series_name"].unique()
+    return build_fuzzy_index(list(names))
+
+
+def local_intent(index, prompt):
+    return parse_intent(prompt, [(m.material, m.word_coverage) for m in index.find_in_text(prompt)])
+
+
+@pytest.mark.parametrize("prompt,expected", [
+    ("cement price spikes", ("spike", 1.0)),
+    ("how volatile is lumber", ("volatility", 1.0)),
+    ("3 month average for steel", ("rolling", 1.0)),
+    ("steel trend", ("momentum", 0.95)),
+    ("steel", ("momentum", 0.8)),
+    ("did steel spike or swing", ("spike", 0.4)),
+])
+def test_parse_metric(prompt, expected):
+    assert parse_metric(prompt) == expected
+
+
+@pytest.mark.parametrize("prompt,expected", [
+    ("cement in 2024-03", ("2024-03", 1.0)),
+    ("cement 3/2024", ("2024-03", 1.0)),
+    ("cement in March 2024", ("2024-03", 1.0)),
+    ("cement in mar '24", ("2024-03", 1.0)),
+    ("cement lately", ("latest", 0.95)),
+    ("cement", ("latest", 0.85)),
+    ("cement in March", ("latest", 0.4)),
+    ("cement since 2020", ("latest", 0.4)),
+    ("cement a year ago", ("latest", 0.4)),
+])
+def test_parse_date(prompt, expected):
+    assert parse_date(prompt) == expected
+
+
+def test_parse_intent_takes_the_weakest_part():
+    intent = parse_intent("cement spikes in March 2024", [("Cement", 1.0)])
+    assert intent.to_dict() == {"material": "Cement", "metric": "spike", "date": "2024-03"}
+    assert intent.confidence == 1.0
+    assert parse_intent("cement spikes in March", [("Cement", 1.0)]).confidence == 0.4
+
+
+def test_parse_intent_leaves_several_or_no_materials_to_gpt():
+    several = parse_intent("cement vs glass lately", [("Cement", 1.0), ("Flatt Glass", 1.0)])
+    assert several.confidence == 0.5
+    none = parse_intent("how is the market lately", [])
+    assert none.material is None and none.confidence == 0.0
+
+
+@pytest.mark.parametrize("prompt,expected", [
+    ("ready mix volatility lately", {"material": "Ready Mixed Concrete", "metric": "volatility", "date": "latest"}),
+    ("gypsum products trend lately", {"material": "Gypsum Building MAterials", "metric": "momentum", "date": "latest"}),
+    ("alumnium trend", {"material": "Aluminum Mill Shapes", "metric": "momentum", "date": "latest"}),
+    ("multi family lately", {"material": "Multifamily", "metric": "momentum", "date": "latest"}),
+    ("lumber spikes in jan 2025", {"material": "Lumber and Plywood", "metric": "spike", "date": "2025-01"}),
+])
+def test_fuzzy_prompts_resolve_locally(index, prompt, expected):
+    intent = local_intent(index, prompt)
+    assert intent.confidence >= LOCAL_INTENT_MIN_CONFIDENCE
+    assert intent.to_dict() == expected
+
+
+@pytest.mark.parametrize("prompt", ["paint lately", "roofing felt trend", "ready mix volatility since 2020"])
+def test_doubtful_fuzzy_prompts_go_to_gpt(index, prompt):
+    assert local_intent(index, prompt).confidence < LOCAL_INTENT_MIN_CONFIDENCE
@@ -0,0 +1,58 @@
+"""
+prepare_data.py --incremental against a full rebuild, built from the
+checked-in AIBrain/theBehemoth.csv.
+"""
+
+import filecmp
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import prepare_data  # noqa: E402
+
+CSV = REPO_ROOT / "AIBrain" / "theBehemoth.csv"
+
+
+def earlier_release(path: Path, drop_months: int, revise_row: int) -> Path:
+    """
+    The CSV as an earlier run saw it: the last `drop_months` months missing
+    and one value that was later revised.
+    """
+    df = pd.read_csv(CSV)
+    periods = sorted(set(zip(df["year"], df["month"])))
+    dropped = set(periods[len(periods) - drop_months:]) if drop_months else set()
+    df = df[[(y, m) not in dropped for y, m in zip(df["year"], df["month"])]].reset_index(drop=True)
+    df.loc[revise_row, "value"] *= 1.03
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("drop_months,revise_row", [(2, 20000), (0, 5)])
+def test_incremental_matches_full(tmp_path, capsys, compact, drop_months, revise_row):
+    state = tmp_path / "state.npz"
+    patched, rebuilt = tmp_path / "patched", tmp_path / "rebuilt"
+    old_csv = earlier_release(tmp_path / "old.csv", drop_months, revise_row)
+    prepare_data.main(str(old_csv), str(patched), state_path=str(state), compact=compact)
+
+    prepare_data.main(str(CSV), str(patched), incremental=True, state_path=str(state), compact=compact)
+    assert "Incremental" in capsys.readouterr().out
+    prepare_data.main(str(CSV), str(rebuilt), state_path=str(tmp_path / "full.npz"), compact=compact)
+
+    names = sorted(p.name for p in rebuilt.iterdir())
+    match, mismatch, errors = filecmp.cmpfiles(rebuilt, patched, names, shallow=False)
+    assert mismatch == [] and errors == []
+
+
+def test_edited_artifact_forces_full_rebuild(tmp_path, capsys):
+    state, out = tmp_path / "state.npz", tmp_path / "out"
+    prepare_data.main(str(earlier_release(tmp_path / "old.csv", 1, 5)), str(out), state_path=str(state))
+    with open(out / "material_spikes.json", "a") as f:
+        f.write("\n")
+    prepare_data.main(str(CSV), str(out), incremental=True, state_path=str(state))
+    assert "full rebuild" in capsys.readouterr().out
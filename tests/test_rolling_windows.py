@@ -0,0 +1,55 @@
+"""
+On-demand rolling windows (rolling_windows.py) against prepare_data.py's
+precomputed rolling files, built from the checked-in AIBrain/theBehemoth.csv.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import prepare_data  # noqa: E402
+from panel_artifact import encode_panel, read_panel  # noqa: E402
+from rolling_windows import DerivedRollingTable, derive_series  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return prepare_data.load_panel(str(REPO_ROOT / "AIBrain" / "theBehemoth.csv"))
+
+
+@pytest.fixture(scope="module")
+def values(frames):
+    df_pivot, df_mom, df_yoy = frames
+    content, manifest = encode_panel(
+        df_pivot.index.strftime("%Y-%m").tolist(),
+        df_pivot.columns.tolist(),
+        df_pivot.attrs["series_id"],
+        prepare_data.build_panel(df_pivot, df_mom, df_yoy),
+        meta={"correlation_lags": list(prepare_data.CORRELATION_LAGS)},
+    )
+    return read_panel(content, json.dumps(manifest).encode())["values"]
+
+
+@pytest.mark.parametrize("file_name,window,suffix", prepare_data.ROLLING_WINDOWS)
+def test_derived_table_matches_prepare_data(frames, values, file_name, window, suffix):
+    _, df_mom, df_yoy = frames
+    expected = prepare_data.build_rolling(df_mom, df_yoy, window, suffix)
+    table = DerivedRollingTable(values, window, suffix)
+    for material, rows in expected.items():
+        series = table.get(material)
+        derived = series.records() if series is not None else []
+        # Compared as serialized, so 0.01 differences and key order both count
+        assert json.dumps(derived) == json.dumps(rows), f"{file_name}: {material}"
+
+
+def test_window_label_matches_precomputed_file(frames, values):
+    _, df_mom, df_yoy = frames
+    expected = prepare_data.build_rolling(df_mom, df_yoy, 3, "3mo")
+    material = next(iter(expected))
+    series = derive_series(values.get(material), window=3)
+    assert series.records() == expected[material]
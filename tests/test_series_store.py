@@ -0,0 +1,21 @@
+"""
+Month parsing in series_store.py.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from series_store import month_ordinal, ordinal_to_date  # noqa: E402
+
+
+def test_month_ordinal_round_trip():
+    assert ordinal_to_date(month_ordinal("2024-05")) == "2024-05"
+
+
+@pytest.mark.parametrize("date", ["2024-05 and elsewhere", "2024-05-01", " 2024-05", "2024-13", "2024-5", "", None])
+def test_month_ordinal_rejects_malformed(date):
+    assert month_ordinal(date) is None